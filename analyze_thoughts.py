@@ -2,11 +2,12 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
-import glob
 from collections import Counter
 import re
 import warnings
 
+from plugins.system.ColumnarLog import latest_log, load_log, log_stem
+
 # 忽略一些无关紧要的警告
 warnings.filterwarnings("ignore")
 
@@ -19,20 +20,24 @@ plt.rcParams['axes.unicode_minus'] = False
 def analyze_thoughts():
     # 1. 自动读取最新的 thoughts_log
     results_dir = os.path.join(os.path.dirname(__file__), "results")
-    list_of_files = glob.glob(os.path.join(results_dir, 'thoughts_log_*.csv'))
+    latest_file = latest_log(results_dir, 'thoughts_log')
 
-    if not list_of_files:
+    if not latest_file:
         print("❌ 未找到 thoughts_log 文件，请先运行 run_simulation.py")
         return
 
-    latest_file = max(list_of_files, key=os.path.getctime)
     print(f"📖 正在分析思维日志: {os.path.basename(latest_file)}")
 
-    try:
-        df = pd.read_csv(latest_file, encoding='ansi')
-    except Exception as e:
-        print(f"⚠️ 读取失败，尝试默认编码... {e}")
-        df = pd.read_csv(latest_file)
+    columns = ['Tick', 'AgentType', 'Hypocrisy', 'TrustChange', 'Reasoning']
+    if os.path.isdir(latest_file):
+        # 列式日志：UTF-8 存储，只解压需要的列
+        df = load_log(latest_file, columns=columns)
+    else:
+        try:
+            df = pd.read_csv(latest_file, encoding='ansi', usecols=columns)
+        except Exception as e:
+            print(f"⚠️ 读取失败，尝试默认编码... {e}")
+            df = load_log(latest_file, columns=columns)
 
     if df.empty:
         print("❌ 日志为空，无法分析。")
@@ -117,7 +122,7 @@ def analyze_thoughts():
 
     # 保存与显示
     plt.tight_layout()
-    save_path = latest_file.replace(".csv", "_analysis.png")
+    save_path = log_stem(latest_file) + "_analysis.png"
     plt.savefig(save_path, dpi=300)
     print(f"✅ 深度分析图表已生成: {save_path}")
     plt.show()
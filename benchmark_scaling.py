@@ -0,0 +1,146 @@
+"""
+扩展性压测驱动：对本地替身 LLM 服务 (standin_llm_server.py) 按真实 tick 结构施压，
+报告随 Agent 数与并发上限增长时的 ticks/s、调用延迟 p50/p99 与服务端前缀缓存命中率 (Cache)。
+
+每个 tick 与 run_simulation.run 相同：认知层 (每个 Agent 一次 cognition 调用) -> 屏障 ->
+决策层 (plan 调用，选择 post_review 的 Agent 再追加一次 mutation 调用)。
+
+用法:
+    python benchmark_scaling.py --agents 20,100,500 --concurrency 8,32,128 --ticks 3
+    python benchmark_scaling.py --url http://127.0.0.1:8765/v1   # 压测已在运行的服务
+    python benchmark_scaling.py --layout flat,layered --agents 100 --concurrency 32   # 比较 prompt 布局的缓存命中率
+"""
+import asyncio
+import json
+import time
+from typing import List
+
+import numpy as np
+
+from plugins.model.ChatCompletionsClient import ChatCompletionsClient
+from plugins.model.PromptLayout import LayeredPrompt
+from plugins.system.PhaseExecutor import PhaseExecutor
+from standin_llm_server import PrefixCache, build_arg_parser, server_from_args
+
+_PERSONA_FILLER = (
+    "[Role Context]\nYou belong to the 'Convenient Greens' segment. You agree with sustainability in your mind, "
+    "BUT in action you strictly prioritize convenience and price. "
+) * 6
+
+
+def persona(agent_id: int) -> str:
+    return f"You are consumer #{agent_id}.\n{_PERSONA_FILLER}"
+
+
+_COGNITION_TASK = "[Task]\nEvaluate the new information.\nOutput JSON ONLY: {\"hypocrisy_perceived\": true/false}"
+_PLAN_TASK = "[Task]\nDecide your next action.\nOutput JSON ONLY: {\"action\": \"buy/post_review/ignore\"}"
+_MUTATION_TASK = "[任务]\n改写下面的信息。\n{\"mutated_content\": \"...\"}"
+
+
+# flat：原先的单字符串布局 (人设在前、状态居中、任务说明在后)；
+# layered：任务说明 + 人设作为 system 消息，状态作为 user 消息 (与插件的 PromptTemplate 布局相同)
+def cognition_prompt(agent_id: int, tick: int, layout: str = "layered") -> str:
+    state = f"[Current Context]\n- Time: Tick {tick}\n- Agent: {agent_id}"
+    if layout == "layered":
+        return LayeredPrompt(f"{_COGNITION_TASK}\n\n[Character Persona]\n{persona(agent_id)}", state)
+    return f"[Character Persona]\n{persona(agent_id)}\n{state}\n{_COGNITION_TASK}"
+
+
+def plan_prompt(agent_id: int, tick: int, layout: str = "layered") -> str:
+    state = f"[State]\n- Tick {tick}, Agent {agent_id}"
+    if layout == "layered":
+        return LayeredPrompt(f"{_PLAN_TASK}\n\n{persona(agent_id)}", state)
+    return f"{persona(agent_id)}\n{state}\n{_PLAN_TASK}"
+
+
+def mutation_prompt(agent_id: int, content: str, layout: str = "layered") -> str:
+    original = f"\"{content}\""
+    if layout == "layered":
+        return LayeredPrompt(f"{_MUTATION_TASK}\n\n[你的画像]\n{persona(agent_id)}", original)
+    return f"[你的画像]\n{persona(agent_id)}\n{original}\n{_MUTATION_TASK}"
+
+
+async def run_scenario(client: ChatCompletionsClient, n_agents: int, concurrency: int, ticks: int,
+                       layout: str = "layered") -> dict:
+    executor = PhaseExecutor(concurrency)
+    agents = list(range(n_agents))
+    latencies: List[float] = []
+
+    async def timed_chat(prompt: str) -> dict:
+        start = time.perf_counter()
+        response = await client.chat(prompt)
+        latencies.append(time.perf_counter() - start)
+        return json.loads(response)
+
+    tick_times = []
+    for tick in range(1, ticks + 1):
+        tick_start = time.perf_counter()
+
+        async def cognition_step(agent_id):
+            await timed_chat(cognition_prompt(agent_id, tick, layout))
+
+        async def action_step(agent_id):
+            plan = await timed_chat(plan_prompt(agent_id, tick, layout))
+            if plan.get("action") == "post_review":
+                await timed_chat(mutation_prompt(agent_id, plan.get("content", ""), layout))
+
+        await executor.run_phase(agents, cognition_step)
+        await executor.run_phase(agents, action_step)
+        tick_times.append(time.perf_counter() - tick_start)
+
+    lat = np.array(latencies)
+    return {
+        "agents": n_agents,
+        "concurrency": concurrency,
+        "ticks_per_s": ticks / sum(tick_times),
+        "calls": len(latencies),
+        "p50": float(np.percentile(lat, 50)) if len(lat) else 0.0,
+        "p99": float(np.percentile(lat, 99)) if len(lat) else 0.0,
+        "cache": client.cache_hit_rate(),
+    }
+
+
+def _int_list(text: str) -> List[int]:
+    return [int(x) for x in text.split(",") if x.strip()]
+
+
+async def main():
+    parser = build_arg_parser()
+    parser.description = "替身 LLM 服务扩展性压测"
+    parser.add_argument("--agents", type=_int_list, default=[20, 100, 500], help="逗号分隔的 Agent 数量")
+    parser.add_argument("--concurrency", type=_int_list, default=[8, 32, 128], help="逗号分隔的并发上限")
+    parser.add_argument("--ticks", type=int, default=3)
+    parser.add_argument("--layout", default="layered", help="逗号分隔的 prompt 布局 (flat / layered)")
+    parser.add_argument("--url", default=None, help="压测已在运行的服务，而不是在进程内启动替身服务")
+    parser.set_defaults(port=0)
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        server = await server_from_args(args).start()
+        base_url = server.base_url
+    print(f"🧪 压测目标: {base_url}")
+
+    print(f"{'Layout':>8} {'Agents':>8} {'Conc':>6} {'Ticks/s':>10} {'Calls':>8} {'p50(s)':>8} {'p99(s)':>8} "
+          f"{'Cache':>7} {'429':>6} {'Err':>5}")
+    try:
+        for layout in [x.strip() for x in args.layout.split(",") if x.strip()]:
+            for n_agents in args.agents:
+                for concurrency in args.concurrency:
+                    if server:
+                        # 每个场景从冷缓存开始，命中率只反映本场景内的前缀复用
+                        server.prefix_cache = PrefixCache(args.prefix_cache_blocks, args.cache_block_tokens)
+                    client = ChatCompletionsClient(base_url)
+                    result = await run_scenario(client, n_agents, concurrency, args.ticks, layout)
+                    await client.close()
+                    print(f"{layout:>8} {result['agents']:>8} {result['concurrency']:>6} {result['ticks_per_s']:>10.3f} "
+                          f"{result['calls']:>8} {result['p50']:>8.3f} {result['p99']:>8.3f} "
+                          f"{result['cache'] * 100:>6.1f}% {client.stats['throttled']:>6} {client.stats['errors']:>5}")
+    finally:
+        if server:
+            await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
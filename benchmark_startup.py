@@ -0,0 +1,92 @@
+"""
+启动耗时基准：以 python -X importtime 运行目标脚本 (默认 run_simulation.py --help，即只导入模块并解析参数)，
+汇总导入耗时并列出最慢的顶层模块，检查是否超出启动预算，
+以及是否在启动时加载了只应在分析阶段导入的重型库 (pandas / matplotlib / networkx / seaborn)。
+超出预算或加载了禁止的模块时以非零状态退出，可直接放进 CI。
+
+用法:
+    python benchmark_startup.py --budget-ms 1500
+    python benchmark_startup.py --repeat 5 --top 15
+    python benchmark_startup.py --target run_replicates.py --forbid pandas,matplotlib
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FORBIDDEN = "pandas,matplotlib,networkx,seaborn"
+
+
+def parse_importtime(stderr: str) -> Tuple[int, Dict[str, int], List[str]]:
+    """解析 -X importtime 输出，返回 (全部模块 self 耗时之和 us, {顶层模块: 累计耗时 us}, 全部模块名)"""
+    total, top_level, modules = 0, {}, []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        total += int(self_us)
+        module = name.strip()
+        modules.append(module)
+        # 顶层导入在 "|" 之后只有一个空格，嵌套导入每层多缩进两个空格
+        if len(name) - len(name.lstrip(" ")) == 1:
+            top_level[module] = top_level.get(module, 0) + int(cumulative_us)
+    return total, top_level, modules
+
+
+def measure(target: List[str]) -> Tuple[float, int, Dict[str, int], List[str]]:
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", *target], cwd=current_dir,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(f"目标进程退出码 {proc.returncode}:\n" + "\n".join(errors[-10:]))
+    return (wall, *parse_importtime(proc.stderr))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动 (导入) 耗时基准")
+    parser.add_argument("--target", default="run_simulation.py", help="要测量的脚本")
+    parser.add_argument("--args", default="--help", help="传给目标脚本的参数 (默认 --help：只导入不运行)")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数 (取中位数)")
+    parser.add_argument("--budget-ms", type=float, default=None, help="导入耗时预算 (毫秒)，超出则失败")
+    parser.add_argument("--forbid", default=DEFAULT_FORBIDDEN, help="启动时不允许加载的顶层包，逗号分隔")
+    parser.add_argument("--top", type=int, default=10, help="列出最慢的 N 个顶层模块")
+    args = parser.parse_args()
+
+    target = [args.target, *args.args.split()]
+    runs = [measure(target) for _ in range(max(1, args.repeat))]
+    walls = np.array([r[0] for r in runs]) * 1000
+    imports = np.array([r[1] for r in runs]) / 1000
+    median = int(np.argsort(imports)[len(imports) // 2])
+    _, _, top_level, modules = runs[median]
+
+    print(f"🚀 启动基准: python -X importtime {' '.join(target)} ({len(runs)} 次)")
+    print(f"   导入耗时 中位数 {np.median(imports):.1f} ms (最小 {imports.min():.1f} / 最大 {imports.max():.1f})")
+    print(f"   进程总耗时 中位数 {np.median(walls):.1f} ms, 共导入 {len(modules)} 个模块")
+    print(f"\n{'顶层模块':<40} {'累计(ms)':>10}")
+    for module, us in sorted(top_level.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"{module:<40} {us / 1000:>10.1f}")
+
+    failed = False
+    forbidden = {name.strip() for name in args.forbid.split(",") if name.strip()}
+    loaded = sorted({m.split(".")[0] for m in modules} & forbidden)
+    if loaded:
+        failed = True
+        print(f"\n❌ 启动时加载了应延迟导入的库: {', '.join(loaded)}")
+    if args.budget_ms is not None:
+        if np.median(imports) > args.budget_ms:
+            failed = True
+            print(f"\n❌ 导入耗时超出预算: {np.median(imports):.1f} ms > {args.budget_ms:.1f} ms")
+        else:
+            print(f"\n✅ 导入耗时在预算内 ({args.budget_ms:.1f} ms)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
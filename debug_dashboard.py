@@ -1,10 +1,10 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
-import glob
 import numpy as np
 
+from plugins.system.ColumnarLog import latest_log, load_log, log_stem
+
 # 设置绘图风格
 sns.set_theme(style="whitegrid")
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial']  # 用来正常显示中文标签
@@ -18,15 +18,15 @@ def generate_dashboard():
         print("❌ 未找到 results 文件夹")
         return
 
-    list_of_files = glob.glob(os.path.join(results_dir, 'simulation_log_*.csv'))
-    if not list_of_files:
+    # CSV 或列式日志均可，只读取仪表盘用到的列
+    latest_file = latest_log(results_dir, 'simulation_log')
+    if not latest_file:
         print("❌ 未找到数据文件，请先运行 run_simulation.py")
         return
 
-    latest_file = max(list_of_files, key=os.path.getctime)
     print(f"📊 正在分析: {os.path.basename(latest_file)}")
 
-    df = pd.read_csv(latest_file)
+    df = load_log(latest_file, columns=['Tick', 'AgentID', 'Type', 'TrustScore', 'Action', 'Thought_Hypocrisy'])
 
     # 2. 准备画布 (2x2)
     fig, axes = plt.subplots(2, 2, figsize=(16, 12))
@@ -106,7 +106,7 @@ def generate_dashboard():
 
     # 3. 保存与显示
     plt.tight_layout()
-    save_path = latest_file.replace(".csv", "_dashboard.png")
+    save_path = log_stem(latest_file) + "_dashboard.png"
     plt.savefig(save_path, dpi=300)
     print(f"✅ 仪表盘已生成: {save_path}")
     plt.show()
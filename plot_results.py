@@ -1,23 +1,22 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import os
-import glob
+
+from plugins.system.ColumnarLog import latest_log, load_log, log_stem
 
 
 def plot_latest_simulation():
     # 1. 强制精确匹配 simulation_log 文件，彻底阻断抓取到 thought 或 macro 日志
     results_dir = os.path.join(os.path.dirname(__file__), "results")
-    list_of_files = glob.glob(os.path.join(results_dir, 'simulation_log_*.csv'))
+    latest_file = latest_log(results_dir, 'simulation_log')
 
-    if not list_of_files:
+    if not latest_file:
         print("❌ 没有找到 simulation_log 数据文件，请先运行 run_simulation.py")
         return
 
-    latest_file = max(list_of_files, key=os.path.getctime)
     print(f"📈 正在读取并绘制基础动作日志: {os.path.basename(latest_file)}")
 
-    # 2. 读取数据
-    df = pd.read_csv(latest_file)
+    # 2. 读取数据 (只读取分组与均值需要的三列)
+    df = load_log(latest_file, columns=['Tick', 'Type', 'TrustScore'])
 
     # 3. 分组计算平均信任值
     # 按 Tick 和 Type 分组，计算 TrustScore 的均值
@@ -44,7 +43,7 @@ def plot_latest_simulation():
     plt.ylim(0, 10)
 
     # 保存图片
-    img_path = latest_file.replace(".csv", ".png")
+    img_path = log_stem(latest_file) + ".png"
     plt.savefig(img_path)
     print(f"🖼️ 信任演化对比图已保存至: {img_path}")
     plt.show()
@@ -1,11 +1,41 @@
 import json
 from agentkernel_standalone.mas.agent.base.plugin_base import InvokePlugin
 
+from plugins.model.PromptLayout import PromptTemplate
+
+# system：变异规则与输出格式在前，其后为本 Agent 的画像；user：待改写的原始信息
+MUTATION_SYSTEM = """
+[任务：UGC 内容变异机制]
+请基于你的画像特质，将用户给出的初始信息改写为一条真实的社交媒体发文或评论。
+规则：
+必须符合人类在社交网络上交流的口吻（如带有一些主观感叹）。
+
+仅输出严格的 JSON 格式：
+{{
+    "mutated_content": "变异后的具体社交媒体发文内容"
+}}
+
+[你的画像]
+{persona}
+"""
+
+MUTATION_USER = """
+[你原本计划发送或转发的初始信息]
+"{content}"
+"""
+
 
 class GreenInvokePlugin(InvokePlugin):
     async def init(self):
         pass
 
+    @property
+    def template(self) -> PromptTemplate:
+        # 每个 Agent 的插件实例编译一次
+        if getattr(self, "_template", None) is None:
+            self._template = PromptTemplate(MUTATION_SYSTEM, MUTATION_USER)
+        return self._template
+
     # === Helper ===
     def _get_agent(self):
         if hasattr(self, "agent") and self.agent: return self.agent
@@ -75,23 +105,7 @@ class GreenInvokePlugin(InvokePlugin):
         involvement = p_data.get("psychology", {}).get("environmental_involvement", "Light Green")
 
         # 构造变异 Prompt
-        mutation_prompt = f"""
-[你的画像]
-{persona}
-
-[你原本计划发送或转发的初始信息]
-"{original_content}"
-
-[任务：UGC 内容变异机制]
-请基于你的画像特质，将上述信息改写为一条真实的社交媒体发文或评论。
-规则：
-必须符合人类在社交网络上交流的口吻（如带有一些主观感叹）。
-
-仅输出严格的 JSON 格式：
-{{
-    "mutated_content": "变异后的具体社交媒体发文内容"
-}}
-"""
+        mutation_prompt = self.template.render({"persona": persona}, {"content": original_content})
         mutated_content = original_content  # 默认兜底机制
         try:
             model = getattr(agent, "model", getattr(agent, "_model", None))
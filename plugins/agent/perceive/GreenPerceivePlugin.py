@@ -45,15 +45,40 @@ class GreenPerceivePlugin(PerceivePlugin):
         current_inbox.append(formatted_msg)
         await state_plugin.set_state("incoming_messages", current_inbox)
 
+    def _get_network_plugin(self):
+        agent = self._get_agent()
+        if agent and hasattr(agent, "env") and agent.env:
+            comp = agent.env.get_component("network")
+            return getattr(comp, "_plugin", getattr(comp, "plugin", None)) if comp else None
+        return None
+
     async def execute(self, current_tick: int) -> None:
         state_plugin = self._get_state_plugin()
         if not state_plugin: return
 
-        new_messages = state_plugin.state_data.get("incoming_messages") or []
+        # 社交消息来自网络插件的双缓冲收件箱，直接取得列表所有权，无需复制
+        # 未读的全局公告追加在私信之后 (与旧版收件箱中新闻排在最后的顺序一致)
+        network_plugin = self._get_network_plugin()
+        mailbox_messages, global_events = [], []
+        if network_plugin:
+            agent_id = self._get_agent().agent_id
+            mailbox_messages = network_plugin.mailboxes.take(agent_id)
+            global_events = network_plugin.bulletin.unread(agent_id)
+        # 兼容直接写入 state 的消息 (add_message 等)
+        legacy_messages = state_plugin.state_data.get("incoming_messages") or []
         current_observations = state_plugin.state_data.get("observations") or []
 
-        if new_messages:
-            current_observations.extend(new_messages)
+        if not mailbox_messages and not global_events and not legacy_messages:
+            return
+
+        if current_observations:
+            current_observations.extend(mailbox_messages)
+        else:
+            current_observations = mailbox_messages
+        current_observations.extend(global_events)
+        current_observations.extend(legacy_messages)
+
+        if legacy_messages:
             await state_plugin.set_state("incoming_messages", [])
-            await state_plugin.set_state("observations", current_observations)
+        await state_plugin.set_state("observations", current_observations)
             # print(f"👀 [Perceive] 感知到 {len(new_messages)} 条新消息。")
\ No newline at end of file
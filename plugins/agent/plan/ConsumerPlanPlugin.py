@@ -1,11 +1,51 @@
 import json
 from agentkernel_standalone.mas.agent.base.plugin_base import PlanPlugin
 
+from plugins.model.PromptLayout import PromptTemplate
+
+# system：决策规则与输出格式、人设与商品信息 (除预热期开关外跨 tick 不变)；user：本 tick 的环境、预算、信任与想法
+PLAN_SYSTEM = """
+[Task]
+Decide your NEXT SINGLE ACTION based on your persona and state:
+1. 'buy': {buy_rule}
+2. 'post_review': ONLY if you strongly want to express your opinion on social media AND you decided NOT to buy this time.
+3. 'ignore': If you don't care, or if you cannot afford it.
+
+CRITICAL RULE: The "reason" and "content" fields MUST BE WRITTEN ENTIRELY IN ENGLISH.
+
+Output JSON ONLY:
+{{
+    "action": "buy/post_review/ignore",
+    "content": "Social media post content if you choose post_review (IN ENGLISH, otherwise empty)",
+    "reason": "Explain your reason here (STRICTLY IN ENGLISH)"
+}}
+
+{persona}
+Product: '{product_name}' (Price: {product_price}).
+"""
+
+PLAN_USER = """
+[Context]
+System Environment: {time_context}
+Your Budget: {budget}
+
+[State]
+- Trust: {trust}/10.0
+- Thought: {thought}
+"""
+
 
 class ConsumerPlanPlugin(PlanPlugin):
     async def init(self):
         pass
 
+    @property
+    def template(self) -> PromptTemplate:
+        # 每个 Agent 的插件实例编译一次
+        if getattr(self, "_template", None) is None:
+            self._template = PromptTemplate(PLAN_SYSTEM, PLAN_USER)
+        return self._template
+
     def _get_agent(self):
         if hasattr(self, "agent") and self.agent: return self.agent
         if self.component and hasattr(self.component, "agent"): return self.component.agent
@@ -52,33 +92,9 @@ class ConsumerPlanPlugin(PlanPlugin):
         thought_str = json.dumps(latest_thought) if latest_thought else "No specific thoughts."
 
         # 3. 构造决策 Prompt
-        prompt = f"""
-{persona}
-
-[Context]
-System Environment: {time_context}
-Product: '{product_name}' (Price: {product_price}).
-Your Budget: {budget}
-
-[State]
-- Trust: {trust_score}/10.0
-- Thought: {thought_str}
-
-[Task]
-Decide your NEXT SINGLE ACTION based on your persona and state:
-1. 'buy': {buy_rule}
-2. 'post_review': ONLY if you strongly want to express your opinion on social media AND you decided NOT to buy this time.
-3. 'ignore': If you don't care, or if you cannot afford it.
-
-CRITICAL RULE: The "reason" and "content" fields MUST BE WRITTEN ENTIRELY IN ENGLISH.
-
-Output JSON ONLY: 
-{{ 
-    "action": "buy/post_review/ignore", 
-    "content": "Social media post content if you choose post_review (IN ENGLISH, otherwise empty)", 
-    "reason": "Explain your reason here (STRICTLY IN ENGLISH)" 
-}}
-"""
+        prompt = self.template.render(
+            {"buy_rule": buy_rule, "persona": persona, "product_name": product_name, "product_price": product_price},
+            {"time_context": time_context, "budget": budget, "trust": trust_score, "thought": thought_str})
         try:
             model = getattr(agent, "model", getattr(agent, "_model", None))
             if not model: return
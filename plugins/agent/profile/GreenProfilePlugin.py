@@ -7,6 +7,7 @@ class GreenProfilePlugin(ProfilePlugin):
         # 1. 必须调用父类初始化，建立组件关联的基础
         super().__init__()
         self._profile_data = profile_data if profile_data is not None else {}
+        self._prompt = None  # get_prompt 的结果，画像修改时失效
 
     async def init(self):
         """插件初始化逻辑"""
@@ -20,8 +21,15 @@ class GreenProfilePlugin(ProfilePlugin):
     async def set_profile(self, key: str, value: Any):
         """支持动态修改 Profile"""
         self._profile_data[key] = value
+        self._prompt = None
 
     def get_prompt(self) -> str:
+        # 画像是静态的：只拼装一次，之后每次决策返回同一字符串 (前缀稳定，也免去重复格式化)
+        if self._prompt is None:
+            self._prompt = self._build_prompt()
+        return self._prompt
+
+    def _build_prompt(self) -> str:
         # 使用 self._profile_data 访问数据
         if not self._profile_data:
             return "You are a consumer agent."
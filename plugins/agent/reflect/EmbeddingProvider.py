@@ -0,0 +1,177 @@
+import hashlib
+import os
+import re
+import zlib
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+EMBEDDING_DIM = 384
+
+_TOKEN = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]")
+
+
+class EmbeddingProvider:
+    """
+    嵌入后端接口。embed / embed_many 返回行已 L2 归一化的 float32 向量，
+    只依赖输入文本本身，不读写全局随机数状态。
+    """
+    dim = EMBEDDING_DIM
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    本地默认后端：哈希技巧 (hashing trick) 词袋向量，无需下载权重。
+    英文按词切分并加入相邻词二元组，中文按单字及相邻字二元组切分；
+    使用 crc32 (与进程哈希种子无关) 决定桶位与符号，词频取 log(1 + tf)。
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        tokens = _TOKEN.findall(text.lower())
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                out[row, h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        out = np.sign(out) * np.log1p(np.abs(out))
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.maximum(norms, 1e-9)
+
+
+class SentenceTransformerProvider(EmbeddingProvider):
+    """可选后端：sentence-transformers 语义向量 (需单独安装该依赖)"""
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError("sentence-transformers 未安装，请 pip install sentence-transformers "
+                              "或在 runtime_config.yaml 中使用 hashing 后端") from e
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        vectors = self.model.encode(list(texts), normalize_embeddings=True, show_progress_bar=False)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class CachedEmbeddingProvider(EmbeddingProvider):
+    """
+    内容哈希缓存：相同文本 (例如同一条全局新闻) 在所有 Agent 间只嵌入一次。
+    按最近使用 (LRU) 最多保留 max_entries 条 (0 表示不限)：记忆文本含 LLM 生成的理由，几乎不会重复，
+    不限容量时每条记忆的嵌入都会常驻内存并写入缓存文件。
+    可保存为 .npz 文件，在多次运行之间复用。
+    """
+
+    def __init__(self, backend: EmbeddingProvider, path: Optional[str] = None, max_entries: int = 20000):
+        self.backend = backend
+        self.dim = backend.dim
+        self.path = path
+        self.max_entries = max(0, int(max_entries or 0))
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            self.load(path)
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def _insert(self, key: str, vec: np.ndarray) -> None:
+        self._cache[key] = vec
+        self._cache.move_to_end(key)
+        if self.max_entries and len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        keys = [self._key(t) for t in texts]
+        found, missing = {}, {}
+        for key, text in zip(keys, texts):
+            if key in found or key in missing:
+                continue
+            vec = self._cache.get(key)
+            if vec is None:
+                missing[key] = text
+            else:
+                self._cache.move_to_end(key)
+                found[key] = vec
+        if missing:
+            vectors = self.backend.embed_many(list(missing.values()))
+            for key, vec in zip(missing.keys(), vectors):
+                found[key] = vec
+                self._insert(key, vec)
+        self.misses += len(missing)
+        self.hits += len(texts) - len(missing)
+
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for row, key in enumerate(keys):
+            out[row] = found[key]
+        return out
+
+    def load(self, path: str) -> None:
+        data = np.load(path, allow_pickle=False)
+        if data["vectors"].shape[1] != self.dim:
+            print(f"⚠️ [Embedding] 缓存维度 {data['vectors'].shape[1]} 与后端 {self.dim} 不符，忽略: {path}")
+            return
+        for key, vec in zip(data["keys"].tolist(), data["vectors"]):
+            self._insert(key, vec)
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        if not path or not self._cache:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        keys = np.array(list(self._cache.keys()))
+        vectors = np.stack(list(self._cache.values())).astype(np.float32)
+        # np.savez 会自动补 .npz 后缀，这里用文件句柄保证路径与配置一致；
+        # 先写临时文件再原子替换，同时启动的其他进程不会读到写了一半的文件
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, keys=keys, vectors=vectors)
+        os.replace(tmp, path)
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"嵌入缓存命中率 {rate:.1f}% ({self.hits}/{total}), 共 {len(self._cache)} 条"
+
+
+# --- 全 Agent 共享的默认后端 ---
+_default_provider: Optional[EmbeddingProvider] = None
+
+
+def build_provider(backend: str = "hashing", dim: int = EMBEDDING_DIM, model: Optional[str] = None,
+                   cache_path: Optional[str] = None, cache_size: int = 20000) -> CachedEmbeddingProvider:
+    if backend in ("sentence-transformers", "sentence_transformers"):
+        inner = SentenceTransformerProvider(model or "all-MiniLM-L6-v2")
+    elif backend == "hashing":
+        inner = HashingEmbeddingProvider(dim)
+    else:
+        raise ValueError(f"未知的嵌入后端: {backend}")
+    return CachedEmbeddingProvider(inner, cache_path, max_entries=cache_size)
+
+
+def get_default_provider() -> EmbeddingProvider:
+    global _default_provider
+    if _default_provider is None:
+        _default_provider = build_provider()
+    return _default_provider
+
+
+def set_default_provider(provider: EmbeddingProvider) -> None:
+    global _default_provider
+    _default_provider = provider
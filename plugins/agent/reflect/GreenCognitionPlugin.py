@@ -1,11 +1,48 @@
 import json
 from agentkernel_standalone.mas.agent.base.plugin_base import ReflectPlugin
 
+from plugins.model.PromptLayout import PromptTemplate
+
+# system：全体 Agent 相同的任务说明在前，其后为本 Agent 的人设 (跨 tick 不变)；user：本 tick 的记忆与新信息
+COGNITION_SYSTEM = """
+[Task]
+Each turn you receive a new piece of information together with your retrieved memories and current state.
+Based on your persona and historical memory, evaluate this information. Limited rationality and path dependence applies.
+Output JSON ONLY:
+{{
+    "hypocrisy_perceived": true/false,
+    "trust_change": float, // Scale: -1.0 to +1.0
+    "importance": float, // Rate importance of this event (1.0 to 10.0) for future memory
+    "reasoning": "Short first-person thought.(STRICTLY IN ENGLISH)"
+}}
+
+[Character Persona]
+{persona}
+"""
+
+COGNITION_USER = """
+[Your Historical Memory (Retrieved via RAG)]
+{memory_text}
+
+[Current Context]
+- Time: Tick {tick}
+- Source: '{source}'
+- Your Current Trust: {trust}/10.0
+- New Info: "{content}"
+"""
+
 
 class GreenCognitionPlugin(ReflectPlugin):
     async def init(self):
         pass
 
+    @property
+    def template(self) -> PromptTemplate:
+        # 每个 Agent 的插件实例编译一次
+        if getattr(self, "_template", None) is None:
+            self._template = PromptTemplate(COGNITION_SYSTEM, COGNITION_USER)
+        return self._template
+
     def _get_agent(self):
         if hasattr(self, "agent") and self.agent: return self.agent
         if self.component and hasattr(self.component, "agent"): return self.component.agent
@@ -40,32 +77,18 @@ class GreenCognitionPlugin(ReflectPlugin):
         persona_rules = p_data.get("persona", "你是一名普通消费者。")  # 直接读取生成好的严格画像
 
         # === RAG 检索执行 ===
-        retrieved_memories = state_plugin.retrieve_memory(current_tick, info_content, top_k=3)
+        # 优先使用本 tick 全体批量检索的结果，未命中时再单独检索
+        precomputed = state_data.get("retrieved_memories") or {}
+        if precomputed.get("tick") == current_tick and precomputed.get("query") == info_content:
+            retrieved_memories = precomputed.get("memories", [])
+        else:
+            retrieved_memories = state_plugin.retrieve_memory(current_tick, info_content, top_k=3)
         memory_text = "\n".join([f"- {m}" for m in retrieved_memories]) if retrieved_memories else "无相关历史回忆。"
 
-        prompt = f"""
-[Character Persona]
-{persona_rules}
-
-[Your Historical Memory (Retrieved via RAG)]
-{memory_text}
-
-[Current Context]
-- Time: Tick {current_tick}
-- Source: '{info_source}'
-- Your Current Trust: {current_trust}/10.0
-- New Info: "{info_content}"
-
-[Task]
-Based on your persona and historical memory, evaluate this information. Limited rationality and path dependence applies.
-Output JSON ONLY:
-{{
-    "hypocrisy_perceived": true/false,
-    "trust_change": float, // Scale: -1.0 to +1.0
-    "importance": float, // Rate importance of this event (1.0 to 10.0) for future memory
-    "reasoning": "Short first-person thought.(STRICTLY IN ENGLISH)"
-}}
-"""
+        prompt = self.template.render(
+            {"persona": persona_rules},
+            {"memory_text": memory_text, "tick": current_tick, "source": info_source,
+             "trust": current_trust, "content": info_content})
         try:
             model = getattr(agent, "model", getattr(agent, "_model", None))
             response = await model.chat(prompt)
@@ -0,0 +1,252 @@
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from plugins.agent.reflect.EmbeddingProvider import EmbeddingProvider, get_default_provider
+from plugins.agent.reflect.MemoryPolicy import MemoryPolicy, get_default_policy
+
+
+class MemoryArena:
+    """
+    全体 Agent 共享的记忆池 (结构数组布局)。
+    每条记忆占一行：嵌入矩阵 (行已归一化)、tick、importance、owner 列并行存储，
+    按 owner 排序得到的偏移索引 (CSR) 可快速定位单个 Agent 的全部记忆。
+    batch_retrieve 在一次向量化 / 分段运算中为全体 (agent, query) 返回各自的 top-k。
+    被淘汰的行 owner 置为 -1 (墓碑)，墓碑比例过高时整体压缩。
+    """
+
+    def __init__(self, alpha=1.0, beta=1.0, gamma=1.5, initial_capacity=1024, embedder: EmbeddingProvider = None,
+                 policy: MemoryPolicy = None):
+        self.weights = {'alpha': alpha, 'beta': beta, 'gamma': gamma}
+        self.embedder = embedder or get_default_provider()
+        self.policy = policy or get_default_policy()
+        self.dim = self.embedder.dim
+
+        self._size = 0
+        self._embeddings = np.zeros((initial_capacity, self.dim), dtype=np.float32)
+        self._ticks = np.zeros(initial_capacity, dtype=np.int64)
+        self._importance = np.zeros(initial_capacity, dtype=np.float32)
+        self._owner = np.zeros(initial_capacity, dtype=np.int32)
+        self._contents: List[str] = []
+
+        self.agent_index: Dict[str, int] = {}
+        self._counts: List[int] = []
+        self._dead = 0
+        # 按 owner 分组的行号索引，写入后懒重建
+        self._order = np.zeros(0, dtype=np.int64)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._index_dirty = False
+
+    # --- Agent 注册 ---
+    def register(self, agent_id: str) -> int:
+        if agent_id not in self.agent_index:
+            self.agent_index[agent_id] = len(self.agent_index)
+            self._counts.append(0)
+            self._index_dirty = True
+        return self.agent_index[agent_id]
+
+    def view(self, agent_id: str) -> "ArenaMemoryView":
+        return ArenaMemoryView(self, self.register(agent_id))
+
+    # --- 写入 ---
+    def _grow(self):
+        capacity = max(1, len(self._ticks)) * 2
+        n = self._size
+
+        def grown(arr, shape):
+            out = np.zeros(shape, dtype=arr.dtype)
+            out[:n] = arr[:n]
+            return out
+
+        self._embeddings = grown(self._embeddings, (capacity, self.dim))
+        self._ticks = grown(self._ticks, capacity)
+        self._importance = grown(self._importance, capacity)
+        self._owner = grown(self._owner, capacity)
+
+    def _append(self, owner: int, tick: int, content: str, importance: float, embedding: np.ndarray):
+        if self._size == len(self._ticks):
+            self._grow()
+        i = self._size
+        self._embeddings[i] = embedding
+        self._ticks[i] = tick
+        self._importance[i] = importance
+        self._owner[i] = owner
+        self._contents.append(content)
+        self._size += 1
+        self._counts[owner] += 1
+        self._index_dirty = True
+
+    def add(self, owner: int, tick: int, content: str, importance: float):
+        self._append(owner, tick, content, importance, self.embedder.embed(content))
+
+    def replace(self, owner: int, records: list):
+        """用 memory_stream 格式的记录整体替换某个 Agent 的记忆 (断点恢复用)"""
+        rows = self.rows_of(owner)
+        self._owner[rows] = -1
+        for r in rows:
+            self._contents[r] = None
+        self._counts[owner] -= len(rows)
+        self._dead += len(rows)
+        self._index_dirty = True
+        for r in records:
+            self._append(owner, r["tick"], r["content"], r["importance"],
+                         np.asarray(r["embedding"], dtype=np.float32))
+        if self._dead > self._size // 4:
+            self._compact()
+
+    # --- 容量控制 ---
+    def enforce_capacity(self, current_tick: int) -> int:
+        """
+        对所有超出容量的 Agent 执行淘汰 / 折叠 (建议每 tick 在反思层之后调用一次)。
+        返回被移除的记忆条数。
+        """
+        if not self.policy.bounded:
+            return 0
+        counts = np.asarray(self._counts)
+        over = np.flatnonzero(counts > self.policy.capacity)
+        if len(over) == 0:
+            return 0
+
+        self._ensure_index()
+        removed = 0
+        summaries = []
+        for owner in over:
+            rows = self.rows_of(int(owner))
+            local = self.policy.select(current_tick, self._ticks[rows], self._importance[rows])
+            victims = rows[local]
+            if self.policy.consolidate:
+                summaries.append((int(owner), *self.policy.summarize(
+                    [self._contents[r] for r in victims], self._ticks[victims],
+                    self._importance[victims], self._embeddings[victims])))
+            self._owner[victims] = -1
+            for r in victims:
+                self._contents[r] = None
+            self._counts[owner] -= len(victims)
+            removed += len(victims)
+
+        self._dead += removed
+        self._index_dirty = True
+        for summary in summaries:
+            self._append(*summary)
+        if self._dead > self._size // 4:
+            self._compact()
+        return removed
+
+    def _compact(self):
+        n = self._size
+        keep = self._owner[:n] >= 0
+        m = int(keep.sum())
+        self._embeddings[:m] = self._embeddings[:n][keep]
+        self._ticks[:m] = self._ticks[:n][keep]
+        self._importance[:m] = self._importance[:n][keep]
+        self._owner[:m] = self._owner[:n][keep]
+        self._contents = [c for c, k in zip(self._contents, keep) if k]
+        self._size = m
+        self._dead = 0
+        self._index_dirty = True
+
+    # --- 索引 ---
+    def _ensure_index(self):
+        if not self._index_dirty:
+            return
+        owners = self._owner[:self._size]
+        self._order = np.argsort(owners, kind="stable")
+        self._offsets = np.searchsorted(owners[self._order], np.arange(len(self.agent_index) + 1))
+        self._index_dirty = False
+
+    def rows_of(self, owner: int) -> np.ndarray:
+        """某个 Agent 的全部记忆行号 (按写入顺序)"""
+        self._ensure_index()
+        if owner + 1 >= len(self._offsets):
+            return np.zeros(0, dtype=np.int64)
+        return self._order[self._offsets[owner]:self._offsets[owner + 1]]
+
+    def count(self, owner: int) -> int:
+        return self._counts[owner]
+
+    def _format(self, row: int) -> str:
+        return f"Tick {self._ticks[row]}: {self._contents[row]}"
+
+    # --- 打分与检索 ---
+    def _score_rows(self, rows: np.ndarray, current_tick: int, relevance: np.ndarray) -> np.ndarray:
+        recency = np.exp(-0.1 * (current_tick - self._ticks[rows]))
+        importance = self._importance[rows] / 10.0
+        return (self.weights['alpha'] * recency + self.weights['beta'] * importance
+                + self.weights['gamma'] * relevance)
+
+    def retrieve(self, owner: int, current_tick: int, query: str, top_k: int = 3) -> list:
+        rows = self.rows_of(owner)
+        if len(rows) == 0 or top_k <= 0: return []
+        relevance = self._embeddings[rows] @ self.embedder.embed(query)
+        scores = self._score_rows(rows, current_tick, relevance)
+
+        k = min(top_k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(rows) else np.arange(len(rows))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [self._format(rows[i]) for i in top]
+
+    def batch_retrieve(self, requests: Sequence[Tuple[str, str]], current_tick: int,
+                       top_k: int = 3) -> Dict[str, list]:
+        """
+        一次性完成全体检索。requests 为 (agent_id, query) 列表，返回 {agent_id: top-k 记忆文本}。
+        查询文本批量嵌入 (相同文本只嵌入一次)，所有相关行在一次 einsum 中打分，
+        再按 (查询序号, -分数) 排序后分段截取 top-k。
+        """
+        results = {agent_id: [] for agent_id, _ in requests}
+        if not requests or self._size == 0 or top_k <= 0:
+            return results
+
+        owners = np.array([self.register(agent_id) for agent_id, _ in requests], dtype=np.int64)
+        self._ensure_index()
+        queries = self.embedder.embed_many([q for _, q in requests])
+
+        # 拼接所有被查询 Agent 的记忆行，并记录每行对应的查询序号
+        starts = self._offsets[owners]
+        counts = self._offsets[owners + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            return results
+        slot = np.repeat(np.arange(len(requests)), counts)
+        seg_start = np.repeat(np.cumsum(counts) - counts, counts)
+        rows = self._order[np.repeat(starts, counts) + (np.arange(total) - seg_start)]
+
+        # 每行记忆与其 owner 的查询向量逐行点积
+        relevance = np.einsum("ij,ij->i", self._embeddings[rows], queries[slot])
+        scores = self._score_rows(rows, current_tick, relevance)
+
+        # 分段 top-k：先按查询序号、再按分数降序排序，取每段前 k 个
+        ordered = np.lexsort((-scores, slot))
+        rank = np.arange(total) - seg_start
+        keep = ordered[rank < top_k]
+        for idx in keep:
+            results[requests[slot[idx]][0]].append(self._format(rows[idx]))
+        return results
+
+
+class ArenaMemoryView:
+    """记忆池中单个 Agent 的视图，接口与 MemoryManager 一致"""
+
+    def __init__(self, arena: MemoryArena, owner: int):
+        self.arena = arena
+        self.owner = owner
+
+    def __len__(self):
+        return self.arena.count(self.owner)
+
+    @property
+    def memory_stream(self) -> list:
+        a = self.arena
+        return [
+            {"tick": int(a._ticks[r]), "content": a._contents[r],
+             "importance": float(a._importance[r]), "embedding": a._embeddings[r]}
+            for r in a.rows_of(self.owner)
+        ]
+
+    def add_memory(self, tick: int, content: str, importance: float):
+        self.arena.add(self.owner, tick, content, importance)
+
+    def replace_memories(self, records: list):
+        self.arena.replace(self.owner, records)
+
+    def retrieve(self, current_tick: int, query: str, top_k: int = 3) -> list:
+        return self.arena.retrieve(self.owner, current_tick, query, top_k)
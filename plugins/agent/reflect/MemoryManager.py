@@ -1,41 +1,120 @@
 import numpy as np
 
+from plugins.agent.reflect.EmbeddingProvider import EmbeddingProvider, get_default_provider
+from plugins.agent.reflect.MemoryPolicy import MemoryPolicy, get_default_policy
+
+
 class MemoryManager:
     """
     基于有限理性 (Bounded Rationality) 假设的联想记忆模型。
+    记忆以连续的嵌入矩阵 (行已归一化) 与并行的 tick / importance 数组存储，
+    检索时一次矩阵乘法完成相关性打分，argpartition 取 top-k。
+    设置容量策略后，记忆条数与检索开销不随运行时长无限增长。
     """
-    def __init__(self, alpha=1.0, beta=1.0, gamma=1.5):
-        self.memory_stream = []
+    def __init__(self, alpha=1.0, beta=1.0, gamma=1.5, initial_capacity=16, embedder: EmbeddingProvider = None,
+                 policy: MemoryPolicy = None):
         self.weights = {'alpha': alpha, 'beta': beta, 'gamma': gamma}
+        # 默认使用全 Agent 共享的嵌入后端 (带内容哈希缓存) 与容量策略
+        self.embedder = embedder or get_default_provider()
+        self.policy = policy or get_default_policy()
+        self.dim = self.embedder.dim
+        self._size = 0
+        self._embeddings = np.zeros((initial_capacity, self.dim), dtype=np.float32)
+        self._ticks = np.zeros(initial_capacity, dtype=np.int64)
+        self._importance = np.zeros(initial_capacity, dtype=np.float32)
+        self._contents = []
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def memory_stream(self) -> list:
+        """兼容旧接口：按写入顺序返回记忆字典列表"""
+        return [
+            {"tick": int(self._ticks[i]), "content": self._contents[i],
+             "importance": float(self._importance[i]), "embedding": self._embeddings[i]}
+            for i in range(self._size)
+        ]
 
     def _get_embedding(self, text: str) -> np.ndarray:
-        # 占位：生产环境需替换为 sentence-transformers
-        np.random.seed(sum(ord(c) for c in text) % (2**32))
-        return np.random.rand(384)
+        # 后端返回的向量已归一化
+        return self.embedder.embed(text)
+
+    def _grow(self):
+        capacity = max(1, len(self._ticks)) * 2
+        embeddings = np.zeros((capacity, self.dim), dtype=np.float32)
+        embeddings[:self._size] = self._embeddings[:self._size]
+        ticks = np.zeros(capacity, dtype=np.int64)
+        ticks[:self._size] = self._ticks[:self._size]
+        importance = np.zeros(capacity, dtype=np.float32)
+        importance[:self._size] = self._importance[:self._size]
+        self._embeddings, self._ticks, self._importance = embeddings, ticks, importance
+
+    def _append(self, tick: int, content: str, importance: float, embedding: np.ndarray):
+        if self._size == len(self._ticks):
+            self._grow()
+        i = self._size
+        self._embeddings[i] = embedding
+        self._ticks[i] = tick
+        self._importance[i] = importance
+        self._contents.append(content)
+        self._size += 1
+
+    def replace_memories(self, records: list):
+        """用 memory_stream 格式的记录整体替换当前记忆 (断点恢复用)"""
+        self._size = 0
+        self._contents = []
+        for r in records:
+            self._append(r["tick"], r["content"], r["importance"], np.asarray(r["embedding"], dtype=np.float32))
 
     def add_memory(self, tick: int, content: str, importance: float):
-        self.memory_stream.append({
-            "tick": tick,
-            "content": content,
-            "importance": importance,
-            "embedding": self._get_embedding(content)
-        })
+        self._append(tick, content, importance, self._get_embedding(content))
+        if self.policy.bounded and self._size > self.policy.capacity:
+            self._enforce_capacity(tick)
+
+    def _enforce_capacity(self, current_tick: int):
+        n = self._size
+        victims = self.policy.select(current_tick, self._ticks[:n], self._importance[:n])
+        if len(victims) == 0:
+            return
+        summary = None
+        if self.policy.consolidate:
+            summary = self.policy.summarize([self._contents[i] for i in victims], self._ticks[victims],
+                                            self._importance[victims], self._embeddings[victims])
+
+        # 压缩存储：保留未被选中的行 (保持写入顺序)
+        keep = np.ones(n, dtype=bool)
+        keep[victims] = False
+        m = int(keep.sum())
+        self._embeddings[:m] = self._embeddings[:n][keep]
+        self._ticks[:m] = self._ticks[:n][keep]
+        self._importance[:m] = self._importance[:n][keep]
+        self._contents = [c for c, k in zip(self._contents, keep) if k]
+        self._size = m
+
+        if summary is not None:
+            self._append(*summary)
+
+    def score(self, current_tick: int, query_emb: np.ndarray) -> np.ndarray:
+        """对全部记忆一次性打分，query_emb 需已归一化"""
+        n = self._size
+        # 新近性衰减 (Recency)
+        recency = np.exp(-0.1 * (current_tick - self._ticks[:n]))
+        # 重要性 (Importance)
+        importance = self._importance[:n] / 10.0
+        # 相关性 (Relevance)：行已归一化，点积即余弦相似度
+        relevance = self._embeddings[:n] @ query_emb
+        return (self.weights['alpha'] * recency + self.weights['beta'] * importance
+                + self.weights['gamma'] * relevance)
 
     def retrieve(self, current_tick: int, query: str, top_k: int = 3) -> list:
-        if not self.memory_stream: return []
-        query_emb = self._get_embedding(query)
-        scored_memories = []
-
-        for mem in self.memory_stream:
-            # 新近性衰减 (Recency)
-            recency = np.exp(-0.1 * (current_tick - mem['tick']))
-            # 重要性 (Importance)
-            importance = mem['importance'] / 10.0
-            # 相关性 (Relevance)
-            relevance = np.dot(query_emb, mem['embedding']) / (np.linalg.norm(query_emb) * np.linalg.norm(mem['embedding']) + 1e-9)
-
-            score = (self.weights['alpha'] * recency + self.weights['beta'] * importance + self.weights['gamma'] * relevance)
-            scored_memories.append((score, f"Tick {mem['tick']}: {mem['content']}"))
-
-        scored_memories.sort(key=lambda x: x[0], reverse=True)
-        return [mem[1] for mem in scored_memories[:top_k]]
\ No newline at end of file
+        if self._size == 0 or top_k <= 0: return []
+        scores = self.score(current_tick, self._get_embedding(query))
+
+        k = min(top_k, self._size)
+        if k < self._size:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(self._size)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [f"Tick {self._ticks[i]}: {self._contents[i]}" for i in top]
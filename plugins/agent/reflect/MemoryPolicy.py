@@ -0,0 +1,67 @@
+from typing import List, Optional
+
+import numpy as np
+
+
+class MemoryPolicy:
+    """
+    单个 Agent 记忆流的容量策略。
+    超出 capacity 时按保留分 (新近性 × 重要性) 从低到高处理：
+    - 默认直接淘汰；
+    - 开启 consolidate 时，把保留分最低的若干条折叠为一条摘要记忆
+      (嵌入取均值后归一化，重要性取最大值)，保留其信息而不占用多条容量。
+    capacity <= 0 表示不设上限 (与旧行为一致)。
+    """
+
+    def __init__(self, capacity: int = 0, consolidate: bool = False, consolidate_batch: int = 5,
+                 decay: float = 0.1, snippet_chars: int = 60):
+        self.capacity = int(capacity or 0)
+        self.consolidate = consolidate
+        self.consolidate_batch = max(2, int(consolidate_batch))
+        self.decay = decay
+        self.snippet_chars = snippet_chars
+
+    @property
+    def bounded(self) -> bool:
+        return self.capacity > 0
+
+    def retention(self, current_tick: int, ticks: np.ndarray, importance: np.ndarray) -> np.ndarray:
+        recency = np.exp(-self.decay * (current_tick - ticks))
+        return recency * (importance / 10.0)
+
+    def select(self, current_tick: int, ticks: np.ndarray, importance: np.ndarray) -> np.ndarray:
+        """返回需要淘汰 (或折叠) 的记忆下标；未超出容量时为空"""
+        excess = len(ticks) - self.capacity
+        if not self.bounded or excess <= 0:
+            return np.zeros(0, dtype=np.int64)
+        # 折叠时多选一条，用于容纳新生成的摘要
+        n = min(len(ticks), max(excess + 1, self.consolidate_batch)) if self.consolidate else excess
+        scores = self.retention(current_tick, ticks, importance)
+        # 保留分相同时优先处理更旧的记忆
+        return np.lexsort((ticks, scores))[:n]
+
+    def summarize(self, contents: List[str], ticks: np.ndarray, importance: np.ndarray,
+                  embeddings: np.ndarray):
+        """把多条记忆折叠为一条摘要，返回 (tick, content, importance, embedding)"""
+        order = np.argsort(ticks, kind="stable")
+        snippets = [contents[i][:self.snippet_chars] for i in order]
+        content = f"[回忆摘要 Tick {int(ticks.min())}-{int(ticks.max())}] " + " | ".join(snippets)
+        emb = embeddings.mean(axis=0)
+        emb = emb / (np.linalg.norm(emb) + 1e-9)
+        return int(ticks.max()), content, float(importance.max()), emb.astype(np.float32)
+
+
+# --- 全 Agent 共享的默认策略 ---
+_default_policy: Optional[MemoryPolicy] = None
+
+
+def get_default_policy() -> MemoryPolicy:
+    global _default_policy
+    if _default_policy is None:
+        _default_policy = MemoryPolicy()
+    return _default_policy
+
+
+def set_default_policy(policy: MemoryPolicy) -> None:
+    global _default_policy
+    _default_policy = policy
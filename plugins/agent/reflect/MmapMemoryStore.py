@@ -0,0 +1,320 @@
+import json
+import os
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from plugins.agent.reflect.EmbeddingProvider import EmbeddingProvider, get_default_provider
+from plugins.agent.reflect.MemoryPolicy import MemoryPolicy, get_default_policy
+
+
+class MmapMemoryStore:
+    """
+    内存映射 (out-of-core) 记忆存储，面向单机内存放不下的超大规模种群。
+
+    每个 Agent 在磁盘文件中拥有一段连续的 capacity 行槽位，嵌入矩阵、tick、importance
+    与文本偏移量均为 np.memmap；记忆文本追加写入 contents.bin。检索时只读取当前 Agent
+    的槽位切片，且只有入选 top-k 的记忆才会读取文本。
+    被淘汰 / 折叠的记忆文本在 contents.bin 中成为废弃字节，超过 compact_ratio 时整理文件，磁盘占用随容量有界。
+    必须设置有限容量 (MemoryPolicy.capacity > 0)；reopen=True 且目录已存在时重新打开并继续追加
+    (容量与嵌入维度必须与已有记忆库一致)，否则清空目录中的已有文件重新开始。
+    """
+
+    META_FILE = "meta.json"
+    DATA_FILES = ("embeddings", "ticks", "importance", "text_offset", "text_length", "counts")
+
+    def __init__(self, path: str, alpha=1.0, beta=1.0, gamma=1.5, embedder: EmbeddingProvider = None,
+                 policy: MemoryPolicy = None, embedding_dtype: str = "float16", initial_agents: int = 64,
+                 reopen: bool = True, compact_ratio: float = 0.5, compact_min_bytes: int = 1 << 20):
+        self.path = path
+        self.weights = {'alpha': alpha, 'beta': beta, 'gamma': gamma}
+        self.embedder = embedder or get_default_provider()
+        self.policy = policy or get_default_policy()
+        self.compact_ratio = compact_ratio
+        self.compact_min_bytes = compact_min_bytes
+        if not self.policy.bounded:
+            raise ValueError("MmapMemoryStore 需要有限的记忆容量 (memory.capacity > 0)")
+        os.makedirs(path, exist_ok=True)
+
+        meta_path = os.path.join(path, self.META_FILE)
+        if not reopen:
+            for name in (*self.DATA_FILES, "contents.bin", self.META_FILE):
+                file = os.path.join(path, name if "." in name else f"{name}.dat")
+                if os.path.exists(file):
+                    os.remove(file)
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["dim"] != self.embedder.dim:
+                raise ValueError(f"已有记忆库维度 {meta['dim']} 与嵌入后端 {self.embedder.dim} 不符: {path}")
+            # 槽位按容量划分，容量不同会越界写入其他 Agent 的槽位
+            if meta["capacity"] != self.policy.capacity:
+                raise ValueError(f"已有记忆库容量 {meta['capacity']} 与 memory.capacity {self.policy.capacity} 不符: {path}")
+            self.dim = meta["dim"]
+            self.capacity = meta["capacity"]
+            self.embedding_dtype = meta["embedding_dtype"]
+            self.agent_ids: List[str] = meta["agent_ids"]
+            self._allocated = meta["allocated_agents"]
+            print(f"💽 [MmapMemory] 重新打开记忆库: {path} ({len(self.agent_ids)} 个 Agent)")
+        else:
+            self.dim = self.embedder.dim
+            self.capacity = self.policy.capacity
+            self.embedding_dtype = embedding_dtype
+            self.agent_ids = []
+            self._allocated = max(1, initial_agents)
+        self.agent_index: Dict[str, int] = {a: i for i, a in enumerate(self.agent_ids)}
+
+        self._contents = open(os.path.join(path, "contents.bin"), "a+b")
+        self._map()
+        self._waste = self._contents_size() - int(self._text_length[self._live_slots()].sum(dtype=np.int64))
+        self._write_meta()
+
+    # --- 文件映射 ---
+    def _layout(self):
+        slots = self._allocated * self.capacity
+        return {
+            "embeddings": (self.embedding_dtype, (slots, self.dim)),
+            "ticks": ("int32", (slots,)),
+            "importance": ("float32", (slots,)),
+            "text_offset": ("int64", (slots,)),
+            "text_length": ("int32", (slots,)),
+            "counts": ("int32", (self._allocated,)),
+        }
+
+    def _map(self):
+        for name, (dtype, shape) in self._layout().items():
+            file = os.path.join(self.path, f"{name}.dat")
+            nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            # 扩展文件长度 (新增部分由文件系统补零)，再以读写模式映射
+            with open(file, "ab") as f:
+                if f.tell() < nbytes:
+                    f.truncate(nbytes)
+            setattr(self, f"_{name}", np.memmap(file, dtype=dtype, mode="r+", shape=shape))
+
+    def _grow_agents(self, needed: int):
+        self.flush()
+        while self._allocated < needed:
+            self._allocated *= 2
+        self._map()
+        self._write_meta()
+
+    def register(self, agent_id: str) -> int:
+        if agent_id not in self.agent_index:
+            owner = len(self.agent_ids)
+            if owner >= self._allocated:
+                self._grow_agents(owner + 1)
+            self.agent_ids.append(agent_id)
+            self.agent_index[agent_id] = owner
+            self._meta_dirty = True
+        return self.agent_index[agent_id]
+
+    def view(self, agent_id: str) -> "MmapMemoryView":
+        return MmapMemoryView(self, self.register(agent_id))
+
+    def flush(self):
+        for name in self.DATA_FILES:
+            getattr(self, f"_{name}").flush()
+        self._contents.flush()
+
+    def _write_meta(self):
+        """元数据只在分配 Agent 槽位与关闭时写出"""
+        meta = {
+            "dim": self.dim, "capacity": self.capacity, "embedding_dtype": self.embedding_dtype,
+            "allocated_agents": self._allocated, "agent_ids": self.agent_ids,
+        }
+        tmp = os.path.join(self.path, self.META_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(self.path, self.META_FILE))
+        self._meta_dirty = False
+
+    def close(self):
+        self.flush()
+        self._write_meta()
+        self._contents.close()
+
+    # --- 文本 ---
+    def _write_text(self, content: str) -> Tuple[int, int]:
+        data = content.encode("utf-8")
+        self._contents.seek(0, os.SEEK_END)
+        offset = self._contents.tell()
+        self._contents.write(data)
+        return offset, len(data)
+
+    def _read_text(self, slot: int) -> str:
+        self._contents.flush()
+        self._contents.seek(int(self._text_offset[slot]))
+        return self._contents.read(int(self._text_length[slot])).decode("utf-8")
+
+    def _contents_size(self) -> int:
+        self._contents.seek(0, os.SEEK_END)
+        return self._contents.tell()
+
+    def _live_slots(self) -> np.ndarray:
+        """所有有效槽位的下标 (按槽位顺序)"""
+        counts = np.minimum(np.asarray(self._counts[:len(self.agent_ids)], dtype=np.int64), self.capacity)
+        starts = np.arange(len(counts), dtype=np.int64) * self.capacity
+        return np.repeat(starts, counts) + (np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts))
+
+    def compact(self) -> int:
+        """把有效槽位的文本按槽位顺序重写到新的 contents.bin，返回回收的字节数"""
+        slots = self._live_slots()
+        before = self._contents_size()
+        offsets = np.zeros(len(slots), dtype=np.int64)
+        tmp_path = os.path.join(self.path, "contents.bin.tmp")
+        self._contents.flush()
+        with open(tmp_path, "wb") as out:
+            for j, slot in enumerate(slots):
+                self._contents.seek(int(self._text_offset[slot]))
+                offsets[j] = out.tell()
+                out.write(self._contents.read(int(self._text_length[slot])))
+            out.flush()
+            os.fsync(out.fileno())
+        self._contents.close()
+        os.replace(tmp_path, os.path.join(self.path, "contents.bin"))
+        self._text_offset[slots] = offsets
+        self._text_offset.flush()
+        self._contents = open(os.path.join(self.path, "contents.bin"), "a+b")
+        self._waste = 0
+        return before - self._contents_size()
+
+    # --- 单个 Agent 的槽位切片 ---
+    def _region(self, owner: int) -> slice:
+        start = owner * self.capacity
+        return slice(start, start + self.count(owner))
+
+    def count(self, owner: int) -> int:
+        return min(int(self._counts[owner]), self.capacity)
+
+    def _write_slot(self, slot, tick, importance, embedding, offset, length):
+        self._embeddings[slot] = embedding
+        self._ticks[slot] = tick
+        self._importance[slot] = importance
+        self._text_offset[slot] = offset
+        self._text_length[slot] = length
+
+    def add(self, owner: int, tick: int, content: str, importance: float):
+        embedding = self.embedder.embed(content)
+        offset, length = self._write_text(content)
+        n = self.count(owner)
+        if n < self.capacity:
+            self._write_slot(owner * self.capacity + n, tick, importance, embedding, offset, length)
+            self._counts[owner] = n + 1
+            return
+        self._evict_and_add(owner, tick, importance, embedding, offset, length)
+
+    def _evict_and_add(self, owner, tick, importance, embedding, offset, length):
+        region = self._region(owner)
+        # 把新记忆与已有切片一起交给策略挑选淘汰对象
+        ticks = np.append(np.asarray(self._ticks[region], dtype=np.int64), tick)
+        imps = np.append(np.asarray(self._importance[region]), importance)
+        embs = np.vstack([np.asarray(self._embeddings[region], dtype=np.float32), embedding[None, :]])
+        offsets = np.append(np.asarray(self._text_offset[region]), offset)
+        lengths = np.append(np.asarray(self._text_length[region]), length)
+
+        victims = self.policy.select(tick, ticks, imps)
+        keep = np.ones(len(ticks), dtype=bool)
+        keep[victims] = False
+        rows = [(int(ticks[i]), float(imps[i]), embs[i], int(offsets[i]), int(lengths[i]))
+                for i in np.flatnonzero(keep)]
+
+        # 被淘汰 / 折叠的文本不再被引用，等待整理
+        self._waste += int(lengths[victims].sum())
+        if self.policy.consolidate and len(victims) > 0:
+            texts = []
+            for i in victims:
+                self._contents.seek(int(offsets[i]))
+                texts.append(self._contents.read(int(lengths[i])).decode("utf-8"))
+            s_tick, s_content, s_imp, s_emb = self.policy.summarize(texts, ticks[victims], imps[victims], embs[victims])
+            s_offset, s_length = self._write_text(s_content)
+            rows.append((s_tick, s_imp, s_emb, s_offset, s_length))
+        if len(rows) > self.capacity:
+            raise ValueError(f"淘汰后仍有 {len(rows)} 条记忆，超出每个 Agent 的容量 {self.capacity}")
+
+        base = owner * self.capacity
+        for j, row in enumerate(rows):
+            self._write_slot(base + j, *row)
+        self._counts[owner] = len(rows)
+
+    def replace(self, owner: int, records: list):
+        """用 memory_stream 格式的记录整体替换某个 Agent 的槽位 (断点恢复用)"""
+        if len(records) > self.capacity:
+            raise ValueError(f"记录数 {len(records)} 超出每个 Agent 的容量 {self.capacity}")
+        region = self._region(owner)
+        self._waste += int(np.asarray(self._text_length[region]).sum(dtype=np.int64))
+        base = owner * self.capacity
+        for j, r in enumerate(records):
+            offset, length = self._write_text(r["content"])
+            self._write_slot(base + j, r["tick"], r["importance"], r["embedding"], offset, length)
+        self._counts[owner] = len(records)
+
+    # --- 检索 ---
+    def _top_k(self, owner: int, current_tick: int, query_emb: np.ndarray, top_k: int) -> list:
+        region = self._region(owner)
+        n = region.stop - region.start
+        if n == 0 or top_k <= 0:
+            return []
+        ticks = np.asarray(self._ticks[region])
+        recency = np.exp(-0.1 * (current_tick - ticks))
+        importance = np.asarray(self._importance[region]) / 10.0
+        relevance = np.asarray(self._embeddings[region], dtype=np.float32) @ query_emb
+        scores = (self.weights['alpha'] * recency + self.weights['beta'] * importance
+                  + self.weights['gamma'] * relevance)
+
+        k = min(top_k, n)
+        top = np.argpartition(-scores, k - 1)[:k] if k < n else np.arange(n)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [f"Tick {ticks[i]}: {self._read_text(region.start + int(i))}" for i in top]
+
+    def retrieve(self, owner: int, current_tick: int, query: str, top_k: int = 3) -> list:
+        return self._top_k(owner, current_tick, self.embedder.embed(query), top_k)
+
+    def batch_retrieve(self, requests: Sequence[Tuple[str, str]], current_tick: int,
+                       top_k: int = 3) -> Dict[str, list]:
+        """与 MemoryArena 接口一致；查询批量嵌入，逐 Agent 只读取各自的槽位切片"""
+        if not requests:
+            return {}
+        queries = self.embedder.embed_many([q for _, q in requests])
+        return {agent_id: self._top_k(self.register(agent_id), current_tick, queries[i], top_k)
+                for i, (agent_id, _) in enumerate(requests)}
+
+    def enforce_capacity(self, current_tick: int) -> int:
+        # 容量在写入时即已保证；每 tick 调用一次时顺便落盘，并在废弃文本过多时整理 contents.bin
+        self.flush()
+        if self._meta_dirty:
+            self._write_meta()
+        size = self._contents_size()
+        if size >= self.compact_min_bytes and self._waste > self.compact_ratio * size:
+            reclaimed = self.compact()
+            print(f"💽 [MmapMemory] 整理记忆文本: 回收 {reclaimed / 1024 / 1024:.1f} MB")
+        return 0
+
+
+class MmapMemoryView:
+    """内存映射记忆库中单个 Agent 的视图，接口与 MemoryManager 一致"""
+
+    def __init__(self, store: MmapMemoryStore, owner: int):
+        self.store = store
+        self.owner = owner
+
+    def __len__(self):
+        return self.store.count(self.owner)
+
+    @property
+    def memory_stream(self) -> list:
+        s = self.store
+        region = s._region(self.owner)
+        return [
+            {"tick": int(s._ticks[slot]), "content": s._read_text(slot),
+             "importance": float(s._importance[slot]), "embedding": np.asarray(s._embeddings[slot])}
+            for slot in range(region.start, region.stop)
+        ]
+
+    def add_memory(self, tick: int, content: str, importance: float):
+        self.store.add(self.owner, tick, content, importance)
+
+    def replace_memories(self, records: list):
+        self.store.replace(self.owner, records)
+
+    def retrieve(self, current_tick: int, query: str, top_k: int = 3) -> list:
+        return self.store.retrieve(self.owner, current_tick, query, top_k)
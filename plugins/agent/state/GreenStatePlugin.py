@@ -35,6 +35,24 @@ class GreenStatePlugin(StatePlugin):
             self.memory_manager = MemoryManager()
         self.memory_manager.add_memory(tick, content, importance)
 
+    def attach_population_store(self, store, agent_id: str):
+        """把状态字典替换为种群列式存储中本 Agent 一行的视图 (保留已有状态)"""
+        existing = dict(getattr(self, "_state_data", None) or {})
+        self._state_data = store.row(agent_id, initial=existing)
+
+    def attach_memory_arena(self, arena, agent_id: str):
+        """改用全体共享的记忆池存储本 Agent 的记忆 (需在写入任何记忆之前调用)"""
+        self.memory_manager = arena.view(agent_id)
+
+    def checkpoint_state(self) -> Dict[str, Any]:
+        """断点快照：状态字典 (含列式存储中的数值键) 与记忆流"""
+        return {"state": dict(self._state_data), "memories": self.memory_manager.memory_stream}
+
+    def restore_checkpoint(self, snapshot: Dict[str, Any]):
+        self._state_data.clear()
+        self._state_data.update(snapshot["state"])
+        self.memory_manager.replace_memories(snapshot["memories"])
+
     def retrieve_memory(self, current_tick: int, query: str, top_k: int = 3) -> list:
         # 三次防错：懒加载机制
         if not hasattr(self, 'memory_manager'):
@@ -0,0 +1,185 @@
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+
+# 列式存储的数值状态键，缺省值以 NaN 表示 "未设置"
+NUMERIC_COLUMNS = {
+    "trust_score": float,
+    "budget": float,
+    "current_tick": int,
+    "product_price": float,
+}
+
+# 最近一次决策动作编码 (由 plan_result 写入时同步)
+ACTIONS = ["none", "ignore", "buy", "post_review"]
+ACTION_CODES = {a: i for i, a in enumerate(ACTIONS)}
+
+
+def plan_action(plan: Any) -> Any:
+    """plan_result 中模型原样返回的动作 (日志照原样记录，未知动作在编码列中记为 none)"""
+    plan = plan[0] if isinstance(plan, list) and plan else plan
+    return plan.get("action", "none") if isinstance(plan, dict) and plan else "none"
+
+
+class PopulationStore:
+    """
+    种群级列式状态存储：信任、预算等数值状态以 NumPy 列保存，每个 Agent 占一行；
+    最近一次动作以 int8 编码，历史购买者以位图 (bitset) 记录。
+    每 tick 的宏观指标直接由向量化归约得到，无需逐 Agent 遍历插件。
+    """
+
+    def __init__(self, initial_capacity: int = 64):
+        self.agent_ids: List[str] = []
+        self.agent_index: Dict[str, int] = {}
+        self._capacity = max(1, initial_capacity)
+        self.columns = {name: np.full(self._capacity, np.nan) for name in NUMERIC_COLUMNS}
+        self.last_action = np.zeros(self._capacity, dtype=np.int8)
+        self._buyers = np.zeros((self._capacity + 7) // 8, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.agent_ids)
+
+    def _grow(self):
+        old = self._capacity
+        self._capacity *= 2
+        for name, col in self.columns.items():
+            grown = np.full(self._capacity, np.nan)
+            grown[:old] = col
+            self.columns[name] = grown
+        last_action = np.zeros(self._capacity, dtype=np.int8)
+        last_action[:old] = self.last_action
+        self.last_action = last_action
+        buyers = np.zeros((self._capacity + 7) // 8, dtype=np.uint8)
+        buyers[:len(self._buyers)] = self._buyers
+        self._buyers = buyers
+
+    def register(self, agent_id: str) -> int:
+        if agent_id not in self.agent_index:
+            if len(self.agent_ids) == self._capacity:
+                self._grow()
+            self.agent_index[agent_id] = len(self.agent_ids)
+            self.agent_ids.append(agent_id)
+        return self.agent_index[agent_id]
+
+    def row(self, agent_id: str, initial: Dict[str, Any] = None) -> "StateRow":
+        row = StateRow(self, self.register(agent_id))
+        if initial:
+            row.update(initial)
+        return row
+
+    # --- 列访问 ---
+    def column(self, name: str) -> np.ndarray:
+        return self.columns[name][:len(self)]
+
+    def actions(self) -> np.ndarray:
+        return self.last_action[:len(self)]
+
+    # --- 购买者位图 ---
+    def mark_buyers(self, mask: np.ndarray):
+        """把 mask 为 True 的 Agent 记入历史购买者位图"""
+        packed = np.packbits(mask.astype(bool), bitorder="little")
+        self._buyers[:len(packed)] |= packed
+
+    def is_buyer(self, index: int) -> bool:
+        return bool(self._buyers[index >> 3] & (1 << (index & 7)))
+
+    def buyer_count(self) -> int:
+        return int(np.unpackbits(self._buyers, bitorder="little")[:len(self)].sum())
+
+    # --- 断点快照 (数值列随各 Agent 的状态字典一起恢复，这里只保存购买者位图) ---
+    def checkpoint_state(self) -> Dict[str, Any]:
+        return {"agent_ids": list(self.agent_ids), "buyers": self._buyers.copy()}
+
+    def restore_checkpoint(self, snapshot: Dict[str, Any]):
+        for agent_id in snapshot["agent_ids"]:
+            self.register(agent_id)
+        buyers = snapshot["buyers"]
+        self._buyers[:] = 0
+        self._buyers[:len(buyers)] = buyers
+
+    # --- 每 tick 宏观结算 ---
+    def tick_partials(self) -> Dict[str, float]:
+        """
+        本 tick 的可合并部分和 (信任总和、人数、购买 / 发帖数、累计购买者数)，
+        并把本 tick 购买者并入位图。分片运行时各分片的部分和由协调进程合并。
+        """
+        trust = np.round(np.nan_to_num(self.column("trust_score"), nan=5.0), 2)
+        actions = self.actions()
+        buys = actions == ACTION_CODES["buy"]
+        self.mark_buyers(buys)
+        return {
+            "trust_sum": float(trust.sum()),
+            "agents": len(self),
+            "new_buys": int(buys.sum()),
+            "cumulative_buys": self.buyer_count(),
+            "posts": int((actions == ACTION_CODES["post_review"]).sum()),
+        }
+
+    def tick_aggregates(self) -> Dict[str, float]:
+        """按当前状态计算本 tick 的宏观指标，并把本 tick 购买者并入位图"""
+        return merge_partials([self.tick_partials()])
+
+
+def merge_partials(partials: List[Dict[str, float]]) -> Dict[str, float]:
+    """合并一个或多个 tick_partials，得到与单进程一致的宏观指标"""
+    n = sum(p["agents"] for p in partials)
+    cumulative = sum(p["cumulative_buys"] for p in partials)
+    return {
+        "avg_trust": sum(p["trust_sum"] for p in partials) / n if n else 0.0,
+        "new_buys": sum(p["new_buys"] for p in partials),
+        "cumulative_buys": cumulative,
+        "conversion_rate": cumulative / n if n else 0.0,
+        "posts": sum(p["posts"] for p in partials),
+    }
+
+
+class StateRow(MutableMapping):
+    """
+    PopulationStore 中一行的字典视图，可直接替换 GreenStatePlugin._state_data。
+    数值键读写对应的列，其他键 (消息、计划、想法等) 保存在本行的普通字典中；
+    写入 plan_result 时同步更新该行的动作编码。
+    """
+    __slots__ = ("store", "index", "_extra")
+
+    def __init__(self, store: PopulationStore, index: int):
+        self.store = store
+        self.index = index
+        self._extra: Dict[str, Any] = {}
+
+    def __getitem__(self, key):
+        caster = NUMERIC_COLUMNS.get(key)
+        if caster is None:
+            return self._extra[key]
+        value = self.store.columns[key][self.index]
+        if np.isnan(value):
+            raise KeyError(key)
+        return caster(value)
+
+    def __setitem__(self, key, value):
+        if key in NUMERIC_COLUMNS:
+            self.store.columns[key][self.index] = np.nan if value is None else float(value)
+            return
+        if key == "plan_result":
+            action = plan_action(value)
+            self.store.last_action[self.index] = ACTION_CODES.get(action, ACTION_CODES["none"]) \
+                if isinstance(action, str) else ACTION_CODES["none"]
+        self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in NUMERIC_COLUMNS:
+            self[key]  # 未设置时抛出 KeyError
+            self.store.columns[key][self.index] = np.nan
+            return
+        if key == "plan_result":
+            self.store.last_action[self.index] = ACTION_CODES["none"]
+        del self._extra[key]
+
+    def __iter__(self) -> Iterator[str]:
+        for key in NUMERIC_COLUMNS:
+            if not np.isnan(self.store.columns[key][self.index]):
+                yield key
+        yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
@@ -0,0 +1,38 @@
+from typing import Any, Dict, List
+
+from plugins.environment.network.Mailbox import Message
+
+
+class BulletinBoard:
+    """
+    全局公告板：广播事件 (如全局新闻) 只追加一次到共享日志，每个 Agent 维护一个读游标。
+    发布为 O(1)，与种群规模无关；Agent 感知时读取游标之后的未读事件并前移游标。
+    事件应在 tick 屏障处 (感知层之前) 发布，保证同一 tick 内所有 Agent 看到相同内容。
+    """
+
+    def __init__(self):
+        self.events: List[Message] = []
+        self.cursors: Dict[str, int] = {}
+
+    def register(self, agent_id: str, from_start: bool = False) -> None:
+        # 新加入的 Agent 默认只看到加入之后的事件
+        if agent_id not in self.cursors:
+            self.cursors[agent_id] = 0 if from_start else len(self.events)
+
+    def publish(self, message: Message) -> int:
+        self.events.append(message)
+        return len(self.events) - 1
+
+    def unread(self, agent_id: str) -> List[Message]:
+        cursor = self.cursors.get(agent_id)
+        if cursor is None or cursor >= len(self.events):
+            return []
+        self.cursors[agent_id] = len(self.events)
+        return self.events[cursor:]
+
+    def checkpoint_state(self) -> Dict[str, Any]:
+        return {"events": list(self.events), "cursors": dict(self.cursors)}
+
+    def restore_checkpoint(self, snapshot: Dict[str, Any]) -> None:
+        self.events = list(snapshot["events"])
+        self.cursors = dict(snapshot["cursors"])
@@ -0,0 +1,166 @@
+import sys
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+class Message:
+    """
+    紧凑的消息记录 (__slots__)，内容字符串经过驻留 (intern)，相同内容只保留一份。
+    兼容旧的字典消息读取方式：msg.get("content") / msg["source"]。
+    """
+    __slots__ = ("source", "content", "type")
+
+    def __init__(self, source: str, content: str, type: str = "social_review"):
+        self.source = source
+        self.content = sys.intern(content) if isinstance(content, str) else content
+        self.type = type
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"source": self.source, "content": self.content, "type": self.type}
+
+    def __repr__(self):
+        return f"Message({self.to_dict()!r})"
+
+
+class MailboxSystem:
+    """
+    双缓冲、只追加的 Agent 收件箱。
+    本 tick 内的投递只写入写缓冲 (O(1) 追加，不复制已有消息)，感知只读取读缓冲；
+    swap() 在 tick 屏障处交换两者，因此同一 tick 内的并发投递与读取互不干扰。
+
+    设置 CSR 邻接 (set_topology) 后，broadcast() 只记录 (发送者下标, 消息)，
+    swap() 时对本 tick 全部广播做一次向量化扇出：按 CSR 展开接收者后按 (接收者, 发送者下标) 排序，
+    得到每个接收者的消息下标区间。同一接收者的消息按发送者下标排列 (同一发送者内按广播顺序)，
+    与并发阶段中 LLM 调用的完成顺序、以及分片运行时远程广播的到达顺序都无关。
+    """
+
+    def __init__(self):
+        self.agent_index: Dict[str, int] = {}
+        self._write: List[List[Message]] = []
+        self._read: List[List[Message]] = []
+
+        # CSR 邻接与本 tick 待扇出的广播
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._local = None
+        self._broadcast_senders: List[int] = []
+        self._broadcast_messages: List[Message] = []
+
+        # 扇出后的读缓冲 (CSR：每个接收者的消息下标区间)
+        self._fanout_messages: List[Message] = []
+        self._fanout_ids = np.zeros(0, dtype=np.int64)
+        self._fanout_offsets = np.zeros(1, dtype=np.int64)
+        self._taken = np.zeros(0, dtype=bool)
+
+    def register(self, agent_id: str) -> int:
+        if agent_id not in self.agent_index:
+            self.agent_index[agent_id] = len(self._write)
+            self._write.append([])
+            self._read.append([])
+        return self.agent_index[agent_id]
+
+    def set_topology(self, indptr: np.ndarray, indices: np.ndarray, local: np.ndarray = None) -> None:
+        """
+        设置按 agent 下标编号的 CSR 邻接 (indptr 长度为 Agent 数 + 1)。
+        分片运行时 local 为本分片 Agent 的布尔掩码，扇出只投递给本地接收者。
+        """
+        self._indptr = np.asarray(indptr, dtype=np.int64)
+        self._indices = np.asarray(indices, dtype=np.int32)
+        self._local = None if local is None else np.asarray(local, dtype=bool)
+
+    def post(self, index: int, message: Message) -> None:
+        self._write[index].append(message)
+
+    def post_to(self, agent_id: str, message: Message) -> None:
+        self.post(self.agent_index[agent_id], message)
+
+    def broadcast(self, sender_index: int, message: Message) -> None:
+        """向发送者的全部邻居广播：只记录一次，扇出推迟到 tick 屏障"""
+        self._broadcast_senders.append(sender_index)
+        self._broadcast_messages.append(message)
+
+    def degree(self, index: int) -> int:
+        return int(self._indptr[index + 1] - self._indptr[index])
+
+    def pending_broadcasts(self):
+        """本 tick 尚未扇出的广播 (发送者下标列表, 消息列表)"""
+        return self._broadcast_senders, self._broadcast_messages
+
+    def checkpoint_state(self) -> Dict[str, Any]:
+        """断点快照：写缓冲与尚未扇出的广播 (读缓冲会在下一次 swap 时被替换，无需保存)"""
+        return {"write": self._write, "senders": list(self._broadcast_senders),
+                "messages": list(self._broadcast_messages)}
+
+    def restore_checkpoint(self, snapshot: Dict[str, Any]) -> None:
+        self._write = [list(inbox) for inbox in snapshot["write"]]
+        self._broadcast_senders = list(snapshot["senders"])
+        self._broadcast_messages = list(snapshot["messages"])
+
+    def swap(self) -> None:
+        """tick 屏障：上一 tick 写入的消息变为可读，写缓冲换成新的空列表"""
+        n = len(self._write)
+        self._read = self._write
+        self._write = [[] for _ in range(n)]
+        self._fanout()
+
+    def _fanout(self) -> None:
+        n = len(self._read)
+        senders = np.asarray(self._broadcast_senders, dtype=np.int64)
+        self._fanout_messages = self._broadcast_messages
+        self._broadcast_senders, self._broadcast_messages = [], []
+        self._taken = np.zeros(n, dtype=bool)
+
+        if len(senders) == 0:
+            self._fanout_ids = np.zeros(0, dtype=np.int64)
+            self._fanout_offsets = np.zeros(n + 1, dtype=np.int64)
+            return
+        starts = self._indptr[senders]
+        degrees = self._indptr[senders + 1] - starts
+        total = int(degrees.sum())
+        message_ids = np.repeat(np.arange(len(senders)), degrees)
+        offset = np.arange(total) - np.repeat(np.cumsum(degrees) - degrees, degrees)
+        targets = self._indices[np.repeat(starts, degrees) + offset]
+        if self._local is not None:
+            keep = self._local[targets]
+            targets, message_ids = targets[keep], message_ids[keep]
+
+        order = np.lexsort((message_ids, senders[message_ids], targets))
+        self._fanout_ids = message_ids[order]
+        self._fanout_offsets = np.searchsorted(targets[order], np.arange(n + 1))
+
+    def _has_fanout(self, index: int) -> bool:
+        # 上次 swap 之后注册的 Agent 不在扇出结果中
+        return index < len(self._taken) and not self._taken[index]
+
+    def take(self, agent_id: str) -> List[Message]:
+        """取走某 Agent 的可读消息 (调用方获得列表所有权，无需复制)"""
+        index = self.agent_index.get(agent_id)
+        if index is None:
+            return []
+        messages = []
+        if self._has_fanout(index):
+            ids = self._fanout_ids[self._fanout_offsets[index]:self._fanout_offsets[index + 1]]
+            messages = [self._fanout_messages[i] for i in ids]
+            self._taken[index] = True
+        direct = self._read[index]
+        if direct:
+            self._read[index] = []
+            messages.extend(direct)
+        return messages
+
+    def pending(self, agent_id: str) -> int:
+        """某 Agent 当前可读的消息数"""
+        index = self.agent_index.get(agent_id)
+        if index is None:
+            return 0
+        fanned = int(self._fanout_offsets[index + 1] - self._fanout_offsets[index]) if self._has_fanout(index) else 0
+        return fanned + len(self._read[index])
@@ -1,102 +1,171 @@
-import networkx as nx
-from typing import Dict, Any, List
+import numpy as np
+from typing import Dict, Any, List, Optional
 from agentkernel_standalone.mas.environment.base.plugin_base import EnvironmentPlugin
+from plugins.environment.network.Mailbox import MailboxSystem, Message
+from plugins.environment.network.BulletinBoard import BulletinBoard
+from plugins.environment.network.TopologyGenerator import load_or_generate, to_csr, save_graph_json
 
 
 class SocialNetworkPlugin(EnvironmentPlugin):
     def __init__(self):
         super().__init__()
-        # 存储图结构
-        self.graph = nx.Graph()
+        # 图结构以边数组保存；NetworkX 图按需构建 (见 graph 属性)
+        self._edges = (np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32))
+        self._graph = None
         # “上帝通讯录”：Agent ID -> Agent 实例
         self.agent_registry = {}
+        # 双缓冲收件箱：本 tick 的投递在下一 tick 屏障后可读
+        self.mailboxes = MailboxSystem()
+        # 全局公告板：广播事件只存一份，各 Agent 按游标读取
+        self.bulletin = BulletinBoard()
+        # CSR 邻接 (按 Agent 下标编号)，投递路径只用它；graph 属性仅供分析与导出
+        self.agent_ids: List[str] = []
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        # 分片运行时每个节点所属分片 (单进程运行时为 None)
+        self.parts = None
+        self.shard_id = 0
 
     async def init(self):
         print("🌐 [Network] 社交网络插件初始化...")
         pass
 
-    def register_agents(self, agents: List[Any]):
+    def register_agents(self, agents: List[Any], topology: Optional[Dict[str, Any]] = None,
+                        groups: Optional[List[Any]] = None, cache_dir: Optional[str] = None):
         """
-        [初始化辅助] 将所有 Agent 注册到网络中，并生成随机连接
+        [初始化辅助] 将所有 Agent 注册到网络中，并按拓扑配置生成连接
+        topology 为 runtime_config.yaml 的 network 段 (生成器、seed 与参数)；
+        groups 为每个 Agent 的分组 (cluster_type)，供 sbm 生成器使用。
         """
-        self.agent_registry = {a.agent_id: a for a in agents}
-        agent_ids = list(self.agent_registry.keys())
-
-        # 构建图结构
-        n = len(agent_ids)
-        if n > 0:
-            # 节点很少时直接全连接，避免孤立
-            if n < 5:
-                self.graph = nx.complete_graph(n)
-                print(f"🌐 [Network] 节点过少 ({n})，采用全连接图。")
-            else:
-                # 【核心修改】切换为 BA 无标度网络 (Barabási-Albert)
-                # m=2: 每个新加入的节点会连接 2 个现有的节点
-                # 这种机制会产生“富者越富”的效应，形成少数拥有大量连接的 Hub 节点
-                try:
-                    self.graph = nx.barabasi_albert_graph(n, m=2)
-                    print(f"🌐 [Network] 已构建 BA 无标度网络 (n={n}, m=2)。")
-                except Exception as e:
-                    print(f"⚠️ [Network] BA 图构建失败 ({e})，回退到随机图。")
-                    self.graph = nx.erdos_renyi_graph(n, p=0.1)
-
-            # 将图节点的整数索引映射回 Agent ID
-            mapping = {i: agent_ids[i] for i in range(n)}
-            self.graph = nx.relabel_nodes(self.graph, mapping)
-
-        print(f"🌐 [Network] 网络构建完成: {n} 节点, {self.graph.number_of_edges()} 边")
+        topology = dict(topology or {})
+        self._register([a.agent_id for a in agents], agents)
+
+        # 构建图结构 (数组生成器，直接得到按 Agent 下标编号的边)
+        n = len(self.agent_ids)
+        generator = topology.get("generator", "ba")
+        # 默认 BA 无标度网络 (m=2)：“富者越富”，形成少数拥有大量连接的 Hub 节点
+        src, dst = load_or_generate(topology, n, groups, cache_dir)
+        if n < 5:
+            print(f"🌐 [Network] 节点过少 ({n})，采用全连接图。")
+        else:
+            print(f"🌐 [Network] 已构建 {generator} 网络 (n={n}, seed={topology.get('seed')})。")
+        self._freeze_topology(src, dst)
+
+        print(f"🌐 [Network] 网络构建完成: {n} 节点, {len(src)} 边")
 
         # [调试] 打印度数最高的节点 (KOL)，方便观察
-        degrees = dict(self.graph.degree())
-        if degrees:
-            top_k = sorted(degrees.items(), key=lambda x: x[1], reverse=True)[:3]
+        degrees = np.diff(self.indptr)
+        if len(degrees):
+            top = np.argsort(-degrees, kind="stable")[:3]
+            top_k = [(self.agent_ids[i], int(degrees[i])) for i in top]
             print(f"   🔥 影响力最大的节点 (Hubs): {top_k}")
 
+    def register_shard(self, agents: List[Any], agent_ids: List[str], src: np.ndarray, dst: np.ndarray,
+                       parts: np.ndarray, shard_id: int):
+        """
+        [分片运行] 本进程只持有 agents (本分片)，但收件箱与 CSR 覆盖全体 agent_ids，
+        下标与协调进程一致；扇出只投递给本地接收者，跨分片广播在 tick 屏障处批量交换。
+        """
+        self._register(agent_ids, agents)
+        self.parts = np.asarray(parts, dtype=np.int32)
+        self.shard_id = shard_id
+        self._freeze_topology(src, dst, local=self.parts == shard_id)
+        print(f"🌐 [Network] 分片 {shard_id}: 本地 {len(agents)} / 全体 {len(agent_ids)} 节点")
+
+    def _register(self, agent_ids: List[str], agents: List[Any]):
+        self.agent_registry = {a.agent_id: a for a in agents}
+        for agent_id in agent_ids:
+            self.mailboxes.register(agent_id)
+        for agent_id in self.agent_registry:
+            self.bulletin.register(agent_id)
+        self.agent_ids = sorted(self.mailboxes.agent_index, key=self.mailboxes.agent_index.get)
+
+    def _freeze_topology(self, src: np.ndarray, dst: np.ndarray, local: Optional[np.ndarray] = None):
+        """把边数组冻结为 CSR (indptr/indices)，下标与收件箱下标一致"""
+        self._edges = (src, dst)
+        self._graph = None
+        self.indptr, self.indices = to_csr(src, dst, len(self.agent_ids))
+        self.mailboxes.set_topology(self.indptr, self.indices, local=local)
+
+    def outgoing_remote(self) -> Dict[int, List[tuple]]:
+        """
+        [分片运行] 本 tick 本地发出、且有邻居在其他分片的广播，按目标分片分组。
+        每条记录为 (发送者下标, source, content, type)，可直接经进程间管道传输。
+        """
+        outbox: Dict[int, List[tuple]] = {}
+        senders, messages = self.mailboxes.pending_broadcasts()
+        for sender, message in zip(senders, messages):
+            nbr_parts = np.unique(self.parts[self.indices[self.indptr[sender]:self.indptr[sender + 1]]])
+            for shard in nbr_parts[nbr_parts != self.shard_id]:
+                outbox.setdefault(int(shard), []).append((sender, message.source, message.content, message.type))
+        return outbox
+
+    def receive_remote(self, records: List[tuple]):
+        """[分片运行] 把其他分片转来的广播并入本 tick 的扇出队列"""
+        for sender, source, content, msg_type in records:
+            self.mailboxes.broadcast(sender, Message(source, content, msg_type))
+
+    @property
+    def graph(self) -> "nx.Graph":
+        """NetworkX 图 (节点为 Agent ID)，仅供交互式分析，首次访问时才导入 NetworkX 并由边数组构建"""
+        if self._graph is None:
+            import networkx as nx
+            graph = nx.Graph()
+            graph.add_nodes_from(self.agent_ids)
+            src, dst = self._edges
+            ids = self.agent_ids
+            graph.add_edges_from((ids[u], ids[v]) for u, v in zip(src.tolist(), dst.tolist()))
+            self._graph = graph
+        return self._graph
+
+    def save_graph(self, path: str) -> None:
+        """导出 node-link JSON (供级联分析与可视化)，直接由边数组写出"""
+        src, dst = self._edges
+        save_graph_json(path, self.agent_ids, src, dst)
+
+    def checkpoint_state(self) -> Dict[str, Any]:
+        """断点快照：拓扑 (边数组)、收件箱待投递内容与公告板"""
+        return {
+            "agent_ids": list(self.agent_ids),
+            "edges": self._edges,
+            "mailboxes": self.mailboxes.checkpoint_state(),
+            "bulletin": self.bulletin.checkpoint_state(),
+        }
+
+    def restore_checkpoint(self, snapshot: Dict[str, Any]):
+        if snapshot["agent_ids"] != self.agent_ids:
+            raise ValueError("检查点中的 Agent 列表与当前运行不一致")
+        self._freeze_topology(*snapshot["edges"], local=None if self.parts is None else self.parts == self.shard_id)
+        self.mailboxes.restore_checkpoint(snapshot["mailboxes"])
+        self.bulletin.restore_checkpoint(snapshot["bulletin"])
+
     def get_neighbors(self, agent_id: str) -> List[str]:
         """获取邻居 ID 列表"""
-        if agent_id in self.graph:
-            return list(self.graph.neighbors(agent_id))
-        return []
+        i = self.mailboxes.agent_index.get(agent_id)
+        if i is None:
+            return []
+        return [self.agent_ids[j] for j in self.indices[self.indptr[i]:self.indptr[i + 1]]]
 
     async def broadcast_message(self, sender_id: str, content: str):
         """
         [核心功能] 将消息投递给所有邻居
         """
-        neighbors = self.get_neighbors(sender_id)
-        # print(f"📡 [Network] '{sender_id}' 正在广播消息给 {len(neighbors)} 个邻居...")
-
-        message_packet = {
-            "source": sender_id,
-            "content": content,
-            "type": "social_review"
-        }
-
-        deliver_count = 0
-        for neighbor_id in neighbors:
-            neighbor_agent = self.agent_registry.get(neighbor_id)
-            if neighbor_agent:
-                # 获取邻居的 State 插件
-                state_comp = neighbor_agent.get_component("state")
-                # 兼容性获取
-                state_plugin = getattr(state_comp, "_plugin", getattr(state_comp, "plugin", None))
-
-                if state_plugin:
-                    # 读取旧收件箱
-                    s_data = getattr(state_plugin, "state_data", getattr(state_plugin, "_state_data", {}))
-                    inbox = s_data.get("incoming_messages") or []
-
-                    # 写入新消息 (复制一份以防引用问题)
-                    new_inbox = list(inbox)
-                    new_inbox.append(message_packet)
-
-                    # 写入状态
-                    if hasattr(state_plugin, "set_state"):
-                        await state_plugin.set_state("incoming_messages", new_inbox)
-                        deliver_count += 1
-
+        sender = self.mailboxes.agent_index.get(sender_id)
+        if sender is None:
+            return
+        # 所有邻居共享同一条只读消息记录；这里只登记一次，
+        # 本 tick 全部广播在屏障处 (swap_mailboxes) 按 CSR 邻接一次性向量化扇出
+        message = Message(sender_id, content, "social_review")
+        self.mailboxes.broadcast(sender, message)
+
+        deliver_count = self.mailboxes.degree(sender)
         if deliver_count > 0:
             print(f"📡 [Network] {sender_id} -> {deliver_count} 邻居 (广播成功)")
 
+    def swap_mailboxes(self):
+        """tick 屏障处调用：对上一 tick 的广播做向量化扇出，并使投递的消息对感知可见"""
+        self.mailboxes.swap()
+
     async def execute(self, current_tick: int) -> None:
         pass
 
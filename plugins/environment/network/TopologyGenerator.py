@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 支持的生成器名称
+GENERATORS = ("ba", "ws", "sbm", "config")
+
+Edges = Tuple[np.ndarray, np.ndarray]
+
+
+def simplify(src: np.ndarray, dst: np.ndarray, n: int) -> Edges:
+    """去掉自环与重边，返回 (u, v) 且 u < v 的无向边数组"""
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    u, v = np.minimum(src, dst), np.maximum(src, dst)
+    keep = u != v
+    keys = np.unique(u[keep] * n + v[keep])
+    return (keys // n).astype(np.int32), (keys % n).astype(np.int32)
+
+
+def to_csr(src: np.ndarray, dst: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """无向边数组 -> 对称 CSR (indptr, indices)，每个节点的邻居按编号升序"""
+    rows = np.concatenate([src, dst]).astype(np.int64)
+    cols = np.concatenate([dst, src]).astype(np.int32)
+    order = np.lexsort((cols, rows))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, cols[order]
+
+
+# --- 生成器 (均为数组运算，边数线性复杂度) ---
+def complete_graph(n: int) -> Edges:
+    u, v = np.triu_indices(n, k=1)
+    return u.astype(np.int32), v.astype(np.int32)
+
+
+def barabasi_albert(n: int, m: int, rng: np.random.Generator) -> Edges:
+    """
+    BA 优先连接 (Batagelj–Brandes)：把所有边端点排成一个数组，新边的目标等于在
+    已有端点中均匀抽取的一个位置上的节点 (即按度数成比例)。
+    新节点只在它之前加入的节点的边端点中抽样，因此不会连向自身；该位置若是另一条边的目标端点，
+    则指向那条更早的边，用指针跳跃 (pointer jumping) 向量化地一次性求解全部目标。
+    同一新节点抽到重复目标的边重新抽样后整体再求解一遍，直到每个新节点恰好有 m 个不同的目标
+    (与 networkx.barabasi_albert_graph 一致，共 (n - m) * m 条边)。
+    """
+    if n <= m:
+        return complete_graph(n)
+    num_edges = (n - m) * m
+    e = np.arange(num_edges, dtype=np.int64)
+    src = m + e // m
+    span = 2 * (src - m) * m
+
+    # 目标要么是确定的节点 (fixed)，要么引用更早一条边的目标 (ref)
+    # 第一个新节点连接全部 m 个种子节点
+    fixed = np.where(span == 0, e % m, -1)
+    ref = e.copy()
+
+    def sample(edges):
+        r = (rng.random(len(edges)) * span[edges]).astype(np.int64)
+        even = r % 2 == 0
+        fixed[edges] = np.where(even, src[r // 2], -1)
+        ref[edges] = np.where(even, edges, (r - 1) // 2)
+
+    sample(np.flatnonzero(span > 0))
+    while True:
+        target, pointer = fixed.copy(), ref.copy()
+        unresolved = target < 0
+        while unresolved.any():
+            target = np.where(unresolved, target[pointer], target)
+            pointer = np.where(unresolved, pointer[pointer], pointer)
+            unresolved = target < 0
+        # 同一新节点的重复目标：保留第一条，其余重新抽样
+        _, first = np.unique(src * n + target, return_index=True)
+        duplicate = np.ones(num_edges, dtype=bool)
+        duplicate[first] = False
+        if not duplicate.any():
+            return simplify(src, target, n)
+        sample(np.flatnonzero(duplicate))
+
+
+def watts_strogatz(n: int, k: int, p: float, rng: np.random.Generator) -> Edges:
+    """WS 小世界：环形格点 (每侧 k//2 个近邻)，每条边以概率 p 把一端重连到随机节点"""
+    half = max(1, k // 2)
+    if n <= 2 * half:
+        return complete_graph(n)
+    nodes = np.arange(n, dtype=np.int64)
+    src = np.repeat(nodes, half)
+    dst = (src + np.tile(np.arange(1, half + 1), n)) % n
+    rewire = rng.random(len(src)) < p
+    dst = np.where(rewire, rng.integers(0, n, len(src)), dst)
+    return simplify(src, dst, n)
+
+
+def stochastic_block(groups: Sequence[Any], k_in: float, k_out: float, rng: np.random.Generator) -> Edges:
+    """
+    随机块模型：按分组 (如 cluster_type) 划分社区。
+    组内期望度数 k_in、跨组期望度数 k_out；每组的边数按二项分布抽取，
+    端点在成员中均匀抽样，不枚举节点对。
+    """
+    _, labels = np.unique(np.asarray(groups, dtype=object).astype(str), return_inverse=True)
+    n = len(labels)
+    order = np.argsort(labels, kind="stable")
+    bounds = np.searchsorted(labels[order], np.arange(labels.max() + 2)) if n else np.zeros(1, dtype=np.int64)
+
+    src, dst = [], []
+    for a in range(len(bounds) - 1):
+        members = order[bounds[a]:bounds[a + 1]]
+        size = len(members)
+        if size < 2:
+            continue
+        pairs = size * (size - 1) // 2
+        count = rng.binomial(pairs, min(1.0, k_in / (size - 1)))
+        src.append(members[rng.integers(0, size, count)])
+        dst.append(members[rng.integers(0, size, count)])
+
+    # 跨组边：均匀抽取端点对，拒绝同组的对，直到凑够目标条数
+    cross_pairs = (n * n - int((np.bincount(labels) ** 2).sum())) // 2 if n else 0
+    if cross_pairs > 0 and k_out > 0:
+        target = rng.binomial(cross_pairs, min(1.0, k_out * n / 2 / cross_pairs))
+        got = 0
+        while got < target:
+            u = rng.integers(0, n, 2 * (target - got) + 16)
+            v = rng.integers(0, n, len(u))
+            ok = labels[u] != labels[v]
+            u, v = u[ok][:target - got], v[ok][:target - got]
+            src.append(u)
+            dst.append(v)
+            got += len(u)
+
+    if not src:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+    return simplify(np.concatenate(src), np.concatenate(dst), n)
+
+
+def powerlaw_degrees(n: int, gamma: float, min_degree: int, rng: np.random.Generator) -> np.ndarray:
+    """按幂律 P(k) ~ k^-gamma (k >= min_degree) 抽取度数序列，总和调整为偶数"""
+    u = rng.random(n)
+    degrees = np.floor(min_degree * (1 - u) ** (-1.0 / (gamma - 1))).astype(np.int64)
+    degrees = np.minimum(degrees, max(1, n - 1))
+    if degrees.sum() % 2:
+        degrees[int(rng.integers(0, n))] += 1
+    return degrees
+
+
+def configuration_model(degrees: np.ndarray, rng: np.random.Generator) -> Edges:
+    """配置模型：按度数展开端点 (stub) 后随机打乱并两两配对，再去掉自环与重边"""
+    degrees = np.asarray(degrees, dtype=np.int64)
+    stubs = np.repeat(np.arange(len(degrees)), degrees)
+    rng.shuffle(stubs)
+    stubs = stubs[:len(stubs) // 2 * 2]
+    return simplify(stubs[0::2], stubs[1::2], len(degrees))
+
+
+# --- 配置入口与磁盘缓存 ---
+def topology_key(params: Dict[str, Any], n: int, groups: Optional[Sequence[Any]] = None) -> str:
+    """拓扑参数 (含节点数与分组) 的哈希，用作缓存文件名"""
+    payload = {"params": params, "n": n}
+    if groups is not None:
+        payload["groups"] = hashlib.sha1("\x1f".join(map(str, groups)).encode("utf-8")).hexdigest()
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def generate(params: Dict[str, Any], n: int, groups: Optional[Sequence[Any]] = None) -> Edges:
+    """
+    按配置生成拓扑 (节点编号 0..n-1)。params 即 runtime_config.yaml 的 network 段：
+    generator (ba / ws / sbm / config)、seed 及各生成器参数。
+    """
+    generator = params.get("generator", "ba")
+    rng = np.random.default_rng(params.get("seed"))
+    # 节点很少时直接全连接，避免孤立
+    if n < 5:
+        return complete_graph(n)
+    if generator == "ba":
+        return barabasi_albert(n, int(params.get("m", 2)), rng)
+    if generator == "ws":
+        return watts_strogatz(n, int(params.get("ws_k", 4)), float(params.get("ws_p", 0.1)), rng)
+    if generator == "sbm":
+        if groups is None:
+            raise ValueError("sbm 生成器需要每个节点的分组 (cluster_type)")
+        return stochastic_block(groups, float(params.get("sbm_k_in", 4)), float(params.get("sbm_k_out", 1)), rng)
+    if generator == "config":
+        degrees = powerlaw_degrees(n, float(params.get("config_gamma", 2.5)),
+                                   int(params.get("config_min_degree", 2)), rng)
+        return configuration_model(degrees, rng)
+    raise ValueError(f"未知的拓扑生成器: {generator} (可选 {GENERATORS})")
+
+
+def load_or_generate(params: Dict[str, Any], n: int, groups: Optional[Sequence[Any]] = None,
+                     cache_dir: Optional[str] = None) -> Edges:
+    """
+    带磁盘缓存的 generate：以参数哈希为键保存 .npz 边数组，重复运行与参数扫描直接读取。
+    未设置 seed 时每次拓扑都不同，不使用缓存。
+    """
+    if not cache_dir or params.get("seed") is None:
+        return generate(params, n, groups)
+
+    path = os.path.join(cache_dir, f"topology_{topology_key(params, n, groups)}.npz")
+    if os.path.exists(path):
+        with np.load(path) as data:
+            print(f"🌐 [Network] 读取拓扑缓存: {path}")
+            return data["src"], data["dst"]
+
+    src, dst = generate(params, n, groups)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, src=src, dst=dst)
+    os.replace(tmp, path)
+    return src, dst
+
+
+# --- 拓扑导出 (node-link JSON，与 networkx.node_link_data 格式一致，无需导入 NetworkX) ---
+def save_graph_json(path: str, ids: Sequence[str], src: np.ndarray, dst: np.ndarray) -> None:
+    data = {
+        "directed": False, "multigraph": False, "graph": {},
+        "nodes": [{"id": node_id} for node_id in ids],
+        "edges": [{"source": ids[u], "target": ids[v]} for u, v in zip(src.tolist(), dst.tolist())],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def load_graph_json(path: str) -> Tuple[list, np.ndarray, np.ndarray]:
+    """读取 node-link JSON (兼容旧版 NetworkX 的 "links" 键)，返回 (节点 ID 列表, src, dst)"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    ids = [node["id"] for node in data["nodes"]]
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    links = data.get("edges", data.get("links", []))
+    src = np.fromiter((index[link["source"]] for link in links), dtype=np.int64, count=len(links))
+    dst = np.fromiter((index[link["target"]] for link in links), dtype=np.int64, count=len(links))
+    return ids, src, dst
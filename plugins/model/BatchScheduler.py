@@ -0,0 +1,159 @@
+import asyncio
+import json
+from typing import Any, List, Optional, Tuple
+
+from plugins.model.PromptLayout import LayeredPrompt
+
+BATCH_SYSTEM = (
+    "You will receive several INDEPENDENT requests. Each request has its own persona and context; "
+    "answer every request on its own, as if the others did not exist.\n"
+    "Output ONLY a JSON array with exactly one element per request, in order. "
+    "Element i must be the JSON object that request i asks for."
+)
+
+
+class BatchScheduler:
+    """
+    LLM 批量请求调度器：位于插件与 ModelRouter 之间，对插件暴露与路由器相同的 chat(prompt) 接口。
+    同一阶段内并发发出的 prompt 会在一个短时间窗口内被收集，合并为一次批量请求，
+    解析后的结果再分发回各自等待的协程。插件逻辑无需任何改动。
+
+    - 若底层路由器提供 chat_batch(prompts)（服务商批量端点），直接使用；
+    - 否则将多个 prompt 打包成一个多题请求，要求模型返回等长 JSON 数组；
+      LayeredPrompt 按 system / user 两部分打包，批次仍以 system + user 两条消息发送；
+    - 批量端点报错、批量结果解析失败或数量不符时，自动回退为逐条请求，保证不丢结果。
+    """
+
+    def __init__(self, router: Any, max_batch_size: int = 8, max_wait_ms: float = 50.0):
+        self.router = router
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight = set()
+
+        # 统计信息
+        self.stats = {"prompts": 0, "requests": 0, "batches": 0, "fallbacks": 0}
+
+    async def chat(self, prompt: str) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((prompt, future))
+        self.stats["prompts"] += 1
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            task = asyncio.ensure_future(self._dispatch(batch))
+            # 持有任务引用，防止被垃圾回收
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        prompts = [p for p, _ in batch]
+        try:
+            if len(batch) == 1:
+                results = [await self._single(prompts[0])]
+            else:
+                results = await self._batched(prompts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _single(self, prompt: str) -> Any:
+        self.stats["requests"] += 1
+        return await self.router.chat(prompt)
+
+    async def _batched(self, prompts: List[str]) -> List[Any]:
+        self.stats["batches"] += 1
+
+        # 1. 服务商原生批量端点
+        chat_batch = getattr(self.router, "chat_batch", None)
+        if callable(chat_batch):
+            self.stats["requests"] += 1
+            try:
+                results = await chat_batch(prompts)
+                if isinstance(results, list) and len(results) == len(prompts):
+                    return results
+            except Exception as e:
+                print(f"⚠️ [Batch] 批量端点失败，回退逐条请求: {e}")
+
+        # 2. 多题合并为一个请求
+        else:
+            self.stats["requests"] += 1
+            try:
+                response = await self.router.chat(self._build_batch_prompt(prompts))
+                results = self._parse_batch_response(response, len(prompts))
+                if results is not None:
+                    return results
+            except Exception as e:
+                print(f"⚠️ [Batch] 批量请求失败，回退逐条请求: {e}")
+
+        # 3. 回退：逐条并发请求，单条失败不影响其他协程
+        self.stats["fallbacks"] += 1
+        return await asyncio.gather(*(self._single(p) for p in prompts), return_exceptions=True)
+
+    @staticmethod
+    def _build_batch_prompt(prompts: List[str]) -> LayeredPrompt:
+        """
+        多题 prompt。全部请求共享同一 system 时 (同一任务、人设一致)，该 system 置于批次 system 之后、
+        只在 user 中列出各题的 user 部分，保持可缓存的前缀；否则每题分别给出 Instructions / Input 两段。
+        """
+        n = len(prompts)
+        systems = {p.system for p in prompts if isinstance(p, LayeredPrompt)}
+        if len(systems) == 1 and all(isinstance(p, LayeredPrompt) for p in prompts):
+            system = f"{BATCH_SYSTEM}\n\nAll requests share these instructions:\n{systems.pop()}"
+            blocks = [f"### Request {i + 1}\n{p.user.strip()}" for i, p in enumerate(prompts)]
+        else:
+            system = BATCH_SYSTEM
+            blocks = []
+            for i, p in enumerate(prompts):
+                if isinstance(p, LayeredPrompt):
+                    body = f"#### Instructions\n{p.system.strip()}\n#### Input\n{p.user.strip()}"
+                else:
+                    body = p.strip()
+                blocks.append(f"### Request {i + 1}\n{body}")
+        return LayeredPrompt(system, f"There are {n} requests.\n\n" + "\n\n".join(blocks))
+
+    @staticmethod
+    def _parse_batch_response(response: Any, n: int) -> Optional[List[str]]:
+        if isinstance(response, str):
+            clean_json = response.replace("```json", "").replace("```", "").strip()
+            try:
+                items = json.loads(clean_json)
+            except json.JSONDecodeError:
+                return None
+        else:
+            items = response
+
+        if not isinstance(items, list) or len(items) != n:
+            return None
+        # 插件按字符串解析响应，这里统一还原为 JSON 字符串
+        return [item if isinstance(item, str) else json.dumps(item, ensure_ascii=False) for item in items]
+
+    def summary(self) -> str:
+        s = self.stats
+        saved = s["prompts"] - s["requests"]
+        return (f"prompt {s['prompts']} 条 -> 请求 {s['requests']} 次 "
+                f"(批次 {s['batches']}, 回退 {s['fallbacks']}, 节省 {saved} 次)")
@@ -0,0 +1,150 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict
+
+from plugins.model.TaskClassifier import classify_prompt, fallback_response
+
+_WHITESPACE = re.compile(r"\s+")
+
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+# 回放时遇到未录制 prompt 的处理策略
+ON_MISS_ERROR = "error"              # 抛出异常 (严格复现)
+ON_MISS_PASSTHROUGH = "passthrough"  # 转发给真实路由器
+ON_MISS_FALLBACK = "fallback"        # 返回按任务类型构造的兜底 JSON
+
+
+class CassetteMissError(KeyError):
+    pass
+
+
+def prompt_key(prompt: str) -> str:
+    text = _WHITESPACE.sub(" ", prompt).strip()
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CassetteRouter:
+    """
+    录制/回放 ("磁带") 路由器包装层，用于完全离线、可复现的重跑。
+
+    - record：转发到真实路由器，并把每次 chat 的 prompt、响应与耗时追加写入 gzip 压缩的 JSONL 磁带；
+    - replay：从磁带加载全部响应，按 prompt 命中后直接内存返回。
+      同一 prompt 被录制多次时按录制顺序依次返回，用尽后重复最后一条。
+    """
+
+    def __init__(self, router: Any, path: str, mode: str = MODE_REPLAY, on_miss: str = ON_MISS_ERROR,
+                 append: bool = False):
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"未知的磁带模式: {mode}")
+        self.router = router
+        self.path = path
+        self.mode = mode
+        self.on_miss = on_miss
+
+        self._tape: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._consumed: Dict[str, int] = defaultdict(int)
+        self._file = None
+        self.stats = {"recorded": 0, "hits": 0, "misses": 0}
+
+        if mode == MODE_RECORD:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            # append：断点恢复时在已有磁带后继续录制 (gzip 支持多段拼接)
+            self._file = gzip.open(path, "at" if append else "wt", encoding="utf-8")
+        else:
+            self._load()
+
+    def _load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self._tape[entry["key"]].append(entry)
+        print(f"📼 [Cassette] 已加载 {sum(len(q) for q in self._tape.values())} 条录制响应: {self.path}")
+
+    async def chat(self, prompt: str) -> Any:
+        if self.mode == MODE_RECORD:
+            return await self._record(prompt)
+        return await self._replay(prompt)
+
+    async def _record(self, prompt: str) -> Any:
+        start = time.perf_counter()
+        response = await self.router.chat(prompt)
+        latency = time.perf_counter() - start
+
+        entry = {
+            "key": prompt_key(prompt),
+            "task": classify_prompt(prompt),
+            "prompt": prompt,
+            "response": response,
+            "latency": round(latency, 4),
+        }
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.stats["recorded"] += 1
+        return response
+
+    async def _replay(self, prompt: str) -> Any:
+        key = prompt_key(prompt)
+        queue = self._tape.get(key)
+        if queue:
+            entry = queue.popleft()
+            self._last[key] = entry
+            self._consumed[key] += 1
+            self.stats["hits"] += 1
+            return entry["response"]
+        if key in self._last:
+            self.stats["hits"] += 1
+            return self._last[key]["response"]
+
+        self.stats["misses"] += 1
+        if self.on_miss == ON_MISS_PASSTHROUGH and self.router is not None:
+            return await self.router.chat(prompt)
+        if self.on_miss == ON_MISS_FALLBACK:
+            return json.dumps(fallback_response(classify_prompt(prompt)), ensure_ascii=False)
+        raise CassetteMissError(f"磁带中没有该 prompt 的录制 (key={key[:12]})")
+
+    def checkpoint_state(self) -> Dict[str, Any]:
+        """断点快照：录制模式记录已写条数，回放模式记录每个 prompt 已消费的条数"""
+        if self.mode == MODE_RECORD:
+            self._file.flush()
+            return {"mode": self.mode, "recorded": self.stats["recorded"]}
+        return {"mode": self.mode, "consumed": dict(self._consumed)}
+
+    def restore_checkpoint(self, snapshot: Dict[str, Any]) -> None:
+        if snapshot["mode"] != self.mode:
+            raise ValueError(f"检查点磁带模式 {snapshot['mode']} 与当前模式 {self.mode} 不一致")
+        if self.mode == MODE_RECORD:
+            self._truncate(snapshot["recorded"])
+            return
+        for key, count in snapshot["consumed"].items():
+            queue = self._tape.get(key)
+            for _ in range(min(count, len(queue) if queue else 0)):
+                self._last[key] = queue.popleft()
+            self._consumed[key] = count
+
+    def _truncate(self, keep: int) -> None:
+        """只保留磁带前 keep 条 (丢弃检查点之后录制的条目)，之后继续追加"""
+        self._file.close()
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            lines = [line for _, line in zip(range(keep), f)]
+        self._file = gzip.open(self.path, "wt", encoding="utf-8")
+        self._file.writelines(lines)
+        self.stats["recorded"] = len(lines)
+
+    def summary(self) -> str:
+        s = self.stats
+        if self.mode == MODE_RECORD:
+            return f"录制 {s['recorded']} 条 -> {self.path}"
+        return f"回放命中 {s['hits']} 次, 未命中 {s['misses']} 次 (策略: {self.on_miss})"
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import random
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+from plugins.model.PromptLayout import prompt_messages
+
+
+class ChatCompletionsClient:
+    """
+    极简的 OpenAI 兼容 chat-completions 异步客户端 (标准库实现，带连接复用与 429/5xx 重试)，对外为 chat(prompt) 接口。
+    LayeredPrompt 以 system + user 两条消息发送，使服务商能缓存稳定的 system 前缀；
+    响应 usage 中的 prompt_tokens_details.cached_tokens (OpenAI / DashScope 兼容模式及替身服务均会返回)
+    累计为前缀缓存命中率。
+    """
+
+    def __init__(self, base_url: str, model: str = "standin", api_key: Optional[str] = None,
+                 max_retries: int = 5, timeout: float = 120.0):
+        parsed = urlparse(base_url)
+        self.ssl = parsed.scheme == "https"
+        self.host = parsed.hostname
+        self.port = parsed.port or (443 if self.ssl else 80)
+        self.path = parsed.path.rstrip("/") + "/chat/completions"
+        self.model = model
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._idle = []
+        self.stats = {"calls": 0, "retries": 0, "throttled": 0, "errors": 0,
+                      "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+
+    async def _request(self, payload: bytes):
+        if self._idle:
+            reader, writer = self._idle.pop()
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl or None)
+        try:
+            auth = f"Authorization: Bearer {self.api_key}\r\n" if self.api_key else ""
+            head = (f"POST {self.path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n{auth}"
+                    f"Content-Length: {len(payload)}\r\nConnection: keep-alive\r\n\r\n")
+            writer.write(head.encode("latin-1") + payload)
+            await writer.drain()
+
+            status = int((await reader.readline()).split(b" ", 2)[1])
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+        except BaseException:
+            # 读写中断的连接不再复用
+            writer.close()
+            raise
+        if headers.get("connection", "").lower() == "close":
+            writer.close()
+        else:
+            self._idle.append((reader, writer))
+        return status, headers, json.loads(body or b"{}")
+
+    def _count_usage(self, usage: Dict[str, Any]) -> None:
+        self.stats["prompt_tokens"] += int(usage.get("prompt_tokens", 0) or 0)
+        self.stats["completion_tokens"] += int(usage.get("completion_tokens", 0) or 0)
+        details = usage.get("prompt_tokens_details") or {}
+        self.stats["cached_tokens"] += int(details.get("cached_tokens", 0) or 0)
+
+    async def chat(self, prompt: str) -> str:
+        payload = json.dumps({"model": self.model, "messages": prompt_messages(prompt)},
+                             ensure_ascii=False).encode("utf-8")
+        self.stats["calls"] += 1
+        status = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                status, headers, body = await asyncio.wait_for(self._request(payload), self.timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                status, headers, body = None, {}, {}
+            if status == 200:
+                self._count_usage(body.get("usage") or {})
+                return body["choices"][0]["message"]["content"]
+            if status == 429:
+                self.stats["throttled"] += 1
+                delay = float(headers.get("retry-after", 1.0))
+            else:
+                self.stats["errors"] += 1
+                delay = 0.2 * (2 ** attempt)
+            if attempt < self.max_retries:
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+        raise RuntimeError(f"请求在 {self.max_retries} 次重试后仍失败 (status={status})")
+
+    def cache_hit_rate(self) -> float:
+        """prompt token 中命中服务商前缀缓存的比例"""
+        return self.stats["cached_tokens"] / self.stats["prompt_tokens"] if self.stats["prompt_tokens"] else 0.0
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"调用 {s['calls']} 次 (重试 {s['retries']}, 429 {s['throttled']}, 错误 {s['errors']}), "
+                f"prompt {s['prompt_tokens']} tokens, 前缀缓存命中 {s['cached_tokens']} "
+                f"({self.cache_hit_rate() * 100:.1f}%), 生成 {s['completion_tokens']} tokens")
+
+    async def close(self):
+        for _, writer in self._idle:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+        self._idle.clear()
@@ -0,0 +1,52 @@
+import asyncio
+import json
+import random
+from typing import Any
+
+from plugins.model.TaskClassifier import classify_prompt
+from plugins.system.Profiler import PerfRecorder
+
+
+class InstrumentedRouter:
+    """
+    计时与计数路由器包装层 (放在最外层，即插件看到的 model.chat)：
+    按任务类型 (cognition / plan / mutation) 记录每次调用的墙钟 / CPU 时间、prompt 与响应字符数、
+    无法解析为 JSON 的响应数，以及异常与重试次数 (区段 llm:<任务>)。
+
+    max_retries > 0 时对抛出异常的调用做指数退避重试 (默认不重试，与原行为一致)；
+    最终失败的异常照常抛给插件 (插件各自有兜底逻辑)。
+    """
+
+    def __init__(self, router: Any, recorder: PerfRecorder, max_retries: int = 0, backoff: float = 0.5):
+        self.router = router
+        self.recorder = recorder
+        self.max_retries = max(0, int(max_retries))
+        self.backoff = backoff
+        # 退避抖动用独立随机数，不扰动设置了 seed 的全局随机序列
+        self._rng = random.Random()
+
+    async def chat(self, prompt: str) -> Any:
+        section = f"llm:{classify_prompt(prompt)}"
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self.recorder.measure(section, self.router.chat(prompt))
+            except Exception:
+                self.recorder.count(section, errors=1)
+                if attempt == self.max_retries:
+                    raise
+                self.recorder.count(section, retries=1)
+                await asyncio.sleep(self.backoff * (2 ** attempt) * self._rng.uniform(0.5, 1.5))
+                continue
+            text = response if isinstance(response, str) else json.dumps(response, ensure_ascii=False)
+            self.recorder.count(section, prompt_chars=len(prompt), response_chars=len(text))
+            if isinstance(response, str) and not _is_json(response):
+                self.recorder.count(section, invalid_json=1)
+            return response
+
+
+def _is_json(text: str) -> bool:
+    try:
+        json.loads(text.replace("```json", "").replace("```", "").strip())
+        return True
+    except ValueError:
+        return False
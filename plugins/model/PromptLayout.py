@@ -0,0 +1,61 @@
+"""
+前缀稳定的 prompt 布局：静态部分 (任务说明、输出格式、人设) 作为 system 消息，每个 tick 变化的状态作为简短的 user 消息。
+服务商的前缀缓存 (prompt caching) 按请求开头的最长公共前缀命中，因此：
+- 全体 Agent 共享的任务说明放在最前面，同一任务的所有调用共享这段前缀；
+- 其后是 Agent 自身的人设，同一 Agent 跨 tick 的调用共享到这里；
+- 只有 user 消息随 tick 变化。
+"""
+from typing import Any, Dict, List, Tuple
+
+
+class LayeredPrompt(str):
+    """
+    带 system / user 分层的 prompt。本身就是完整的 prompt 文本 (system 在前)，
+    因此缓存、磁带、批量调度、任务识别等只认字符串的路由器包装层无需改动；
+    支持消息列表的客户端 (ChatCompletionsClient) 用 prompt_messages 拆成两条消息发送。
+    """
+    system: str
+    user: str
+
+    def __new__(cls, system: str, user: str) -> "LayeredPrompt":
+        prompt = super().__new__(cls, f"{system}\n\n{user}")
+        prompt.system = system
+        prompt.user = user
+        return prompt
+
+    def __getnewargs__(self):
+        return self.system, self.user
+
+
+def prompt_messages(prompt: str) -> List[Dict[str, str]]:
+    """prompt -> chat-completions 消息列表；普通字符串仍作为单条 user 消息"""
+    if isinstance(prompt, LayeredPrompt):
+        return [{"role": "system", "content": prompt.system}, {"role": "user", "content": prompt.user}]
+    return [{"role": "user", "content": prompt}]
+
+
+class PromptTemplate:
+    """
+    预编译的两段式模板，每个插件实例 (即每个 Agent) 持有一份。
+    system 模板按静态参数渲染一次后缓存，参数不变时每次调用只需渲染简短的 user 模板；
+    两段都用 str.format 语法 (字面量花括号写作 {{ }})。
+    """
+
+    def __init__(self, system: str, user: str, max_variants: int = 4):
+        self.system_template = system.strip()
+        self.user_template = user.strip()
+        self.max_variants = max_variants
+        self._systems: Dict[Tuple[Tuple[str, Any], ...], str] = {}
+
+    def system(self, **static) -> str:
+        key = tuple(sorted(static.items()))
+        text = self._systems.get(key)
+        if text is None:
+            # 静态参数 (如人设被 set_profile 修改) 很少变化，只保留最近几种渲染结果
+            if len(self._systems) >= self.max_variants:
+                self._systems.clear()
+            text = self._systems[key] = self.system_template.format(**static)
+        return text
+
+    def render(self, static: Dict[str, Any], volatile: Dict[str, Any]) -> LayeredPrompt:
+        return LayeredPrompt(self.system(**static), self.user_template.format(**volatile))
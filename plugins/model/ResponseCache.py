@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from plugins.model.TaskClassifier import classify_prompt, TASK_TYPES
+
+_WHITESPACE = re.compile(r"\s+")
+_TRUST_FIELD = re.compile(r"(Trust:\s*)(-?\d+(?:\.\d+)?)")
+_TICK_FIELD = re.compile(r"Tick\s+\d+")
+
+
+class ResponseCache:
+    """
+    持久化 LLM 响应缓存 (SQLite)，包装路由器并对外保持 chat(prompt) 接口。
+
+    - 键：规范化后 prompt 的 SHA-256 (折叠空白，可选将信任值分桶、忽略 Tick)；
+    - 存储：本地 SQLite 文件，超过容量上限时按最近访问时间 (LRU) 淘汰；
+    - 按任务类型 (cognition / plan / mutation) 单独开关；
+    - 同一键的并发请求合并为一次调用 (例如同一条全局新闻同时到达多个 Agent)；
+    - 命中时只在内存中记录访问时间，每 flush_every 次命中 (以及写入、淘汰、关闭时) 批量写回，
+      避免在事件循环上为每次命中执行一次 UPDATE + commit。
+    """
+
+    def __init__(self, router: Any, path: str, max_mb: float = 256.0,
+                 tasks: Optional[Iterable[str]] = None, trust_step: float = 0.0,
+                 ignore_tick: bool = False, flush_every: int = 256, timeout: float = 30.0):
+        self.router = router
+        self.path = path
+        self.max_bytes = int(float(max_mb) * 1024 * 1024)
+        self.tasks = set(tasks) if tasks is not None else set(TASK_TYPES)
+        self.trust_step = float(trust_step or 0.0)
+        self.ignore_tick = ignore_tick
+        self.flush_every = max(1, int(flush_every))
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=timeout)
+        # WAL 模式下读不阻塞写，多个进程只读共享同一缓存文件时也不会互相锁住
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, task TEXT, response TEXT, size INTEGER, last_access REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+        self._touched: Dict[str, float] = {}
+        self._pending_hits = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {t: {"hits": 0, "misses": 0} for t in TASK_TYPES}
+        self.evictions = 0
+
+    # --- 键计算 ---
+    def _bucket_trust(self, match) -> str:
+        value = float(match.group(2))
+        bucketed = round(value / self.trust_step) * self.trust_step
+        return f"{match.group(1)}{bucketed:.2f}"
+
+    def normalize(self, prompt: str) -> str:
+        text = _WHITESPACE.sub(" ", prompt).strip()
+        if self.trust_step > 0:
+            text = _TRUST_FIELD.sub(self._bucket_trust, text)
+        if self.ignore_tick:
+            text = _TICK_FIELD.sub("Tick *", text)
+        return text
+
+    def make_key(self, prompt: str) -> str:
+        return hashlib.sha256(self.normalize(prompt).encode("utf-8")).hexdigest()
+
+    # --- 存取 ---
+    def _get(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._touched[key] = time.time()
+        self._pending_hits += 1
+        if self._pending_hits >= self.flush_every:
+            self._flush_access()
+            self._conn.commit()
+        return row[0]
+
+    def _flush_access(self) -> None:
+        """把内存中累积的访问时间批量写回 (不提交，由调用方 commit)"""
+        if self._touched:
+            self._conn.executemany("UPDATE responses SET last_access = ? WHERE key = ?",
+                                   [(t, k) for k, t in self._touched.items()])
+            self._touched.clear()
+        self._pending_hits = 0
+
+    def _put(self, key: str, task: str, response: str) -> None:
+        size = len(response.encode("utf-8"))
+        old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        if old:
+            self._total_bytes -= old[0]
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, task, response, size, last_access) VALUES (?, ?, ?, ?, ?)",
+            (key, task, response, size, time.time()),
+        )
+        self._total_bytes += size
+        self._touched.pop(key, None)
+        self._flush_access()
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+        self._conn.commit()
+
+    def _evict(self) -> None:
+        # 淘汰到容量上限的 90%，避免每次写入都触发淘汰
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall()
+        victims = []
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            victims.append((key,))
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    @staticmethod
+    def _is_valid(response: Any) -> bool:
+        # 只缓存可解析的 JSON 响应，避免把一次偶发的坏输出永久固化
+        if not isinstance(response, str):
+            return False
+        try:
+            json.loads(response.replace("```json", "").replace("```", "").strip())
+            return True
+        except json.JSONDecodeError:
+            return False
+
+    # --- 路由器接口 ---
+    async def chat(self, prompt: str) -> Any:
+        task = classify_prompt(prompt)
+        if task not in self.tasks:
+            return await self.router.chat(prompt)
+
+        key = self.make_key(prompt)
+        cached = self._get(key)
+        if cached is not None:
+            self.stats[task]["hits"] += 1
+            return cached
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats[task]["hits"] += 1
+            return await asyncio.shield(pending)
+
+        self.stats[task]["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await self.router.chat(prompt)
+            if self._is_valid(response):
+                self._put(key, task, response)
+            future.set_result(response)
+            return response
+        except Exception as e:
+            future.set_exception(e)
+            # 无其他等待者时消费掉异常，避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def hit_rate(self) -> float:
+        hits = sum(s["hits"] for s in self.stats.values())
+        total = hits + sum(s["misses"] for s in self.stats.values())
+        return hits / total if total else 0.0
+
+    def summary(self) -> str:
+        parts = [f"{t} {s['hits']}/{s['hits'] + s['misses']}"
+                 for t, s in self.stats.items() if s["hits"] + s["misses"] > 0]
+        return (f"命中率 {self.hit_rate() * 100:.1f}% ({', '.join(parts) or '无请求'}) | "
+                f"占用 {self._total_bytes / 1024 / 1024:.1f}MB, 淘汰 {self.evictions} 条")
+
+    def close(self) -> None:
+        self._flush_access()
+        self._conn.commit()
+        self._conn.close()
@@ -0,0 +1,35 @@
+"""
+根据 prompt 中的输出格式标记识别其所属任务类型。
+路由器包装层 (缓存、统计等) 只能看到 prompt 文本，借此区分三类 LLM 调用。
+"""
+
+TASK_COGNITION = "cognition"  # GreenCognitionPlugin: 漂绿感知与信任变化
+TASK_PLAN = "plan"            # ConsumerPlanPlugin: 购买/发帖/忽略决策
+TASK_MUTATION = "mutation"    # GreenInvokePlugin: UGC 内容变异
+TASK_OTHER = "other"
+
+TASK_TYPES = (TASK_COGNITION, TASK_PLAN, TASK_MUTATION, TASK_OTHER)
+
+
+def classify_prompt(prompt: str) -> str:
+    if "mutated_content" in prompt:
+        return TASK_MUTATION
+    if "hypocrisy_perceived" in prompt:
+        return TASK_COGNITION
+    if "buy/post_review/ignore" in prompt:
+        return TASK_PLAN
+    return TASK_OTHER
+
+
+# 各任务的兜底响应 (结构合法的 JSON)，用于离线回放未命中或本地替身服务
+FALLBACK_RESPONSES = {
+    TASK_COGNITION: {"hypocrisy_perceived": False, "trust_change": 0.0, "importance": 5.0,
+                     "reasoning": "Nothing new worth changing my mind about."},
+    TASK_PLAN: {"action": "ignore", "content": "", "reason": "No strong reason to act right now."},
+    TASK_MUTATION: {"mutated_content": "Just saw this, not sure what to think yet."},
+    TASK_OTHER: {},
+}
+
+
+def fallback_response(task: str) -> dict:
+    return dict(FALLBACK_RESPONSES.get(task, {}))
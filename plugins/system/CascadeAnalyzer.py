@@ -0,0 +1,104 @@
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from plugins.environment.network.TopologyGenerator import load_graph_json, to_csr
+
+
+def load_graph_arrays(graph_path: str) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """读取 network_graph_*.json (node-link 格式)，返回 (节点 ID 列表, indptr, indices)"""
+    ids, src, dst = load_graph_json(graph_path)
+    indptr, indices = to_csr(src, dst, len(ids))
+    return ids, indptr, indices
+
+
+def reconstruct_cascades(indptr: np.ndarray, indices: np.ndarray, agents: np.ndarray,
+                         ticks: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    由发帖事件重建信息级联森林。agents / ticks 为每次发帖的 Agent 下标与 tick。
+    规则：某 Agent 在 tick t 发帖时，若有邻居在 t 之前发过帖，则其父事件为最近一次发帖的邻居的最后一次发帖
+    (同 tick 内按邻居编号取最小)；否则为新级联的根。
+    按 tick 顺序扫描一次，只维护每个 Agent 的最后发帖 tick 与事件号，每条邻接项最多访问一次，复杂度 O(P + Σ度数)。
+    节点是发帖事件而非 Agent，同一 Agent 多次发帖不会成环，深度即可按 tick 顺序动态规划得到。
+    返回按 tick 排序后的 agent / tick / parent (-1 为根) / depth / root 数组。
+    """
+    order = np.argsort(ticks, kind="stable")
+    agents = np.asarray(agents, dtype=np.int64)[order]
+    ticks = np.asarray(ticks, dtype=np.int64)[order]
+    n, p = len(indptr) - 1, len(agents)
+    last_tick = np.full(n, -1, dtype=np.int64)
+    last_event = np.full(n, -1, dtype=np.int64)
+    parent = np.full(p, -1, dtype=np.int64)
+    depth = np.zeros(p, dtype=np.int64)
+    root = np.arange(p, dtype=np.int64)
+
+    bounds = np.flatnonzero(np.diff(ticks)) + 1
+    for start, end in zip(np.r_[0, bounds], np.r_[bounds, p]):
+        events = np.arange(start, end)
+        posters = agents[start:end]
+        starts = indptr[posters]
+        counts = indptr[posters + 1] - starts
+        local = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        owner = np.repeat(events, counts)
+        nbrs = indices[np.repeat(starts, counts) + local]
+        seen = last_tick[nbrs]
+        keep = seen >= 0
+        owner, nbrs, seen = owner[keep], nbrs[keep], seen[keep]
+        if len(owner):
+            # 每个事件取最近发帖的邻居：按 (事件, -tick, 邻居编号) 排序后取各事件的第一项
+            o = np.lexsort((nbrs, -seen, owner))
+            first = o[np.r_[True, owner[o][1:] != owner[o][:-1]]]
+            child, par = owner[first], last_event[nbrs[first]]
+            parent[child] = par
+            depth[child] = depth[par] + 1
+            root[child] = root[par]
+        # 本 tick 全部处理完再更新，同 tick 的发帖互不作为来源
+        last_tick[posters] = ticks[start]
+        last_event[posters] = events
+    return {"agent": agents, "tick": ticks, "parent": parent, "depth": depth, "root": root}
+
+
+def cascade_statistics(cascades: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    每个级联的规模、深度、最大宽度 (同一层的事件数) 与结构病毒性 (structural virality：
+    级联树中所有节点对的平均距离，= 2W / (n(n-1))，W 为 Wiener 指数 Σ_边 s(n - s)，s 为边下方子树大小)。
+    全部为按层的数组运算。
+    """
+    parent, depth, root = cascades["parent"], cascades["depth"], cascades["root"]
+    roots, cid = np.unique(root, return_inverse=True)
+    k = len(roots)
+    size = np.bincount(cid, minlength=k)
+    max_depth = int(depth.max()) if len(depth) else 0
+    cdepth = np.zeros(k, dtype=np.int64)
+    np.maximum.at(cdepth, cid, depth)
+    breadth = np.bincount(cid * (max_depth + 1) + depth, minlength=k * (max_depth + 1)).reshape(k, max_depth + 1).max(axis=1) \
+        if k else np.zeros(0, dtype=np.int64)
+
+    # 子树大小：从最深层向上逐层累加到父节点
+    subtree = np.ones(len(parent), dtype=np.int64)
+    for d in range(max_depth, 0, -1):
+        level = np.flatnonzero(depth == d)
+        np.add.at(subtree, parent[level], subtree[level])
+    child = parent >= 0
+    wiener = np.bincount(cid[child], weights=subtree[child] * (size[cid[child]] - subtree[child]), minlength=k)
+    pairs = size * (size - 1)
+    virality = np.divide(2 * wiener, pairs, out=np.zeros(k), where=pairs > 0)
+    return {"root_event": roots, "size": size, "depth": cdepth, "breadth": breadth, "virality": virality}
+
+
+def distribution(values: np.ndarray) -> Dict[int, int]:
+    """{取值: 级联个数}"""
+    uniq, counts = np.unique(values, return_counts=True)
+    return {int(v): int(c) for v, c in zip(uniq, counts)}
+
+
+def summarize(stats: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    multi = stats["size"] > 1
+    return {
+        "cascades": int(len(stats["size"])),
+        "max_depth": int(stats["depth"].max()) if len(stats["depth"]) else 0,
+        "max_size": int(stats["size"].max()) if len(stats["size"]) else 0,
+        "mean_virality": float(stats["virality"][multi].mean()) if multi.any() else 0.0,
+        "size_distribution": distribution(stats["size"]),
+        "breadth_distribution": distribution(stats["breadth"]),
+    }
@@ -0,0 +1,162 @@
+import glob
+import hashlib
+import json
+import os
+import pickle
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+COMPLETED_FILE = "COMPLETED"
+
+
+class CheckpointStore:
+    """
+    tick 边界检查点存储 (内容寻址，增量写入)。
+
+    每个快照片段 (单个 Agent 的状态与记忆、网络拓扑、收件箱、随机数状态等) 序列化后以
+    内容哈希为文件名存入 objects/；内容未变化的片段 (如拓扑、本轮没有变化的 Agent) 不会重复写入。
+    清单 tick_XXXXX.json 记录本次检查点引用的全部片段与输出文件偏移量，最后原子写入，
+    因此只有清单存在的检查点才是完整的。只保留最近 keep 个清单，不再被引用的片段随之删除。
+    记忆这类写入后不再变化的记录按增量存储 (见 put_records)，每个检查点只写入新出现的记录。
+    """
+
+    def __init__(self, root: str, keep: int = 2):
+        self.root = root
+        self.keep = max(1, keep)
+        self.objects_dir = os.path.join(root, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.stats = {"written": 0, "reused": 0, "bytes": 0}
+        # 记录 ID -> 所在片段键 (只保留最近一次检查点仍引用的记录)
+        self._record_chunks: Dict[str, str] = {}
+
+    # --- 片段 ---
+    def _object_path(self, key: str) -> str:
+        return os.path.join(self.objects_dir, key[:2], key)
+
+    def put(self, obj: Any) -> str:
+        data = zlib.compress(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        key = hashlib.sha1(data).hexdigest()
+        path = self._object_path(key)
+        if os.path.exists(path):
+            self.stats["reused"] += 1
+            return key
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self.stats["written"] += 1
+        self.stats["bytes"] += len(data)
+        return key
+
+    def get(self, key: str) -> Any:
+        with open(self._object_path(key), "rb") as f:
+            return pickle.loads(zlib.decompress(f.read()))
+
+    # --- 增量记录 ---
+    def put_records(self, streams: Dict[str, List[Dict[str, Any]]]) -> Tuple[Dict[str, List[str]], List[str]]:
+        """
+        {名称: 记录列表} 按记录增量存储：每条记录以内容哈希为 ID，之前的检查点已写入的记录只引用其所在片段，
+        本次新出现的记录合并为一个片段写入。返回 ({名称: [记录 ID]}, 引用到的片段键列表)。
+        """
+        refs, fresh = {}, {}
+        for name, records in streams.items():
+            ids = []
+            for record in records:
+                rid = record_id(record)
+                if rid not in self._record_chunks:
+                    fresh[rid] = record
+                ids.append(rid)
+            refs[name] = ids
+        chunk = self.put(fresh) if fresh else None
+        live = {}
+        for ids in refs.values():
+            for rid in ids:
+                live[rid] = self._record_chunks.get(rid, chunk)
+        self._record_chunks = live
+        return refs, sorted(set(live.values()))
+
+    def get_records(self, chunks: List[str]) -> Dict[str, Dict[str, Any]]:
+        """读取片段中的全部记录 {记录 ID: 记录}，并记住其位置供后续检查点复用"""
+        records = {}
+        for key in chunks:
+            chunk = self.get(key)
+            records.update(chunk)
+            self._record_chunks.update(dict.fromkeys(chunk, key))
+        return records
+
+    # --- 清单 ---
+    def _manifest_path(self, tick: int) -> str:
+        return os.path.join(self.root, f"tick_{tick:05d}.json")
+
+    def _manifests(self):
+        return sorted(glob.glob(os.path.join(self.root, "tick_*.json")))
+
+    def save(self, tick: int, manifest: Dict[str, Any]) -> str:
+        path = self._manifest_path(tick)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(dict(manifest, tick=tick), f, ensure_ascii=False)
+        os.replace(tmp, path)
+        self._prune()
+        return path
+
+    def latest(self) -> Optional[Tuple[int, Dict[str, Any]]]:
+        manifests = self._manifests()
+        if not manifests:
+            return None
+        with open(manifests[-1], "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        return manifest["tick"], manifest
+
+    def _prune(self):
+        manifests = self._manifests()
+        if len(manifests) <= self.keep:
+            return
+        for path in manifests[:-self.keep]:
+            os.remove(path)
+        live = set()
+        for path in manifests[-self.keep:]:
+            with open(path, "r", encoding="utf-8") as f:
+                live.update(_object_keys(json.load(f)))
+        for path in glob.glob(os.path.join(self.objects_dir, "*", "*")):
+            if os.path.basename(path) not in live and not path.endswith(".tmp"):
+                os.remove(path)
+
+    # --- 运行完成标记 ---
+    @property
+    def completed(self) -> bool:
+        return os.path.exists(os.path.join(self.root, COMPLETED_FILE))
+
+    def mark_completed(self) -> None:
+        """运行正常结束后写入标记，该运行的检查点不再被恢复 (否则会截断已完成运行的输出)"""
+        with open(os.path.join(self.root, COMPLETED_FILE), "w", encoding="utf-8") as f:
+            f.write("")
+
+    def summary(self) -> str:
+        s = self.stats
+        return f"新写入 {s['written']} 个片段 ({s['bytes'] / 1024:.1f} KB), 复用 {s['reused']} 个"
+
+
+def _object_keys(manifest: Dict[str, Any]):
+    """清单中引用的全部片段键 (位于 objects 字段下，值为键、{名称: 键} 或键列表)"""
+    for value in manifest.get("objects", {}).values():
+        if isinstance(value, dict):
+            yield from value.values()
+        elif isinstance(value, list):
+            yield from value
+        else:
+            yield value
+
+
+def record_id(record: Dict[str, Any]) -> str:
+    """记忆记录的 ID：(tick, 重要性, 内容) 的哈希 (嵌入由内容决定，不参与计算)"""
+    text = f"{int(record['tick'])}\x00{float(record['importance'])!r}\x00{record['content']}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def latest_run_dir(checkpoint_root: str) -> Optional[str]:
+    """checkpoint_root 下最近一次未完成运行的检查点目录 (按运行时间戳命名)"""
+    runs = sorted(d for d in glob.glob(os.path.join(checkpoint_root, "*"))
+                  if os.path.isdir(d) and not os.path.exists(os.path.join(d, COMPLETED_FILE)))
+    return runs[-1] if runs else None
@@ -0,0 +1,199 @@
+import glob
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 列类型：int / float / bool / category (字典编码) / string (UTF-8 拼接 + 偏移量)
+SIMULATION_LOG_SCHEMA = [
+    ("Tick", "int"), ("AgentID", "category"), ("Type", "category"),
+    ("TrustScore", "float"), ("Action", "category"), ("Thought_Hypocrisy", "bool"),
+]
+THOUGHTS_LOG_SCHEMA = [
+    ("Tick", "int"), ("AgentID", "category"), ("AgentType", "category"),
+    ("Hypocrisy", "bool"), ("TrustChange", "float"), ("Reasoning", "string"),
+]
+
+COLUMNAR_SUFFIX = ".columnar"
+SCHEMA_FILE = "schema.json"
+
+
+def _as_bool(value: Any) -> bool:
+    # 兼容大模型偶尔返回的字符串形式
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes")
+    return bool(value)
+
+
+def _as_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _group_file(path: str, tick: int) -> str:
+    return os.path.join(path, f"tick_{tick:05d}.npz")
+
+
+def _group_ticks(path: str) -> List[int]:
+    return sorted(int(os.path.basename(f)[5:10]) for f in glob.glob(os.path.join(path, "tick_*.npz")))
+
+
+class ColumnarLogWriter:
+    """
+    列式压缩日志：一个目录，每个 tick 一个行组 (tick_XXXXX.npz，压缩存储，每列一个数组)。
+    类别列 (AgentID / Type / Action 等) 字典编码为 int32，字典只追加并保存在 schema.json；
+    读取时可只解压需要的列与 tick (见 read_log)。
+    writerow 接口与 csv.writer 相同，tick 变化时自动写出上一个行组。
+    resume_tick 非空时 (断点恢复) 删除该 tick 之后的行组并沿用已有字典。
+    """
+
+    def __init__(self, path: str, schema: Sequence[Tuple[str, str]], resume_tick: Optional[int] = None):
+        self.path = path
+        self.schema = list(schema)
+        os.makedirs(path, exist_ok=True)
+        self.dictionaries: Dict[str, List[str]] = {name: [] for name, kind in self.schema if kind == "category"}
+        if resume_tick is not None and os.path.exists(os.path.join(path, SCHEMA_FILE)):
+            with open(os.path.join(path, SCHEMA_FILE), "r", encoding="utf-8") as f:
+                self.dictionaries.update(json.load(f)["dictionaries"])
+        for tick in _group_ticks(path):
+            if resume_tick is None or tick > resume_tick:
+                os.remove(_group_file(path, tick))
+        self._codes = {name: {v: i for i, v in enumerate(values)} for name, values in self.dictionaries.items()}
+        self._rows: List[Sequence[Any]] = []
+        self._tick: Optional[int] = None
+        self.last_tick = resume_tick or 0
+        self._write_schema()
+
+    def writerow(self, row: Sequence[Any]) -> None:
+        tick = int(row[0])
+        if self._tick is not None and tick != self._tick:
+            self._flush_group()
+        self._tick = tick
+        self._rows.append(row)
+
+    def writerows(self, rows) -> None:
+        for row in rows:
+            self.writerow(row)
+
+    def _encode(self, name: str, kind: str, values: List[Any]) -> Dict[str, np.ndarray]:
+        if kind == "int":
+            return {name: np.asarray(values, dtype=np.int32)}
+        if kind == "float":
+            return {name: np.asarray([_as_float(v) for v in values], dtype=np.float64)}
+        if kind == "bool":
+            return {name: np.asarray([_as_bool(v) for v in values], dtype=bool)}
+        if kind == "category":
+            codes, dictionary = self._codes[name], self.dictionaries[name]
+            out = np.empty(len(values), dtype=np.int32)
+            for i, v in enumerate(values):
+                v = str(v)
+                code = codes.get(v)
+                if code is None:
+                    code = codes[v] = len(dictionary)
+                    dictionary.append(v)
+                out[i] = code
+            return {name: out}
+        encoded = [str(v).encode("utf-8") for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return {f"{name}.data": np.frombuffer(b"".join(encoded), dtype=np.uint8), f"{name}.offsets": offsets}
+
+    def _flush_group(self) -> None:
+        if not self._rows:
+            return
+        arrays = {}
+        for j, (name, kind) in enumerate(self.schema):
+            arrays.update(self._encode(name, kind, [row[j] for row in self._rows]))
+        path = _group_file(self.path, self._tick)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, path)
+        self._write_schema()
+        self.last_tick = self._tick
+        self._rows = []
+
+    def _write_schema(self) -> None:
+        tmp = os.path.join(self.path, SCHEMA_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"columns": self.schema, "dictionaries": self.dictionaries}, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(self.path, SCHEMA_FILE))
+
+    # --- 与文件对象一致的接口 (flush / tell / close) ---
+    def flush(self) -> None:
+        self._flush_group()
+
+    def tell(self) -> int:
+        """已完整写出的最后一个 tick (检查点以此作为 "偏移量")"""
+        self._flush_group()
+        return self.last_tick
+
+    def close(self) -> None:
+        self._flush_group()
+
+
+def read_log(path: str, columns: Optional[Sequence[str]] = None,
+             ticks: Optional[Sequence[int]] = None) -> Dict[str, np.ndarray]:
+    """
+    读取列式日志，只解压 columns 中的列与 ticks 中的行组。
+    类别列解码为字符串数组 (dtype=object)，返回 {列名: 数组}。
+    """
+    with open(os.path.join(path, SCHEMA_FILE), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    kinds = dict((name, kind) for name, kind in meta["columns"])
+    columns = list(columns) if columns else list(kinds)
+    wanted = set(ticks) if ticks is not None else None
+    parts: Dict[str, List[np.ndarray]] = {name: [] for name in columns}
+
+    for tick in _group_ticks(path):
+        if wanted is not None and tick not in wanted:
+            continue
+        with np.load(_group_file(path, tick)) as group:
+            for name in columns:
+                if kinds[name] == "string":
+                    data, offsets = group[f"{name}.data"].tobytes(), group[f"{name}.offsets"]
+                    parts[name].append(np.array([data[offsets[i]:offsets[i + 1]].decode("utf-8")
+                                                 for i in range(len(offsets) - 1)], dtype=object))
+                else:
+                    parts[name].append(group[name])
+
+    out = {}
+    for name in columns:
+        kind = kinds[name]
+        empty = np.zeros(0, dtype=object if kind in ("category", "string") else None)
+        values = np.concatenate(parts[name]) if parts[name] else empty
+        if kind == "category" and len(values):
+            values = np.asarray(meta["dictionaries"][name], dtype=object)[values]
+        out[name] = values
+    return out
+
+
+def load_log(path: str, columns: Optional[Sequence[str]] = None, ticks: Optional[Sequence[int]] = None):
+    """以 pandas DataFrame 读取结果日志 (CSV 文件或列式目录均可)，只加载需要的列与 tick"""
+    import pandas as pd
+    if os.path.isdir(path):
+        return pd.DataFrame(read_log(path, columns, ticks))
+    usecols = list(columns) if columns else None
+    if usecols and ticks is not None and "Tick" not in usecols:
+        usecols.append("Tick")
+    df = pd.read_csv(path, usecols=usecols)
+    if ticks is not None:
+        df = df[df["Tick"].isin(list(ticks))]
+        if columns and "Tick" not in columns:
+            df = df.drop(columns="Tick")
+    return df
+
+
+def latest_log(results_dir: str, prefix: str) -> Optional[str]:
+    """results 目录下最新的某类日志 (prefix_*.csv 或 prefix_*.columnar 目录)"""
+    candidates = (glob.glob(os.path.join(results_dir, f"{prefix}_*.csv"))
+                  + glob.glob(os.path.join(results_dir, f"{prefix}_*{COLUMNAR_SUFFIX}")))
+    return max(candidates, key=os.path.getctime) if candidates else None
+
+
+def log_stem(path: str) -> str:
+    """去掉 .csv / .columnar 后缀，用于派生图片等输出文件名"""
+    return os.path.splitext(path.rstrip(os.sep))[0]
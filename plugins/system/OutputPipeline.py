@@ -0,0 +1,132 @@
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+_STOP = object()
+_SYNC = object()
+
+
+class StreamHandle:
+    """单个输出流的写入句柄 (writerow / writerows 接口与 csv.writer 相同)，行批次交给后台线程写出"""
+
+    def __init__(self, pipeline: "OutputPipeline", name: str):
+        self._pipeline = pipeline
+        self._name = name
+
+    def writerow(self, row: Sequence[Any]) -> None:
+        self._pipeline.put(self._name, [row])
+
+    def writerows(self, rows) -> None:
+        self._pipeline.put(self._name, list(rows))
+
+
+class OutputPipeline:
+    """
+    结果输出管道：tick 循环把行批次放入有界队列，专用写线程取出后写入各输出流。
+
+    - 队列已满时 put 阻塞 (背压)，阻塞时间计入 stats，用于判断磁盘是否拖慢 tick 循环；
+    - 写线程每写 flush_every 个批次或队列空闲时才 flush，避免逐行落盘；
+    - sync() 等待队列清空并 flush 全部流 (写检查点前调用，之后主线程可安全读取文件偏移量)；
+    - close() 写完剩余批次后关闭所有文件；作为上下文管理器使用时，正常结束、异常与 Ctrl-C 均会执行。
+    写线程出错时记录异常，并在下一次 put / sync / close 时于主线程重新抛出。
+    """
+
+    def __init__(self, max_batches: int = 64, flush_every: int = 8):
+        self.flush_every = max(1, flush_every)
+        self._queue: "queue.Queue[Tuple[Any, Any]]" = queue.Queue(maxsize=max(1, max_batches))
+        self._streams: Dict[str, Tuple[Any, Any]] = {}
+        self._error = None
+        self._closed = False
+        self.stats = {"batches": 0, "rows": 0, "flushes": 0, "blocked": 0.0, "max_blocked": 0.0}
+        self._thread = threading.Thread(target=self._drain, name="output-writer", daemon=True)
+        self._thread.start()
+
+    def add_stream(self, name: str, file, writer) -> StreamHandle:
+        """注册输出流：file 需支持 flush / close，writer 需支持 writerows"""
+        self._streams[name] = (file, writer)
+        return StreamHandle(self, name)
+
+    # --- 主线程 ---
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError(f"结果写线程出错: {error!r}") from error
+
+    def _enqueue(self, item: Tuple[Any, Any]) -> None:
+        start = time.perf_counter()
+        self._queue.put(item)
+        waited = time.perf_counter() - start
+        self.stats["blocked"] += waited
+        self.stats["max_blocked"] = max(self.stats["max_blocked"], waited)
+
+    def put(self, name: str, rows: List[Sequence[Any]]) -> None:
+        self._raise_error()
+        if not rows:
+            return
+        self._enqueue((name, rows))
+        self.stats["batches"] += 1
+        self.stats["rows"] += len(rows)
+
+    def sync(self) -> None:
+        """阻塞到队列中的批次全部写出并 flush"""
+        self._enqueue((_SYNC, None))
+        self._queue.join()
+        self._raise_error()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread.is_alive():
+            self._enqueue((_STOP, None))
+            self._thread.join()
+        for file, _ in self._streams.values():
+            file.close()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+            return
+        # 已有异常 (含 KeyboardInterrupt / 取消) 时仍写完已排队的批次并关闭文件，不掩盖原异常
+        try:
+            self.close()
+        except Exception as e:
+            print(f"⚠️ 关闭结果输出时出错: {e}")
+
+    # --- 写线程 ---
+    def _flush(self) -> None:
+        for file, _ in self._streams.values():
+            file.flush()
+        self.stats["flushes"] += 1
+
+    def _drain(self) -> None:
+        dirty = 0
+        while True:
+            name, rows = self._queue.get()
+            try:
+                if name is _STOP or name is _SYNC:
+                    if dirty:
+                        self._flush()
+                        dirty = 0
+                elif self._error is None:
+                    self._streams[name][1].writerows(rows)
+                    dirty += 1
+                    if dirty >= self.flush_every or self._queue.empty():
+                        self._flush()
+                        dirty = 0
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+            if name is _STOP:
+                return
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"{s['batches']} 个批次 / {s['rows']} 行, flush {s['flushes']} 次, "
+                f"tick 循环阻塞 {s['blocked'] * 1000:.1f} ms (单次最长 {s['max_blocked'] * 1000:.1f} ms)")
@@ -0,0 +1,33 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+
+class PhaseExecutor:
+    """
+    并发阶段执行器：在同一阶段内让所有 Agent 并发执行，
+    用信号量限制同时在途的 LLM 调用数量，阶段之间天然形成屏障 (Barrier)。
+    """
+
+    def __init__(self, max_concurrency: int = 8):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # 信号量必须在事件循环内创建，这里懒加载
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _run_one(self, step: Callable[[Any], Awaitable[Any]], agent: Any) -> Any:
+        async with self._get_semaphore():
+            return await step(agent)
+
+    async def run_phase(self, agents: List[Any], step: Callable[[Any], Awaitable[Any]]) -> List[Any]:
+        """
+        对所有 Agent 并发执行 step(agent)，全部完成后才返回 (即阶段屏障)。
+        返回值顺序与 agents 顺序一致，保证下游 CSV 写入顺序确定。
+        """
+        if self.max_concurrency == 1:
+            # 退化为原来的串行执行，便于调试对比
+            return [await step(ag) for ag in agents]
+        return await asyncio.gather(*(self._run_one(step, ag) for ag in agents))
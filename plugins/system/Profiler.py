@@ -0,0 +1,233 @@
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Awaitable, Dict, List, Optional
+
+import numpy as np
+
+PERF_HEADER = ["Tick", "Section", "Calls", "WallTotal", "WallMean", "WallP50", "WallP95", "WallMax", "CPUTotal",
+               "PromptChars", "ResponseChars", "EstTokens", "InvalidJSON", "Errors", "Retries"]
+
+# 延迟直方图：1e-4 s ~ 100 s 的对数分桶 (每 10 倍 10 个桶)，可跨 tick / 进程相加合并
+_EDGES = np.logspace(-4, 2, 61)
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = np.zeros(len(_EDGES) + 1, dtype=np.int64)
+
+    def add(self, seconds: List[float]) -> None:
+        self.counts += np.bincount(np.searchsorted(_EDGES, seconds), minlength=len(self.counts))
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        self.counts += other.counts
+        return self
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def quantile(self, q: float) -> float:
+        """分位数所在桶的上边界 (秒)"""
+        n = self.count
+        if n == 0:
+            return float("nan")
+        i = int(np.searchsorted(np.cumsum(self.counts), max(1, int(np.ceil(q * n)))))
+        return float(_EDGES[min(i, len(_EDGES) - 1)])
+
+
+class _CpuMeter:
+    """
+    包装一个协程，只在它真正运行 (每次 send / throw) 时累计线程 CPU 时间。
+    并发阶段中协程在 await 处交替执行，直接取前后差值会把其他 Agent 的 CPU 也算进来。
+    """
+
+    def __init__(self, coro: Awaitable[Any]):
+        self.coro = coro
+        self.cpu = 0.0
+
+    def __await__(self):
+        it = self.coro.__await__()
+        value, error = None, None
+        while True:
+            start = time.thread_time()
+            try:
+                yielded = it.throw(error) if error is not None else it.send(value)
+            except StopIteration as stop:
+                self.cpu += time.thread_time() - start
+                return stop.value
+            except BaseException:
+                self.cpu += time.thread_time() - start
+                raise
+            self.cpu += time.thread_time() - start
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:
+                value, error = None, e
+
+
+class _Timer:
+    def __init__(self, recorder: "PerfRecorder", section: str):
+        self.recorder, self.section = recorder, section
+        self.wall, self.cpu = time.perf_counter(), time.thread_time()
+
+    def stop(self) -> None:
+        self.recorder.record(self.section, time.perf_counter() - self.wall, time.thread_time() - self.cpu)
+
+
+class PerfRecorder:
+    """
+    运行期性能计数：按区段 (阶段、插件 execute、LLM 任务类型、检索、输出等) 记录墙钟 / CPU 时间、
+    调用次数、prompt / 响应字符数与错误 / 重试次数。每个 tick 结束时由 tick_rows 输出一组汇总行并清零，
+    LLM 延迟另外累计到按任务类型的对数分桶直方图中。
+    """
+
+    def __init__(self):
+        self._tick: Dict[str, Dict[str, Any]] = {}
+        self.histograms: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.totals: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    def _section(self, section: str) -> Dict[str, Any]:
+        stats = self._tick.get(section)
+        if stats is None:
+            stats = self._tick[section] = {"wall": [], "cpu": 0.0, "prompt_chars": 0, "response_chars": 0,
+                                           "invalid_json": 0, "errors": 0, "retries": 0}
+        return stats
+
+    def record(self, section: str, wall: float, cpu: float = 0.0, **counters) -> None:
+        stats = self._section(section)
+        stats["wall"].append(wall)
+        stats["cpu"] += cpu
+        for name, value in counters.items():
+            stats[name] += value
+
+    def count(self, section: str, **counters) -> None:
+        """只累加计数 (如重试)，不计入调用次数"""
+        stats = self._section(section)
+        for name, value in counters.items():
+            stats[name] += value
+
+    async def measure(self, section: str, awaitable: Awaitable[Any], inclusive: bool = False) -> Any:
+        """
+        计时一个可等待对象。默认只计它自身运行时的 CPU (并发的单个 Agent / 单次调用)；
+        inclusive=True 时取整段线程 CPU 差值，用于彼此串行、内部再 gather 出多个任务的阶段。
+        """
+        if inclusive:
+            timer = self.start(section)
+            try:
+                return await awaitable
+            finally:
+                timer.stop()
+        meter = _CpuMeter(awaitable)
+        start = time.perf_counter()
+        try:
+            return await meter
+        finally:
+            self.record(section, time.perf_counter() - start, meter.cpu)
+
+    def start(self, section: str) -> "_Timer":
+        """开始计时一段跨越多条语句 (可含 await) 的代码，调用返回值的 stop() 结束"""
+        return _Timer(self, section)
+
+    @contextmanager
+    def span(self, section: str):
+        """同步代码段计时"""
+        timer = self.start(section)
+        try:
+            yield
+        finally:
+            timer.stop()
+
+    def tick_rows(self, tick: int) -> List[List[Any]]:
+        rows = []
+        for section, stats in sorted(self._tick.items()):
+            wall = np.asarray(stats["wall"])
+            if section.startswith("llm:") and len(wall):
+                self.histograms[section[4:]].add(wall)
+            chars = stats["prompt_chars"] + stats["response_chars"]
+            rows.append([tick, section, len(wall), round(float(wall.sum()), 6),
+                         round(float(wall.mean()), 6) if len(wall) else 0.0,
+                         round(float(np.percentile(wall, 50)), 6) if len(wall) else 0.0,
+                         round(float(np.percentile(wall, 95)), 6) if len(wall) else 0.0,
+                         round(float(wall.max()), 6) if len(wall) else 0.0,
+                         round(stats["cpu"], 6), stats["prompt_chars"], stats["response_chars"],
+                         estimate_tokens(chars), stats["invalid_json"], stats["errors"], stats["retries"]])
+            total = self.totals[section]
+            total["calls"] += len(wall)
+            total["wall"] += float(wall.sum())
+            total["cpu"] += stats["cpu"]
+            total["errors"] += stats["errors"]
+            total["retries"] += stats["retries"]
+        self._tick = {}
+        return rows
+
+    def summary(self, top: int = 12) -> str:
+        lines = [f"{'区段':<36} {'次数':>7} {'墙钟(s)':>9} {'CPU(s)':>8} {'错误':>5} {'重试':>5}"]
+        for section, total in sorted(self.totals.items(), key=lambda kv: -kv[1]["wall"])[:top]:
+            lines.append(f"{section:<36} {int(total['calls']):>7} {total['wall']:>9.2f} {total['cpu']:>8.2f} "
+                         f"{int(total['errors']):>5} {int(total['retries']):>5}")
+        for task, hist in sorted(self.histograms.items()):
+            lines.append(f"LLM[{task}] 延迟 p50≤{hist.quantile(0.5):.3f}s p95≤{hist.quantile(0.95):.3f}s "
+                         f"p99≤{hist.quantile(0.99):.3f}s ({hist.count} 次)")
+        return "\n".join(lines)
+
+
+def estimate_tokens(chars: int) -> int:
+    """粗略 token 估计 (约 4 个字符一个 token)，provider 不返回用量时用于比较各阶段的相对开销"""
+    return (chars + 3) // 4
+
+
+class TickProfiler:
+    """
+    在指定 tick 区间 [start, end] 内开启采样 / 确定性剖析，结束后保存结果并打印热点。
+    backend: cprofile (标准库，输出 .prof，可用 snakeviz 等查看) 或 pyinstrument (需额外安装，输出 .html)。
+    """
+
+    def __init__(self, start: int, end: int, out_stem: str, backend: str = "cprofile"):
+        self.start, self.end = start, end
+        self.out_stem = out_stem
+        self.backend = backend
+        self._profiler = None
+
+    def on_tick_start(self, tick: int) -> None:
+        if tick != self.start or self._profiler is not None:
+            return
+        if self.backend == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+                self._profiler = Profiler(async_mode="enabled")
+            except ImportError:
+                print("⚠️ 未安装 pyinstrument，改用 cProfile")
+                self.backend = "cprofile"
+        if self._profiler is None:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._profiler.start()
+        print(f"🔬 剖析开始: Tick {self.start}-{self.end} ({self.backend})")
+
+    def on_tick_end(self, tick: int) -> Optional[str]:
+        if self._profiler is None or tick != self.end:
+            return None
+        return self.stop()
+
+    def stop(self) -> Optional[str]:
+        if self._profiler is None:
+            return None
+        profiler, self._profiler = self._profiler, None
+        suffix = f"_ticks{self.start}-{self.end}"
+        if self.backend == "pyinstrument":
+            profiler.stop()
+            path = f"{self.out_stem}{suffix}.html"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+        else:
+            import pstats
+            profiler.disable()
+            path = f"{self.out_stem}{suffix}.prof"
+            profiler.dump_stats(path)
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+        print(f"🔬 剖析结果已保存至: {os.path.basename(path)}")
+        return path
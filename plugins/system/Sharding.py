@@ -0,0 +1,128 @@
+import csv
+import heapq
+import multiprocessing as mp
+import os
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+
+
+def shard_path(path: str, shard_id: int) -> str:
+    """在文件名主干后加分片后缀：cache/emb.npz -> cache/emb_shard0.npz (目录同理)"""
+    if not path:
+        return path
+    head, base = os.path.split(path)
+    stem, dot, rest = base.partition(".")
+    return os.path.join(head, f"{stem}_shard{shard_id}{dot}{rest}")
+
+
+class ShardWorker:
+    """
+    分片进程一侧的上下文：持有全体 Agent 的下标编号、边数组与分区结果，
+    只初始化并执行本分片的 Agent；每个 tick 结束时在屏障处与协调进程交换
+    宏观指标部分和以及跨分片广播。
+    """
+
+    def __init__(self, shard_id: int, num_shards: int, conn, agent_ids: List[str], parts: np.ndarray,
+                 src: np.ndarray, dst: np.ndarray, timestamp: str):
+        self.shard_id = shard_id
+        self.num_shards = num_shards
+        self.conn = conn
+        self.agent_ids = agent_ids
+        self.parts = parts
+        self.src = src
+        self.dst = dst
+        self.timestamp = timestamp
+        self.local_ids = {a for a, p in zip(agent_ids, parts.tolist()) if p == shard_id}
+
+    @property
+    def suffix(self) -> str:
+        return f"_shard{self.shard_id}"
+
+    def path(self, path: str) -> str:
+        return shard_path(path, self.shard_id)
+
+    def barrier(self, tick: int, partials: Dict[str, float], net_plugin) -> None:
+        """tick 屏障：上报本分片部分和与外发广播，取回其他分片发给本分片的广播"""
+        self.conn.send(("tick", tick, partials, net_plugin.outgoing_remote()))
+        _, records = self.conn.recv()
+        net_plugin.receive_remote(records)
+
+    def finish(self, outputs: Dict[str, str]) -> None:
+        self.conn.send(("done", outputs))
+        self.conn.close()
+
+
+class ShardCoordinator:
+    """
+    协调进程：启动各分片进程，在每个 tick 屏障处收齐所有分片的消息，
+    回调 on_tick 合并宏观指标，并按目标分片批量转发跨分片广播。
+    """
+
+    def __init__(self, target: Callable, shard_args: Sequence[tuple]):
+        self.target = target
+        self.shard_args = shard_args
+        self.processes: List[Any] = []
+        self.conns: List[Any] = []
+
+    def start(self) -> None:
+        # spawn：各分片进程独立导入插件与模型客户端，不继承父进程的事件循环
+        ctx = mp.get_context("spawn")
+        for shard_id, args in enumerate(self.shard_args):
+            parent, child = ctx.Pipe()
+            process = ctx.Process(target=self.target, args=(*args, child), name=f"shard-{shard_id}")
+            process.start()
+            child.close()
+            self.processes.append(process)
+            self.conns.append(parent)
+
+    def _recv(self, shard_id: int):
+        try:
+            return self.conns[shard_id].recv()
+        except EOFError:
+            self.terminate()
+            raise RuntimeError(f"分片 {shard_id} 异常退出 (exitcode={self.processes[shard_id].exitcode})")
+
+    def run(self, on_tick: Callable[[int, List[Dict[str, float]]], None]) -> List[Dict[str, str]]:
+        """驱动所有分片直到结束，返回各分片上报的输出文件路径"""
+        while True:
+            messages = [self._recv(k) for k in range(len(self.conns))]
+            if all(m[0] == "done" for m in messages):
+                self.join()
+                return [m[1] for m in messages]
+            if any(m[0] != "tick" or m[1] != messages[0][1] for m in messages):
+                self.terminate()
+                raise RuntimeError(f"分片进度不一致: {[m[:2] for m in messages]}")
+
+            tick = messages[0][1]
+            on_tick(tick, [m[2] for m in messages])
+            # 跨分片广播：按目标分片汇总 (来源分片顺序固定)，每个分片每 tick 只收一次
+            for k, conn in enumerate(self.conns):
+                conn.send(("deliver", [r for m in messages for r in m[3].get(k, [])]))
+
+    def join(self) -> None:
+        for process in self.processes:
+            process.join()
+
+    def terminate(self) -> None:
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+
+
+def merge_tick_logs(paths: Sequence[str], out_path: str, agent_rank: Dict[str, int]) -> None:
+    """
+    把各分片按 (Tick, Agent 顺序) 写出的 CSV 归并为一个文件，行序与单进程运行一致。
+    各分片文件本身已按该键有序，因此只需流式多路归并。
+    """
+    files = [open(p, "r", newline="", encoding="utf-8") for p in paths]
+    try:
+        readers = [csv.reader(f) for f in files]
+        headers = [next(r, None) for r in readers]
+        with open(out_path, "w", newline="", encoding="utf-8") as out:
+            writer = csv.writer(out)
+            writer.writerow(next(h for h in headers if h))
+            writer.writerows(heapq.merge(*readers, key=lambda row: (int(row[0]), agent_rank.get(row[1], -1))))
+    finally:
+        for f in files:
+            f.close()
@@ -0,0 +1,238 @@
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from plugins.agent.state.PopulationStore import ACTION_CODES
+
+# 信任值域 [0, 10]，日志精度 0.01 -> 1001 个定宽桶
+TRUST_RESOLUTION = 100
+TRUST_BINS = 10 * TRUST_RESOLUTION + 1
+DEFAULT_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+def live_metrics_path(results_dir: str, timestamp: str) -> str:
+    return os.path.join(results_dir, f"live_metrics_{timestamp}.json")
+
+
+def encode_groups(labels: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+    """分组标签 -> (组名列表, 每个 Agent 的组编号)，每次运行只需编码一次"""
+    names, codes = np.unique(np.asarray(labels, dtype=object).astype(str), return_inverse=True)
+    return names.tolist(), codes.astype(np.int64)
+
+
+class TrustSketch:
+    """
+    信任分布的分位数草图：值域有界且精度固定 (0.01)，因此用定宽直方图即可精确表示。
+    合并只需逐桶相加，任意顺序合并分片 / 重复实验的草图，结果与在全部数据上直接构建完全一致。
+    """
+
+    def __init__(self, counts: Optional[np.ndarray] = None):
+        self.counts = np.zeros(TRUST_BINS, dtype=np.int64) if counts is None else counts
+
+    @staticmethod
+    def bins(values: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint(np.asarray(values, dtype=np.float64) * TRUST_RESOLUTION), 0, TRUST_BINS - 1).astype(np.int64)
+
+    def add(self, values: np.ndarray) -> "TrustSketch":
+        self.counts += np.bincount(self.bins(values), minlength=TRUST_BINS)
+        return self
+
+    def merge(self, other: "TrustSketch") -> "TrustSketch":
+        self.counts += other.counts
+        return self
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def mean(self) -> float:
+        n = self.count
+        return float(self.counts @ np.arange(TRUST_BINS)) / n / TRUST_RESOLUTION if n else float("nan")
+
+    def quantile(self, q: float) -> float:
+        """最近秩 (nearest-rank) 分位数"""
+        n = self.count
+        if n == 0:
+            return float("nan")
+        rank = max(1, int(np.ceil(q * n)))
+        return float(np.searchsorted(np.cumsum(self.counts), rank)) / TRUST_RESOLUTION
+
+    def to_dict(self) -> Dict[str, List[int]]:
+        nz = np.flatnonzero(self.counts)
+        return {"bins": nz.tolist(), "counts": self.counts[nz].tolist()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, List[int]]) -> "TrustSketch":
+        counts = np.zeros(TRUST_BINS, dtype=np.int64)
+        counts[np.asarray(data["bins"], dtype=np.int64)] = data["counts"]
+        return cls(counts)
+
+
+class GroupStats:
+    """单个分组 (某个 cluster_type 或 social_role) 在一个 tick 内的可合并统计量"""
+    COUNTERS = ("agents", "hypocrisy", "buys", "posts")
+
+    def __init__(self):
+        self.sketch = TrustSketch()
+        self.agents = self.hypocrisy = self.buys = self.posts = 0
+
+    def merge(self, other: "GroupStats") -> "GroupStats":
+        self.sketch.merge(other.sketch)
+        for name in self.COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        return self
+
+    def summary(self, quantiles: Sequence[float]) -> Dict[str, Any]:
+        out = {"agents": self.agents, "mean": round(self.sketch.mean(), 4)}
+        out.update({f"p{int(q * 100)}": self.sketch.quantile(q) for q in quantiles})
+        out["hypocrisy_rate"] = round(self.hypocrisy / self.agents, 4) if self.agents else 0.0
+        out["buys"] = self.buys
+        out["posts"] = self.posts
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {name: getattr(self, name) for name in self.COUNTERS}
+        out["sketch"] = self.sketch.to_dict()
+        return out
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GroupStats":
+        stats = cls()
+        for name in cls.COUNTERS:
+            setattr(stats, name, data[name])
+        stats.sketch = TrustSketch.from_dict(data["sketch"])
+        return stats
+
+
+class TickMetrics:
+    """
+    一个 tick 的分组指标 {维度: {组名: GroupStats}}，维度为 cluster_type / social_role。
+    分片运行时各分片各算一份 (随 tick_partials 上报)，由协调进程 merge 成全体结果。
+    """
+
+    def __init__(self, tick: int):
+        self.tick = tick
+        self.groups: Dict[str, Dict[str, GroupStats]] = {}
+
+    def add_population(self, groupings: Dict[str, Tuple[List[str], np.ndarray]], trust: np.ndarray,
+                       hypocrisy: np.ndarray, actions: np.ndarray) -> "TickMetrics":
+        """groupings: {维度: encode_groups 的结果}；其余参数为按 Agent 顺序排列的列"""
+        bins = TrustSketch.bins(trust)
+        hypocrisy = np.asarray(hypocrisy, dtype=bool)
+        buys = actions == ACTION_CODES["buy"]
+        posts = actions == ACTION_CODES["post_review"]
+        for dim, (names, codes) in groupings.items():
+            g = len(names)
+            # 二维 bincount：一次得到所有组的直方图
+            hist = np.bincount(codes * TRUST_BINS + bins, minlength=g * TRUST_BINS).reshape(g, TRUST_BINS)
+            agents = np.bincount(codes, minlength=g)
+            hyp = np.bincount(codes, weights=hypocrisy, minlength=g)
+            buy = np.bincount(codes, weights=buys, minlength=g)
+            post = np.bincount(codes, weights=posts, minlength=g)
+            groups = self.groups.setdefault(dim, {})
+            for k, name in enumerate(names):
+                stats = GroupStats()
+                stats.sketch = TrustSketch(hist[k].astype(np.int64))
+                stats.agents, stats.hypocrisy = int(agents[k]), int(hyp[k])
+                stats.buys, stats.posts = int(buy[k]), int(post[k])
+                if name in groups:
+                    groups[name].merge(stats)
+                else:
+                    groups[name] = stats
+        return self
+
+    def merge(self, other: "TickMetrics") -> "TickMetrics":
+        for dim, groups in other.groups.items():
+            mine = self.groups.setdefault(dim, {})
+            for name, stats in groups.items():
+                if name in mine:
+                    mine[name].merge(stats)
+                else:
+                    mine[name] = GroupStats().merge(stats)
+        return self
+
+    @classmethod
+    def merged(cls, tick: int, parts: Iterable["TickMetrics"]) -> "TickMetrics":
+        out = cls(tick)
+        for part in parts:
+            out.merge(part)
+        return out
+
+    def summary(self, quantiles: Sequence[float]) -> Dict[str, Dict[str, Any]]:
+        return {dim: {name: stats.summary(quantiles) for name, stats in sorted(groups.items())}
+                for dim, groups in self.groups.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"tick": self.tick,
+                "groups": {dim: {name: s.to_dict() for name, s in groups.items()} for dim, groups in self.groups.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TickMetrics":
+        out = cls(data["tick"])
+        out.groups = {dim: {name: GroupStats.from_dict(s) for name, s in groups.items()}
+                      for dim, groups in data["groups"].items()}
+        return out
+
+
+class MetricsAggregator:
+    """
+    运行期宏观指标聚合：每个 tick 接收合并后的宏观指标 (merge_partials) 与分组指标，
+    做 T50 检测 (累计转化率首次达到阈值的 tick)，生成实时指标快照。
+    快照只含当前 tick，完整的逐 tick 序列见 macro_metrics 日志；检查点只需保存 T50。
+    """
+
+    def __init__(self, quantiles: Sequence[float] = DEFAULT_QUANTILES, t50_threshold: float = 0.5):
+        self.quantiles = tuple(quantiles)
+        self.t50_threshold = t50_threshold
+        self.t50: Optional[int] = None
+
+    def update(self, tick: int, kpi: Dict[str, float], tick_metrics: TickMetrics) -> Dict[str, Any]:
+        if self.t50 is None and kpi["conversion_rate"] >= self.t50_threshold:
+            self.t50 = tick
+            print(f"🎯 T50 达成: Tick {tick} 累计转化率 {kpi['conversion_rate'] * 100:.1f}%")
+        return {
+            "tick": tick,
+            "t50": self.t50,
+            "overall": dict(kpi),
+            "groups": tick_metrics.summary(self.quantiles),
+            "sketches": tick_metrics.to_dict(),
+        }
+
+    def checkpoint_state(self) -> Dict[str, Any]:
+        return {"t50": self.t50}
+
+    def restore_checkpoint(self, snapshot: Dict[str, Any]):
+        self.t50 = snapshot["t50"]
+
+
+class LiveMetricsFile:
+    """
+    实时指标文件：每次写入都原子替换为最新快照 (紧凑 JSON)，长时间运行中可随时轮询读取。
+    提供 writerows / flush / close，可直接注册为 OutputPipeline 的输出流。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def writerows(self, snapshots) -> None:
+        snapshot = list(snapshots)[-1]
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    def writerow(self, snapshot) -> None:
+        self.writerows([snapshot])
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def load_live_metrics(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
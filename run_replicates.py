@@ -0,0 +1,226 @@
+"""
+Monte Carlo 重复实验：同一场景以不同随机种子运行 R 次 (进程池并行)，
+把每次运行的宏观指标流式追加到合并长表，并按 tick 报告 AvgTrust / ConversionRate 的均值与 95% 置信区间。
+当两项指标在所有 tick 上的置信区间宽度都低于目标值时停止追加新的重复实验。
+各次运行最后一个 tick 的分组信任草图精确合并为全体重复实验的分位数 (pooled_metrics.json)，并汇总各次的 T50。
+
+LLM 限流额度在所有并行的重复实验之间共享：并行数不超过额度，
+每个重复实验的阶段并发上限为 额度 // 并行数。
+并行的重复实验互不共享可写的缓存：LLM 响应缓存按重复实验编号分文件，mmap 记忆库按运行标签分目录，
+共享的嵌入缓存只读取、不写回。
+
+用法:
+    python run_replicates.py --max-replicates 20 --min-replicates 5 --trust-width 0.2 --conversion-width 0.05
+    python run_replicates.py --workers 4 --llm-budget 32 --plot
+"""
+import argparse
+import contextlib
+import csv
+import datetime
+import json
+import multiprocessing as mp
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import yaml
+
+from plugins.system.StreamingMetrics import TickMetrics, load_live_metrics, live_metrics_path
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# 双侧 95% t 分布临界值 (自由度 1..30)，更大的自由度用正态近似
+_T95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+
+def t_critical(df: int) -> float:
+    return _T95[df - 1] if df <= len(_T95) else 1.96
+
+
+def run_replicate(replicate: int, seed: int, max_concurrency: int, tag: str, log_path: str) -> str:
+    """进程池任务：运行一次完整仿真 (跳过后置分析)，输出写入日志文件，返回 macro_metrics 路径"""
+    import asyncio
+    with open(log_path, "w", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+        from run_simulation import run
+        return asyncio.run(run(max_concurrency=max_concurrency, seed=seed, tag=tag, analyze=False, replicate=replicate))
+
+
+class ReplicateStore:
+    """
+    重复实验的合并存储：各次运行的宏观指标按行追加到一个长表 CSV (Replicate/Seed 列区分)，
+    同时在内存中保留 AvgTrust / ConversionRate 的逐 tick 序列，用于计算置信区间。
+    """
+    METRICS = ("AvgTrust", "ConversionRate")
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(["Replicate", "Seed", "Tick", "AvgTrust", "NewBuys", "CumulativeBuys",
+                               "ConversionRate", "PostCount"])
+        self.series = {metric: {} for metric in self.METRICS}
+        self.pooled = None
+        self.t50 = {}
+
+    def __len__(self):
+        return len(self.series[self.METRICS[0]])
+
+    def add(self, replicate: int, seed: int, macro_path: str, live_path: str = None) -> None:
+        with open(macro_path, "r", newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        for row in rows:
+            self._writer.writerow([replicate, seed, row["Tick"], row["AvgTrust"], row["NewBuys"],
+                                   row["CumulativeBuys"], row["ConversionRate"], row["PostCount"]])
+        self._file.flush()
+        for metric in self.METRICS:
+            self.series[metric][replicate] = np.array([float(row[metric]) for row in rows])
+        if live_path and os.path.exists(live_path):
+            live = load_live_metrics(live_path)
+            self.t50[replicate] = live["t50"]
+            final = TickMetrics.from_dict(live["sketches"])
+            self.pooled = final if self.pooled is None else self.pooled.merge(final)
+
+    def write_pooled(self, path: str, quantiles=(0.1, 0.25, 0.5, 0.75, 0.9)) -> None:
+        """全体重复实验最后一个 tick 的分组指标 (草图逐桶相加，与合并原始数据后直接计算一致) 与各次 T50"""
+        reached = [t for t in self.t50.values() if t is not None]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"replicates": len(self.t50),
+                       "t50": {"per_replicate": {str(r): t for r, t in sorted(self.t50.items())},
+                               "reached": len(reached),
+                               "mean": float(np.mean(reached)) if reached else None},
+                       "groups": self.pooled.summary(quantiles) if self.pooled else {}},
+                      f, ensure_ascii=False, indent=2)
+
+    def bands(self, metric: str):
+        """逐 tick 的 (均值, 下界, 上界)；不足两次运行时区间为空"""
+        runs = list(self.series[metric].values())
+        ticks = min(len(r) for r in runs)
+        matrix = np.vstack([r[:ticks] for r in runs])
+        n = len(matrix)
+        mean = matrix.mean(axis=0)
+        if n < 2:
+            return mean, np.full(ticks, np.nan), np.full(ticks, np.nan)
+        half = t_critical(n - 1) * matrix.std(axis=0, ddof=1) / np.sqrt(n)
+        return mean, mean - half, mean + half
+
+    def max_width(self, metric: str) -> float:
+        _, lower, upper = self.bands(metric)
+        return float(np.max(upper - lower)) if len(self) >= 2 else float("inf")
+
+    def write_summary(self, path: str) -> None:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Tick", "Metric", "Mean", "Lower", "Upper", "Replicates"])
+            for metric in self.METRICS:
+                mean, lower, upper = self.bands(metric)
+                for i in range(len(mean)):
+                    writer.writerow([i + 1, metric, mean[i], lower[i], upper[i], len(self)])
+
+    def plot(self, path: str) -> None:
+        import matplotlib.pyplot as plt
+        fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+        for ax, metric in zip(axes, self.METRICS):
+            mean, lower, upper = self.bands(metric)
+            ticks = np.arange(1, len(mean) + 1)
+            ax.plot(ticks, mean, marker="o", linewidth=2, label=f"Mean (n={len(self)})")
+            ax.fill_between(ticks, lower, upper, alpha=0.25, label="95% CI")
+            ax.set_title(metric)
+            ax.set_xlabel("Tick")
+            ax.grid(True, linestyle="--", alpha=0.6)
+            ax.legend()
+        plt.tight_layout()
+        plt.savefig(path, dpi=200)
+        plt.close(fig)
+
+    def close(self):
+        self._file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo 重复实验与置信区间汇总")
+    parser.add_argument("--max-replicates", type=int, default=20, help="最多运行的重复实验次数")
+    parser.add_argument("--min-replicates", type=int, default=3, help="判断收敛前至少完成的次数")
+    parser.add_argument("--trust-width", type=float, default=0.2, help="AvgTrust 置信区间宽度目标")
+    parser.add_argument("--conversion-width", type=float, default=0.05, help="ConversionRate 置信区间宽度目标")
+    parser.add_argument("--seed", type=int, default=None, help="起始种子 (第 r 次运行使用 seed + r)")
+    parser.add_argument("--workers", type=int, default=None, help="并行进程数上限 (默认 CPU 核数)")
+    parser.add_argument("--llm-budget", type=int, default=None,
+                        help="所有并行运行共享的 LLM 并发额度 (默认 concurrency.max_concurrency)")
+    parser.add_argument("--plot", action="store_true", help="输出带置信带的折线图")
+    args = parser.parse_args()
+
+    with open(os.path.join(current_dir, "configs/runtime_config.yaml"), "r", encoding="utf-8") as f:
+        runtime_conf = yaml.safe_load(f) or {}
+    budget = args.llm_budget or runtime_conf.get("concurrency", {}).get("max_concurrency", 8)
+    workers = max(1, min(args.workers or os.cpu_count() or 1, args.max_replicates, budget))
+    per_replicate = max(1, budget // workers)
+    base_seed = args.seed if args.seed is not None else (runtime_conf.get("network", {}).get("seed") or 0)
+
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    out_dir = os.path.join(current_dir, "results", f"replicates_{timestamp}")
+    os.makedirs(out_dir, exist_ok=True)
+    store = ReplicateStore(os.path.join(out_dir, "combined_macro.csv"))
+    print(f"🎲 重复实验: 最多 {args.max_replicates} 次, 并行 {workers} 个进程, 每个运行并发上限 {per_replicate}")
+    print(f"📂 输出目录: {out_dir}")
+
+    pending = {}
+    next_replicate = 0
+    converged = False
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+        def submit():
+            nonlocal next_replicate
+            r, seed = next_replicate, base_seed + next_replicate
+            tag = f"{timestamp}_rep{r:03d}"
+            log_path = os.path.join(out_dir, f"replicate_{r:03d}.log")
+            pending[pool.submit(run_replicate, r, seed, per_replicate, tag, log_path)] = (r, seed, tag)
+            next_replicate += 1
+
+        while next_replicate < min(workers, args.max_replicates):
+            submit()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                r, seed, tag = pending.pop(future)
+                try:
+                    macro_path = future.result()
+                except Exception as e:
+                    print(f"❌ 第 {r} 次运行失败 (seed={seed}): {e}")
+                    continue
+                store.add(r, seed, macro_path, live_metrics_path(os.path.dirname(macro_path), tag))
+                trust_w = store.max_width("AvgTrust")
+                conv_w = store.max_width("ConversionRate")
+                print(f"✅ 第 {r} 次运行完成 (seed={seed}) | 已完成 {len(store)} 次 | "
+                      f"CI 宽度 AvgTrust {trust_w:.3f} / ConversionRate {conv_w:.3f}")
+
+            if (not converged and len(store) >= args.min_replicates
+                    and store.max_width("AvgTrust") <= args.trust_width
+                    and store.max_width("ConversionRate") <= args.conversion_width):
+                converged = True
+                print(f"🎯 置信区间已收敛，不再追加新的运行 (等待 {len(pending)} 个进行中的运行)")
+            while not converged and len(pending) < workers and next_replicate < args.max_replicates:
+                submit()
+
+    store.close()
+    if len(store) == 0:
+        print("❌ 没有成功完成的运行")
+        return
+
+    summary_path = os.path.join(out_dir, "ci_summary.csv")
+    store.write_summary(summary_path)
+    print(f"📊 合并指标: {store.path}")
+    print(f"📊 置信区间汇总: {summary_path} ({len(store)} 次运行, {'已收敛' if converged else '未达到目标宽度'})")
+    pooled_path = os.path.join(out_dir, "pooled_metrics.json")
+    store.write_pooled(pooled_path, runtime_conf.get("metrics", {}).get("quantiles", (0.1, 0.25, 0.5, 0.75, 0.9)))
+    print(f"📊 合并分组指标与 T50: {pooled_path}")
+    if args.plot:
+        plot_path = os.path.join(out_dir, "ci_bands.png")
+        store.plot(plot_path)
+        print(f"🖼️ 置信带图已保存至: {plot_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,19 @@
 import sys
 import os
 import asyncio
+import argparse
+import random
 import yaml
 import json
 import csv
 import datetime
 import numpy as np
-import networkx as nx
 import logging
-import matplotlib.pyplot as plt
-import matplotlib
-import pandas as pd
 
 # === 强制屏蔽 Agent-Kernel 底层 INFO 日志 ===
 logging.getLogger("agentkernel_standalone").setLevel(logging.WARNING)
 logging.getLogger("httpx").setLevel(logging.WARNING)
 
-# 绘图字体防乱码设置 (兼容中英文)
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial']
-plt.rcParams['axes.unicode_minus'] = False
-
 # --- 1. 环境与路径设置 ---
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, "../../"))
@@ -46,11 +40,35 @@ sys.path.append(current_dir)
 try:
     from plugins.agent.profile.GreenProfilePlugin import GreenProfilePlugin
     from plugins.agent.state.GreenStatePlugin import GreenStatePlugin
+    from plugins.agent.state.PopulationStore import PopulationStore, plan_action, merge_partials
     from plugins.agent.perceive.GreenPerceivePlugin import GreenPerceivePlugin
     from plugins.agent.reflect.GreenCognitionPlugin import GreenCognitionPlugin
     from plugins.agent.plan.ConsumerPlanPlugin import ConsumerPlanPlugin
     from plugins.agent.invoke.GreenInvokePlugin import GreenInvokePlugin
     from plugins.environment.network.SocialNetworkPlugin import SocialNetworkPlugin
+    from plugins.environment.network.Mailbox import Message
+    from plugins.system.PhaseExecutor import PhaseExecutor
+    from plugins.system.GraphPartitioner import partition_graph, cut_edges
+    from plugins.system.Sharding import ShardWorker, ShardCoordinator, merge_tick_logs
+    from plugins.system.Checkpoint import CheckpointStore, latest_run_dir
+    from plugins.system.OutputPipeline import OutputPipeline
+    from plugins.system.StreamingMetrics import (MetricsAggregator, TickMetrics, LiveMetricsFile, encode_groups,
+                                                 live_metrics_path)
+    from plugins.system.CascadeAnalyzer import (load_graph_arrays, reconstruct_cascades, cascade_statistics,
+                                                summarize as summarize_cascades)
+    from plugins.system.ColumnarLog import (ColumnarLogWriter, SIMULATION_LOG_SCHEMA, THOUGHTS_LOG_SCHEMA,
+                                            COLUMNAR_SUFFIX, load_log)
+    from plugins.environment.network.TopologyGenerator import load_or_generate, to_csr, save_graph_json
+    from plugins.model.BatchScheduler import BatchScheduler
+    from plugins.model.ResponseCache import ResponseCache
+    from plugins.model.CassetteRouter import CassetteRouter
+    from plugins.model.InstrumentedRouter import InstrumentedRouter
+    from plugins.model.ChatCompletionsClient import ChatCompletionsClient
+    from plugins.system.Profiler import PerfRecorder, TickProfiler, PERF_HEADER
+    from plugins.agent.reflect.EmbeddingProvider import build_provider, set_default_provider
+    from plugins.agent.reflect.MemoryArena import MemoryArena
+    from plugins.agent.reflect.MmapMemoryStore import MmapMemoryStore
+    from plugins.agent.reflect.MemoryPolicy import MemoryPolicy, set_default_policy
 except ImportError as e:
     print(f"❌ 插件缺失: {e}")
     sys.exit(1)
@@ -82,37 +100,220 @@ def mount_env_component(env, comp, name):
         env._components[name] = comp
 
 
-async def run():
+MACRO_HEADER = ["Tick", "AvgTrust", "NewBuys", "CumulativeBuys", "ConversionRate", "PostCount"]
+
+
+def write_macro_row(macro_writer, tick, kpi):
+    avg_trust = kpi["avg_trust"]
+    conversion_rate = kpi["conversion_rate"]
+    tick_posts = kpi["posts"]
+    macro_writer.writerow([tick, avg_trust, kpi["new_buys"], kpi["cumulative_buys"], conversion_rate, tick_posts])
+    print(
+        f"平均信任 {avg_trust:.2f} | 累计转化率 {conversion_rate * 100:.1f}% | 本期发帖 {tick_posts} 人")
+
+
+def open_csv_log(path, header, offset=None):
+    """新建日志并写表头；offset 非空时 (断点恢复) 先截断到检查点时的长度，再继续追加"""
+    if offset is None:
+        f = open(path, "w", newline="", encoding="utf-8")
+        writer = csv.writer(f)
+        writer.writerow(header)
+    else:
+        os.truncate(path, offset)
+        f = open(path, "a", newline="", encoding="utf-8")
+        writer = csv.writer(f)
+    return f, writer
+
+
+def open_result_log(path_stem, schema, fmt="csv", offset=None):
+    """
+    逐 Agent 结果日志：fmt 为 csv 时写 path_stem.csv；为 columnar 时写列式目录 path_stem.columnar
+    (见 ColumnarLogWriter，检查点偏移量为最后写出的 tick)。返回 (可 flush/tell/close 的对象, writer, 路径)
+    """
+    if fmt == "columnar":
+        log = ColumnarLogWriter(path_stem + COLUMNAR_SUFFIX, schema, resume_tick=offset)
+        return log, log, log.path
+    path = path_stem + ".csv"
+    f, writer = open_csv_log(path, [name for name, _ in schema], offset)
+    return f, writer, path
+
+
+def save_checkpoint(store, tick, timestamp, agents, population, net_plugin, cassette, files, log_format="csv",
+                    metrics=None):
+    """
+    写入 tick 边界检查点：每个 Agent、网络与随机数状态各为一个内容寻址片段，未变化的片段不重复写入；
+    记忆流与每 tick 都变化的状态字典分开，按记录增量存储 (只写入上次检查点之后新增的记忆)
+    """
+    network = net_plugin.checkpoint_state()
+    snapshots = {ag.agent_id: ag.get_component("state")._plugin.checkpoint_state() for ag in agents}
+    memory_refs, memory_chunks = store.put_records({agent_id: snap.pop("memories")
+                                                    for agent_id, snap in snapshots.items()})
+    objects = {
+        "agents": {agent_id: store.put(snap) for agent_id, snap in snapshots.items()},
+        "memories": store.put(memory_refs),
+        "memory_chunks": memory_chunks,
+        "edges": store.put(network.pop("edges")),
+        "network": store.put(network),
+        "population": store.put(population.checkpoint_state()),
+        "rng": store.put({"random": random.getstate(), "numpy": np.random.get_state()}),
+    }
+    if cassette:
+        objects["cassette"] = store.put(cassette.checkpoint_state())
+    if metrics:
+        objects["metrics"] = store.put(metrics.checkpoint_state())
+    offsets = {}
+    for name, f in files.items():
+        f.flush()
+        offsets[name] = f.tell()
+    store.save(tick, {"timestamp": timestamp, "format": log_format, "objects": objects, "offsets": offsets})
+    print(f"💾 检查点已保存: Tick {tick} -> {store.root}")
+
+
+def restore_checkpoint(store, manifest, agents, population, net_plugin, cassette, metrics=None):
+    objects = manifest["objects"]
+    population.restore_checkpoint(store.get(objects["population"]))
+    memory_refs = store.get(objects["memories"])
+    records = store.get_records(objects["memory_chunks"])
+    for ag in agents:
+        snap = store.get(objects["agents"][ag.agent_id])
+        snap["memories"] = [records[rid] for rid in memory_refs[ag.agent_id]]
+        ag.get_component("state")._plugin.restore_checkpoint(snap)
+    network = store.get(objects["network"])
+    network["edges"] = store.get(objects["edges"])
+    net_plugin.restore_checkpoint(network)
+    rng = store.get(objects["rng"])
+    random.setstate(rng["random"])
+    np.random.set_state(rng["numpy"])
+    if cassette and "cassette" in objects:
+        cassette.restore_checkpoint(store.get(objects["cassette"]))
+    if metrics and "metrics" in objects:
+        metrics.restore_checkpoint(store.get(objects["metrics"]))
+
+
+def load_runtime_config():
+    """读取 configs/runtime_config.yaml，缺失时返回空配置"""
+    path = os.path.join(current_dir, "configs/runtime_config.yaml")
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def agent_psychology(agent):
+    profile_plugin = agent.get_component("profile")._plugin
+    p_data = getattr(profile_plugin, "profile_data", getattr(profile_plugin, "_profile_data", {}))
+    return p_data.get("psychology", {})
+
+
+def agent_cluster_type(agent):
+    # 🚨 核心修复：将旧的 environmental_involvement 替换为最新的 cluster_type
+    return agent_psychology(agent).get("cluster_type", "Unknown")
+
+
+def agent_social_role(agent):
+    return agent_psychology(agent).get("social_role", "Unknown")
+
+
+def build_metrics_aggregator(runtime_conf):
+    metrics_conf = runtime_conf.get("metrics", {})
+    return MetricsAggregator(quantiles=metrics_conf.get("quantiles", [0.1, 0.25, 0.5, 0.75, 0.9]),
+                             t50_threshold=metrics_conf.get("t50_threshold", 0.5))
+
+
+async def batch_retrieve_memories(agents, memory_arena, tick, top_k=3):
+    """以每个 Agent 待处理的首条观察为查询，对全体做一次批量记忆检索，结果写入 state 供认知插件使用"""
+    requests, plugins = [], {}
+    for ag in agents:
+        s_plugin = ag.get_component("state")._plugin
+        observations = getattr(s_plugin, "state_data", {}).get("observations")
+        if observations:
+            requests.append((ag.agent_id, observations[0].get("content", "")))
+            plugins[ag.agent_id] = s_plugin
+
+    results = memory_arena.batch_retrieve(requests, tick, top_k=top_k)
+    for ag_id, query in requests:
+        await plugins[ag_id].set_state("retrieved_memories",
+                                       {"tick": tick, "query": query, "memories": results.get(ag_id, [])})
+
+
+async def run(max_concurrency=None, cassette_mode=None, cassette_path=None, shard=None,
+              seed=None, tag=None, analyze=True, checkpoint_every=None, resume=None, profile_ticks=None,
+              replicate=None):
+    """
+    单进程运行全部 Agent；shard 非空时作为分片进程运行 (见 run_sharded)：
+    只初始化本分片的 Agent，输出文件带分片后缀，宏观指标与跨分片广播在 tick 屏障处交给协调进程。
+    seed 覆盖拓扑种子并设置全局随机数种子 (分片进程使用 seed + 分片号)；tag 替代输出文件名中的时间戳 (并行重复实验互不覆盖)。
+    replicate 为重复实验编号 (见 run_replicates)：并行的重复实验各用独立的 LLM 响应缓存，共享的嵌入缓存只读不写。
+    每 checkpoint_every 个 tick 写一次检查点；resume 为检查点目录 (或 "latest") 时从最近的检查点继续，
+    输出文件截断到检查点时的长度后追加 (分片运行暂不支持检查点)。
+    profile_ticks 为 (起, 止) 时在该 tick 区间内开启剖析器 (见 TickProfiler)。
+    返回 macro_metrics 文件路径。
+    """
     print("🚀 [GABM] 绿色消费仿真启动...")
+    runtime_conf = load_runtime_config()
+    if seed is not None:
+        rng_seed = seed + shard.shard_id if shard else seed
+        random.seed(rng_seed)
+        np.random.seed(rng_seed)
+    local_path = shard.path if shard else (lambda path: path)
+    suffix = shard.suffix if shard else ""
+
+    # 并发阶段执行器：命令行参数优先，其次读取配置
+    if max_concurrency is None:
+        max_concurrency = runtime_conf.get("concurrency", {}).get("max_concurrency", 8)
+    executor = PhaseExecutor(max_concurrency)
+    print(f"⚡ 阶段并发上限: {executor.max_concurrency}")
+
+    # --- 检查点 ---
+    ckpt_conf = runtime_conf.get("checkpoint", {})
+    ckpt_root = os.path.join(current_dir, ckpt_conf.get("dir", "checkpoints"))
+    if checkpoint_every is None:
+        checkpoint_every = ckpt_conf.get("every", 0)
+    checkpoint_store, manifest, start_tick = None, None, 0
+    if resume and not shard:
+        run_dir = latest_run_dir(ckpt_root) if resume == "latest" else resume
+        checkpoint_store = CheckpointStore(run_dir, keep=ckpt_conf.get("keep", 2)) if run_dir else None
+        if checkpoint_store and checkpoint_store.completed:
+            raise ValueError(f"该运行已完成，不能从其检查点恢复: {run_dir}")
+        latest = checkpoint_store.latest() if checkpoint_store else None
+        if latest is None:
+            raise FileNotFoundError(f"没有可恢复的检查点: {run_dir or ckpt_root}")
+        start_tick, manifest = latest
+        print(f"♻️ 从检查点恢复: {run_dir} (Tick {start_tick})")
+    offsets = manifest["offsets"] if manifest else {}
 
     # --- 准备日志文件 ---
     results_dir = os.path.join(current_dir, "results")
     os.makedirs(results_dir, exist_ok=True)
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-
-    # 1. 基础动作日志
-    csv_path = os.path.join(results_dir, f"simulation_log_{timestamp}.csv")
-    csv_file = open(csv_path, "w", newline="", encoding="utf-8")
-    writer = csv.writer(csv_file)
-    writer.writerow(["Tick", "AgentID", "Type", "TrustScore", "Action", "Thought_Hypocrisy"])
-
-    # 2. 详细思维日志
-    thought_path = os.path.join(results_dir, f"thoughts_log_{timestamp}.csv")
-    thought_file = open(thought_path, "w", newline="", encoding="utf-8")
-    thought_writer = csv.writer(thought_file)
-    thought_writer.writerow(["Tick", "AgentID", "AgentType", "Hypocrisy", "TrustChange", "Reasoning"])
-
-    # 3. 宏观 KPI 日志 (新引入的转化率收集流)
-    macro_path = os.path.join(results_dir, f"macro_metrics_{timestamp}.csv")
-    macro_file = open(macro_path, "w", newline="", encoding="utf-8")
-    macro_writer = csv.writer(macro_file)
-    macro_writer.writerow(["Tick", "AvgTrust", "NewBuys", "CumulativeBuys", "ConversionRate", "PostCount"])
-    print(f"📂 数据收集流管道已建立。")
+    if manifest:
+        timestamp = manifest["timestamp"]
+    else:
+        timestamp = shard.timestamp if shard else (tag or datetime.datetime.now().strftime("%Y%m%d_%H%M%S"))
+    if checkpoint_store is None and checkpoint_every and not shard:
+        checkpoint_store = CheckpointStore(os.path.join(ckpt_root, timestamp), keep=ckpt_conf.get("keep", 2))
+
+    # --- 嵌入后端 (需在 Agent 初始化前设置，所有 MemoryManager 共享) ---
+    emb_conf = runtime_conf.get("embedding", {})
+    emb_cache_path = emb_conf.get("cache_path")
+    embedder = build_provider(backend=emb_conf.get("backend", "hashing"),
+                              dim=emb_conf.get("dim", 384),
+                              model=emb_conf.get("model"),
+                              cache_path=local_path(os.path.join(current_dir, emb_cache_path)) if emb_cache_path else None,
+                              cache_size=emb_conf.get("cache_size", 20000))
+    set_default_provider(embedder)
+
+    # 记忆容量策略：限制每个 Agent 的记忆条数，超出时淘汰或折叠为摘要
+    memory_conf = runtime_conf.get("memory", {})
+    set_default_policy(MemoryPolicy(capacity=memory_conf.get("capacity", 0),
+                                    consolidate=memory_conf.get("consolidate", False),
+                                    consolidate_batch=memory_conf.get("consolidate_batch", 5)))
 
     # --- 初始化 ---
     builder = Builder(current_dir, resource_maps)
     builder._load_data_into_config()
     agent_configs = builder.config.agents
+    if shard:
+        agent_configs = [conf for conf in agent_configs if conf.id in shard.local_ids]
 
     env = Environment()
     net_plugin = SocialNetworkPlugin()
@@ -137,19 +338,57 @@ async def run():
 
     print(f"👥 初始化了 {len(agents)} 个 Agent。")
 
+    # 全体共享记忆池：每 tick 一次批量检索代替逐 Agent 检索
+    # arena 常驻内存；mmap 为内存映射文件，每次运行在 mmap_path 下按时间戳单独建目录，只在断点恢复时重新打开
+    memory_backend = memory_conf.get("backend", "manager")
+    memory_arena = None
+    if memory_backend == "arena":
+        memory_arena = MemoryArena(embedder=embedder)
+    elif memory_backend == "mmap":
+        mmap_dir = os.path.join(current_dir, memory_conf.get("mmap_path", "cache/memory_store"), timestamp)
+        memory_arena = MmapMemoryStore(local_path(mmap_dir),
+                                       embedder=embedder,
+                                       embedding_dtype=memory_conf.get("mmap_dtype", "float16"),
+                                       initial_agents=len(agents),
+                                       reopen=manifest is not None)
+    if memory_arena:
+        for ag in agents:
+            ag.get_component("state")._plugin.attach_memory_arena(memory_arena, ag.agent_id)
+        print(f"🧠 共享记忆存储已启用: {memory_backend} ({len(agents)} 个 Agent)")
+
+    # 社交网络拓扑：生成器、seed 与参数来自配置，带 seed 的拓扑按参数哈希缓存到磁盘
+    topology_conf = dict(runtime_conf.get("network", {}))
+    topology_cache = topology_conf.pop("cache_dir", None)
+    if seed is not None:
+        topology_conf["seed"] = seed
+    agent_types = [agent_cluster_type(ag) for ag in agents]
     await net_plugin.init()
-    net_plugin.register_agents(agents)
-
-    # 保存网络拓扑用于后续级联推导
     graph_path = os.path.join(results_dir, f"network_graph_{timestamp}.json")
-    graph_data = nx.node_link_data(net_plugin.graph)
-    with open(graph_path, "w", encoding="utf-8") as f:
-        json.dump(graph_data, f)
-
+    if shard:
+        # 拓扑与分区由协调进程生成并保存
+        net_plugin.register_shard(agents, shard.agent_ids, shard.src, shard.dst, shard.parts, shard.shard_id)
+    else:
+        net_plugin.register_agents(agents, topology=topology_conf, groups=agent_types,
+                                   cache_dir=os.path.join(current_dir, topology_cache) if topology_cache else None)
+
+    if not shard and not manifest:
+        # 保存网络拓扑用于后续级联推导 (断点恢复时沿用原文件)
+        net_plugin.save_graph(graph_path)
+
+    # LLM 客户端：agentkernel 路由器，或内置的 chat-completions 客户端
+    # (后者把分层 prompt 以 system / user 两条消息发送，并统计服务商前缀缓存命中率)
+    llm_conf = runtime_conf.get("llm", {})
+    chat_client = None
     try:
         with open(os.path.join(current_dir, "configs/models_config.yaml"), "r") as f:
             models_conf = yaml.safe_load(f)
-        router = ModelRouter(AsyncModelRouter(models_conf))
+        if llm_conf.get("client", "agentkernel") == "chat_completions":
+            provider = models_conf[0]
+            chat_client = ChatCompletionsClient(provider["base_url"], provider.get("model", "standin"),
+                                                provider.get("api_key"), max_retries=llm_conf.get("max_retries", 5))
+            router = chat_client
+        else:
+            router = ModelRouter(AsyncModelRouter(models_conf))
         print("🧠 LLM 引擎已就绪。")
     except:
         print("⚠️ 使用 Mock Router")
@@ -161,13 +400,63 @@ async def run():
 
         router = Mock()
 
+    # 批量请求调度器：合并同一阶段内的 prompt，减少请求次数与限流占用
+    batch_conf = runtime_conf.get("batching", {})
+    batch_scheduler = None
+    if batch_conf.get("enabled", False):
+        batch_scheduler = BatchScheduler(router,
+                                         max_batch_size=batch_conf.get("max_batch_size", 8),
+                                         max_wait_ms=batch_conf.get("max_wait_ms", 50))
+        router = batch_scheduler
+        print(f"📦 批量请求已启用 (batch={batch_scheduler.max_batch_size}, wait={batch_conf.get('max_wait_ms', 50)}ms)")
+
+    # 持久化响应缓存：放在批量调度外层，命中的 prompt 不再进入批次
+    cache_conf = runtime_conf.get("cache", {})
+    response_cache = None
+    if cache_conf.get("enabled", False):
+        response_cache_path = os.path.join(current_dir, cache_conf.get("path", "cache/llm_responses.sqlite"))
+        if replicate is not None:
+            stem, ext = os.path.splitext(response_cache_path)
+            response_cache_path = f"{stem}_rep{replicate:03d}{ext}"
+        response_cache = ResponseCache(router,
+                                       path=response_cache_path,
+                                       max_mb=cache_conf.get("max_mb", 256),
+                                       tasks=cache_conf.get("tasks", ["cognition", "plan", "mutation"]),
+                                       trust_step=cache_conf.get("trust_step", 0.0),
+                                       ignore_tick=cache_conf.get("ignore_tick", False),
+                                       flush_every=cache_conf.get("flush_every", 256),
+                                       timeout=cache_conf.get("timeout", 30.0))
+        router = response_cache
+        print(f"💾 响应缓存已启用: {response_cache.path} (任务: {sorted(response_cache.tasks)})")
+
+    # 录制/回放磁带：放在最外层，按插件发出的原始 prompt 录制与回放
+    cassette_conf = runtime_conf.get("cassette", {})
+    cassette_mode = cassette_mode or cassette_conf.get("mode", "off")
+    cassette = None
+    if cassette_mode in ("record", "replay"):
+        cassette_path = local_path(cassette_path or os.path.join(
+            current_dir, cassette_conf.get("path", f"cassettes/cassette_{timestamp}.jsonl.gz")))
+        cassette = CassetteRouter(router, cassette_path, mode=cassette_mode,
+                                  on_miss=cassette_conf.get("on_miss", "error"), append=manifest is not None)
+        router = cassette
+        print(f"📼 磁带模式: {cassette_mode} ({cassette_path})")
+
+    # 计时与计数：放在最外层，按任务类型记录每次 LLM 调用的延迟、字符数、错误与重试
+    profiling_conf = runtime_conf.get("profiling", {})
+    perf = PerfRecorder()
+    router = InstrumentedRouter(router, perf, max_retries=profiling_conf.get("llm_retries", 0),
+                                backoff=profiling_conf.get("retry_backoff", 0.5))
+
     for ag in agents: ag._model = router
 
     print("初始化 Agent 状态")
+    # 种群级列式状态存储：每个 GreenStatePlugin 的状态字典成为其中一行的视图
+    population = PopulationStore(initial_capacity=len(agents))
     for ag in agents:
         state_plugin = ag.get_component("state")._plugin
         profile_plugin = ag.get_component("profile")._plugin
         p_data = getattr(profile_plugin, "profile_data", getattr(profile_plugin, "_profile_data", {}))
+        state_plugin.attach_population_store(population, ag.agent_id)
 
         await state_plugin.set_state("trust_score", float(p_data.get("initial_trust", 5.0)))
         await state_plugin.set_state("budget", float(p_data.get("budget", 100)))
@@ -175,6 +464,15 @@ async def run():
         await state_plugin.set_state("observations", [])
         await state_plugin.set_state("latest_thought", None)
 
+    # 在线宏观指标：按 cluster_type / social_role 分组的信任分位数草图、漂绿感知率、购买与发帖数、T50
+    groupings = {"cluster_type": encode_groups(agent_types),
+                 "social_role": encode_groups([agent_social_role(ag) for ag in agents])}
+    live_metrics = None if shard else build_metrics_aggregator(runtime_conf)
+
+    if manifest:
+        restore_checkpoint(checkpoint_store, manifest, agents, population, net_plugin, cassette, live_metrics)
+        print(f"♻️ 已恢复 {len(agents)} 个 Agent 的状态与记忆，从 Tick {start_tick + 1} 继续")
+
     # ==========================================
     # 🚀 仿真主循环
     # ==========================================
@@ -203,140 +501,380 @@ async def run():
         )
     }
 
-    cumulative_buyers = set()  # 追踪历史购买者
+    # 输出格式：csv 或 columnar (列式压缩)；分片运行固定为 csv，便于协调进程流式归并
+    output_conf = runtime_conf.get("output", {})
+    log_format = "csv" if shard else output_conf.get("format", "csv")
+    if manifest:
+        log_format = manifest.get("format", "csv")
 
-    for tick in range(1, TOTAL_TICKS + 1):
-        print(f"\n" + "=" * 40)
-        print(f" ⏳ === Simulation Tick {tick} ===")
-        print("=" * 40)
-
-        # 1. 宏观时间上下文 (Oatly 已上市，移除旧版禁止购买的预热期逻辑)
-        time_context = f"Current Environment: Day {tick} of the simulation."
+    # 1. 基础动作日志
+    csv_file, writer, csv_path = open_result_log(
+        os.path.join(results_dir, f"simulation_log_{timestamp}{suffix}"), SIMULATION_LOG_SCHEMA, log_format,
+        offsets.get("log"))
 
-        # 2. 全局事件注入 (适配最新的纯字符串 ENTERPRISE_STRATEGY)
-        if tick in ENTERPRISE_STRATEGY:
-            event_text = ENTERPRISE_STRATEGY[tick]
-            print(f"🚨 [Global News Injection]: {event_text}")
+    # 2. 详细思维日志
+    thought_file, thought_writer, thought_path = open_result_log(
+        os.path.join(results_dir, f"thoughts_log_{timestamp}{suffix}"), THOUGHTS_LOG_SCHEMA, log_format,
+        offsets.get("thought"))
 
-            # 将纯字符串包装为 Agent 能够理解的消息字典
-            event_msg = {"source": "Global News", "content": event_text}
+    # 3. 宏观 KPI 日志 (新引入的转化率收集流)；分片运行时由协调进程统一写出
+    macro_path = os.path.join(results_dir, f"macro_metrics_{timestamp}.csv")
+    macro_file = None
+    if not shard:
+        macro_file, macro_writer = open_csv_log(macro_path, MACRO_HEADER, offsets.get("macro"))
+
+    # 所有结果流经后台写线程输出：tick 循环只把行批次放入有界队列，
+    # 正常结束、异常或 Ctrl-C 时都会写完已排队的批次并关闭文件
+    output = OutputPipeline(max_batches=output_conf.get("queue_batches", 64),
+                            flush_every=output_conf.get("flush_every", 8))
+    log_stream = output.add_stream("log", csv_file, writer)
+    thought_stream = output.add_stream("thought", thought_file, thought_writer)
+    if macro_file:
+        macro_stream = output.add_stream("macro", macro_file, macro_writer)
+    live_path = None
+    if live_metrics:
+        # 实时指标文件每 tick 原子替换，可在运行中轮询
+        live_path = live_metrics_path(results_dir, timestamp)
+        live_file = LiveMetricsFile(live_path)
+        metrics_stream = output.add_stream("metrics", live_file, live_file)
+    # 4. 性能日志：每 tick 每个区段 (阶段 / 插件 / LLM 任务 / 检索 / 输出) 一行
+    perf_file, perf_writer = open_csv_log(os.path.join(results_dir, f"perf_metrics_{timestamp}{suffix}.csv"),
+                                          PERF_HEADER, offsets.get("perf"))
+    perf_stream = output.add_stream("perf", perf_file, perf_writer)
+    print(f"📂 数据收集流管道已建立。")
 
-            for ag in agents:
+    if profile_ticks is None and profiling_conf.get("profile_ticks"):
+        profile_ticks = parse_tick_range(str(profiling_conf["profile_ticks"]))
+    profiler = None
+    if profile_ticks:
+        profiler = TickProfiler(*profile_ticks, os.path.join(results_dir, f"profile_{timestamp}{suffix}"),
+                                backend=profiling_conf.get("profiler", "cprofile"))
+
+    with output:
+        for tick in range(start_tick + 1, TOTAL_TICKS + 1):
+            if profiler:
+                profiler.on_tick_start(tick)
+            tick_timer = perf.start("tick")
+            print(f"\n" + "=" * 40)
+            print(f" ⏳ === Simulation Tick {tick} ===")
+            print("=" * 40)
+
+            # 1. 宏观时间上下文 (Oatly 已上市，移除旧版禁止购买的预热期逻辑)
+            time_context = f"Current Environment: Day {tick} of the simulation."
+
+            # 2. 全局事件注入 (适配最新的纯字符串 ENTERPRISE_STRATEGY)
+            if tick in ENTERPRISE_STRATEGY:
+                event_text = ENTERPRISE_STRATEGY[tick]
+                print(f"🚨 [Global News Injection]: {event_text}")
+
+                # 发布到全局公告板：O(1)，各 Agent 感知时按读游标读取
+                net_plugin.bulletin.publish(Message("Global News", event_text, "global_news"))
+
+            # tick 屏障：上一 tick 的社交投递对感知可见
+            with perf.span("swap_mailboxes"):
+                net_plugin.swap_mailboxes()
+
+            # 3. 认知与反思层 (更新 Agent 时间戳并读取新闻)
+            async def perceive_step(ag):
                 s_plugin = ag.get_component("state")._plugin
-                inbox = getattr(s_plugin, "state_data", {}).get("incoming_messages", [])
-                await s_plugin.set_state("incoming_messages", list(inbox) + [event_msg])
-
-        # 3. 认知与反思层 (更新 Agent 时间戳并读取新闻)
-        for ag in agents:
-            s_plugin = ag.get_component("state")._plugin
-            await s_plugin.set_state("time_context", time_context)
-            await s_plugin.set_state("current_tick", tick)
-
-            await ag.get_component("perceive").execute(tick)
-            await ag.get_component("reflect").execute(tick)
-
-        # 4. 计划与执行层 (消费决策与发帖)
-        for ag in agents:
-            await ag.get_component("plan").execute(tick)
-            await ag.get_component("invoke").execute(tick)
-
-        # ==========================================
-        # 📊 5. 数据结算与持久化
-        # ==========================================
-        trust_list = []
-        tick_buys = 0
-        tick_posts = 0
-
-        for ag in agents:
-            s_data = getattr(ag.get_component("state")._plugin, "state_data", {})
-            p_data = getattr(ag.get_component("profile")._plugin, "profile_data", {})
-
-            # 🚨 核心修复：将旧的 environmental_involvement 替换为最新的 cluster_type
-            agent_type = p_data.get("psychology", {}).get("cluster_type", "Unknown")
-            trust = round(float(s_data.get("trust_score", 5.0)), 2)
-            trust_list.append(trust)
-
-            plan = s_data.get("plan_result", {})
-            action = plan.get("action", "none") if plan else "none"
-
-            thought = s_data.get("latest_thought", {}) or {}
-            # 兼容大模型偶尔返回的布尔值或字符串
-            hypocrisy = thought.get("hypocrisy_perceived", False)
+                await s_plugin.set_state("time_context", time_context)
+                await s_plugin.set_state("current_tick", tick)
+
+                await execute_timed(ag, "perceive")
+
+            async def cognition_step(ag):
+                await execute_timed(ag, "reflect")
+
+            # 4. 计划与执行层 (消费决策与发帖)
+            async def action_step(ag):
+                await execute_timed(ag, "plan")
+                await execute_timed(ag, "invoke")
+
+            async def execute_timed(ag, name):
+                comp = ag.get_component(name)
+                await perf.measure(f"plugin:{type(comp._plugin).__name__}", comp.execute(tick))
+
+            # 两层之间保留屏障：所有 Agent 完成反思后才进入决策
+            await perf.measure("phase:perceive", executor.run_phase(agents, perceive_step), inclusive=True)
+            if memory_arena:
+                await perf.measure("memory:retrieve", batch_retrieve_memories(agents, memory_arena, tick),
+                                   inclusive=True)
+            await perf.measure("phase:cognition", executor.run_phase(agents, cognition_step), inclusive=True)
+            if memory_arena:
+                with perf.span("memory:enforce_capacity"):
+                    memory_arena.enforce_capacity(tick)
+            await perf.measure("phase:action", executor.run_phase(agents, action_step), inclusive=True)
+            settle_timer = perf.start("settle")
+            blocked = output.stats["blocked"]
+
+            # ==========================================
+            # 📊 5. 数据结算与持久化
+            # ==========================================
+            # 宏观指标由列式存储向量化归约得到 (分片运行时只计算本分片的部分和)
+            partials = population.tick_partials()
+            trust_col = np.round(np.nan_to_num(population.column("trust_score"), nan=5.0), 2)
+            action_col = population.actions()
+            hypocrisy_col = np.zeros(len(agents), dtype=bool)
+            log_rows, thought_rows = [], []
+
+            for i, ag in enumerate(agents):
+                s_data = getattr(ag.get_component("state")._plugin, "state_data", {})
+                trust = float(trust_col[i])
+                # 日志记录模型原样返回的动作，编码列只用于向量化计数
+                action = plan_action(s_data.get("plan_result"))
+
+                thought = s_data.get("latest_thought", {}) or {}
+                # 兼容大模型偶尔返回的布尔值或字符串
+                hypocrisy = thought.get("hypocrisy_perceived", False)
+                hypocrisy_col[i] = str(hypocrisy).strip().lower() in ("true", "1", "yes")
+
+                # 写入基础动作日志
+                log_rows.append([tick, ag.agent_id, agent_types[i], trust, action, hypocrisy])
+
+                # 写入内部思维日志 (Thought Log)
+                if thought:
+                    trust_change = thought.get("trust_change", 0.0)
+                    reasoning = thought.get("reasoning", "")
+                    thought_rows.append([tick, ag.agent_id, agent_types[i], hypocrisy, trust_change, reasoning])
+
+            # 每个 tick 每个流只入队一个批次
+            log_stream.writerows(log_rows)
+            thought_stream.writerows(thought_rows)
+
+            # 分组指标与部分和一起上报 (草图可精确合并)
+            partials["metrics"] = TickMetrics(tick).add_population(groupings, trust_col, hypocrisy_col, action_col)
+            if shard:
+                # tick 屏障：上报部分和，并交换跨分片广播 (下一 tick 扇出)
+                shard.barrier(tick, partials, net_plugin)
+            else:
+                kpi = merge_partials([partials])
+                write_macro_row(macro_stream, tick, kpi)
+                metrics_stream.writerow(live_metrics.update(tick, kpi, partials["metrics"]))
+            settle_timer.stop()
+            # 写线程队列已满时 tick 循环被阻塞的时间
+            perf.record("output:blocked", output.stats["blocked"] - blocked)
+            tick_timer.stop()
+            perf_stream.writerows(perf.tick_rows(tick))
+            if profiler:
+                profiler.on_tick_end(tick)
+
+            if checkpoint_store and checkpoint_every and tick % checkpoint_every == 0 and tick < TOTAL_TICKS:
+                # 先等写线程清空队列，文件偏移量才与检查点一致
+                output.sync()
+                save_checkpoint(checkpoint_store, tick, timestamp, agents, population, net_plugin, cassette,
+                                {"log": csv_file, "thought": thought_file, "macro": macro_file, "perf": perf_file},
+                                log_format, live_metrics)
+
+    if profiler:
+        profiler.stop()
+    print(f"📝 结果输出统计: {output.summary()}")
+    print(f"⏱️ 性能统计 (全部 tick 累计):\n{perf.summary()}")
+    if live_metrics:
+        print(f"📈 实时指标: {live_path} | T50: {live_metrics.t50 if live_metrics.t50 is not None else '未达到'}")
+    if batch_scheduler:
+        print(f"📦 批量调度统计: {batch_scheduler.summary()}")
+    if response_cache:
+        print(f"💾 响应缓存统计: {response_cache.summary()}")
+        response_cache.close()
+    if checkpoint_store:
+        checkpoint_store.mark_completed()
+        print(f"💾 检查点统计: {checkpoint_store.summary()}")
+    if cassette:
+        print(f"📼 磁带统计: {cassette.summary()}")
+        cassette.close()
+    if chat_client:
+        print(f"🔌 LLM 客户端统计: {chat_client.summary()}")
+        await chat_client.close()
+    if isinstance(memory_arena, MmapMemoryStore):
+        memory_arena.close()
+    print(f"🔢 {embedder.summary()}")
+    if replicate is None:
+        embedder.save()
+    if shard:
+        shard.finish({"log": csv_path, "thought": thought_path})
+        return
+    if analyze:
+        print(f"\n仿真阶段结束。进入后置数据分析阶段...")
+
+        # 自动触发级联深度与转化率图谱分析
+        analyze_results(macro_path, csv_path, graph_path, len(agents), results_dir, timestamp)
+    return macro_path
+
+
+def parse_tick_range(text):
+    """"A-B" 或 "A" -> (A, B)"""
+    start, _, end = text.partition("-")
+    return int(start), int(end or start)
+
+
+def load_profile_clusters():
+    """不初始化 Agent，直接从画像数据读取 {agent_id: cluster_type} (供协调进程生成拓扑)"""
+    with open(os.path.join(current_dir, "configs/simulation_config.yaml"), "r", encoding="utf-8") as f:
+        sim_conf = yaml.safe_load(f) or {}
+    path = os.path.join(current_dir, sim_conf.get("data", {}).get("agent_profiles", "data/agents/profiles.jsonl"))
+    clusters = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                p_data = json.loads(line)
+                clusters[p_data["id"]] = p_data.get("psychology", {}).get("cluster_type", "Unknown")
+    return clusters
+
+
+def shard_main(shard_id, num_shards, agent_ids, parts, src, dst, timestamp, options, conn):
+    """分片进程入口"""
+    shard = ShardWorker(shard_id, num_shards, conn, agent_ids, parts, src, dst, timestamp)
+    asyncio.run(run(**options, shard=shard))
+
+
+def run_sharded(num_shards, max_concurrency=None, cassette_mode=None, cassette_path=None, analyze=True,
+                seed=None, profile_ticks=None):
+    """
+    多进程分片运行：协调进程生成拓扑并按社区划分 Agent (尽量少切断边)，
+    各分片进程在本地执行各阶段；跨分片广播与宏观指标在每个 tick 屏障处批量交换，
+    macro_metrics 由协调进程合并写出，逐 Agent 日志在结束后按原顺序归并。
+    seed 覆盖拓扑种子并传给各分片；profile_ticks 在各分片内分别剖析 (输出文件带分片后缀)。
+    分片运行不支持检查点与断点恢复。
+    """
+    print(f"🚀 [GABM] 分片模式启动: {num_shards} 个进程")
+    runtime_conf = load_runtime_config()
+    shard_conf = runtime_conf.get("sharding", {})
+    if runtime_conf.get("checkpoint", {}).get("every", 0):
+        print("⚠️ 分片运行不支持检查点，已忽略 checkpoint.every")
 
-            if action == "buy":
-                tick_buys += 1
-                cumulative_buyers.add(ag.agent_id)
-            elif action == "post_review":
-                tick_posts += 1
-
-            # 写入基础动作日志
-            writer.writerow([tick, ag.agent_id, agent_type, trust, action, hypocrisy])
-
-            # 写入内部思维日志 (Thought Log)
-            if thought:
-                trust_change = thought.get("trust_change", 0.0)
-                reasoning = thought.get("reasoning", "")
-                thought_writer.writerow([tick, ag.agent_id, agent_type, hypocrisy, trust_change, reasoning])
+    builder = Builder(current_dir, resource_maps)
+    builder._load_data_into_config()
+    agent_ids = [conf.id for conf in builder.config.agents]
+    clusters = load_profile_clusters()
+    groups = [clusters.get(agent_id, "Unknown") for agent_id in agent_ids]
+    n = len(agent_ids)
+
+    # 与单进程运行相同的拓扑 (同一配置与 seed)，再做局部性优先的图划分
+    topology_conf = dict(runtime_conf.get("network", {}))
+    topology_cache = topology_conf.pop("cache_dir", None)
+    if seed is not None:
+        topology_conf["seed"] = seed
+    src, dst = load_or_generate(topology_conf, n, groups,
+                                os.path.join(current_dir, topology_cache) if topology_cache else None)
+    indptr, indices = to_csr(src, dst, n)
+    parts = partition_graph(indptr, indices, num_shards, imbalance=shard_conf.get("imbalance", 0.05))
+    num_shards = int(parts.max()) + 1 if n else 1
+    cut = cut_edges(indptr, indices, parts)
+    print(f"🧩 图划分完成: {num_shards} 个分片, 规模 {np.bincount(parts).tolist()}, "
+          f"跨分片边 {cut}/{len(src)} ({cut / max(1, len(src)) * 100:.1f}%)")
+
+    # 所有分片共享同一个 LLM 限流额度：并发上限在分片之间平分
+    if max_concurrency is None:
+        max_concurrency = runtime_conf.get("concurrency", {}).get("max_concurrency", 8)
+    options = {"max_concurrency": max(1, max_concurrency // num_shards),
+               "cassette_mode": cassette_mode, "cassette_path": cassette_path,
+               "seed": seed, "profile_ticks": profile_ticks}
 
-        avg_trust = np.mean(trust_list)
-        conversion_rate = len(cumulative_buyers) / len(agents)
-        macro_writer.writerow([tick, avg_trust, tick_buys, len(cumulative_buyers), conversion_rate, tick_posts])
-        print(
-            f"平均信任 {avg_trust:.2f} | 累计转化率 {conversion_rate * 100:.1f}% | 本期发帖 {tick_posts} 人")
+    results_dir = os.path.join(current_dir, "results")
+    os.makedirs(results_dir, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
 
-    csv_file.close()
-    thought_file.close()
-    macro_file.close()
-    print(f"\n仿真阶段结束。进入后置数据分析阶段...")
+    graph_path = os.path.join(results_dir, f"network_graph_{timestamp}.json")
+    save_graph_json(graph_path, agent_ids, src, dst)
 
-    # 自动触发级联深度与转化率图谱分析
-    analyze_results(macro_path, csv_path, graph_path, len(agents), results_dir, timestamp)
+    macro_path = os.path.join(results_dir, f"macro_metrics_{timestamp}.csv")
+    coordinator = ShardCoordinator(shard_main, [(k, num_shards, agent_ids, parts, src, dst, timestamp, options)
+                                                for k in range(num_shards)])
+    live_metrics = build_metrics_aggregator(runtime_conf)
+    live_file = LiveMetricsFile(live_metrics_path(results_dir, timestamp))
+    with open(macro_path, "w", newline="", encoding="utf-8") as macro_file:
+        macro_writer = csv.writer(macro_file)
+        macro_writer.writerow(MACRO_HEADER)
+
+        def on_tick(tick, partials):
+            # 各分片的部分和与分组草图在屏障处精确合并
+            kpi = merge_partials(partials)
+            write_macro_row(macro_writer, tick, kpi)
+            live_file.writerow(live_metrics.update(tick, kpi, TickMetrics.merged(tick, (p["metrics"] for p in partials))))
+
+        coordinator.start()
+        outputs = coordinator.run(on_tick)
+
+    # 逐 Agent 日志：按 (Tick, Agent 顺序) 归并各分片文件
+    agent_rank = {agent_id: i for i, agent_id in enumerate(agent_ids)}
+    csv_path = os.path.join(results_dir, f"simulation_log_{timestamp}.csv")
+    thought_path = os.path.join(results_dir, f"thoughts_log_{timestamp}.csv")
+    for key, out_path in (("log", csv_path), ("thought", thought_path)):
+        merge_tick_logs([o[key] for o in outputs], out_path, agent_rank)
+        for o in outputs:
+            os.remove(o[key])
+    if analyze:
+        print(f"\n仿真阶段结束。进入后置数据分析阶段...")
+        analyze_results(macro_path, csv_path, graph_path, n, results_dir, timestamp)
 
 
 # ==========================================
 # 📊 自动化后置分析：转化率与级联深度计算
 # ==========================================
+def setup_plotting():
+    """按需导入 matplotlib (非交互后端，只保存图片) 并设置字体；仿真本身不加载绘图库"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    # 绘图字体防乱码设置 (兼容中英文)
+    plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial']
+    plt.rcParams['axes.unicode_minus'] = False
+    return plt
+
+
+def analyze_run(timestamp):
+    """对已完成的运行离线执行后置分析 (仿真时用 --no-analysis 跳过)"""
+    results_dir = os.path.join(current_dir, "results")
+    log_path = os.path.join(results_dir, f"simulation_log_{timestamp}{COLUMNAR_SUFFIX}")
+    if not os.path.isdir(log_path):
+        log_path = os.path.join(results_dir, f"simulation_log_{timestamp}.csv")
+    analyze_results(os.path.join(results_dir, f"macro_metrics_{timestamp}.csv"), log_path,
+                    os.path.join(results_dir, f"network_graph_{timestamp}.json"), None, results_dir, timestamp)
+
+
 def analyze_results(macro_path, log_path, graph_path, total_agents, results_dir, timestamp):
-    print("\n正在通过 NetworkX 计算级联深度与转化率图谱...")
+    # pandas 与 matplotlib 只在分析阶段导入，无界面批量运行不付出导入与渲染开销
+    import pandas as pd
+    plt = setup_plotting()
+    print("\n正在计算级联深度与转化率图谱...")
     df_macro = pd.read_csv(macro_path)
-    df_log = pd.read_csv(log_path)
+    # 级联分析只需要发帖事件的三列 (列式日志只解压这三列)
+    df_log = load_log(log_path, columns=["Tick", "AgentID", "Action"])
 
     # 1. 计算 T50 (达到 50% 转化率的时间)
     t50_row = df_macro[df_macro['ConversionRate'] >= 0.5]
     t50 = t50_row['Tick'].iloc[0] if not t50_row.empty else "未达到50%"
     print(f"T50 扩散指标: {t50}")
 
-    # 2. 计算最大信息级联深度 (Cascade Depth)
-    # 推导逻辑: A发帖后，若B(A的邻居)在后续周期发帖，则存在级联边 A->B。
-    with open(graph_path, 'r', encoding='utf-8') as f:
-        graph_data = json.load(f)
-    base_G = nx.node_link_graph(graph_data)
-
-    cascade_G = nx.DiGraph()  # 有向传播图
-    post_events = df_log[df_log['Action'] == 'post_review'].sort_values(by='Tick')
-
-    # 构建级联树
-    for _, row in post_events.iterrows():
-        tick = row['Tick']
-        agent_id = row['AgentID']
-        cascade_G.add_node(agent_id, tick=tick)
-
-        # 寻找启发源: 是否有邻居在之前的周期发过帖？
-        neighbors = list(base_G.neighbors(agent_id))
-        potential_sources = post_events[(post_events['Tick'] < tick) & (post_events['AgentID'].isin(neighbors))]
-        if not potential_sources.empty:
-            # 假设受最近发帖的邻居影响
-            source = potential_sources.iloc[-1]['AgentID']
-            cascade_G.add_edge(source, agent_id)
-
-    max_depth = 0
-    if len(cascade_G.edges) > 0:
-        # 计算有向无环图的最长路径即为最大级联深度
-        try:
-            max_depth = len(nx.dag_longest_path(cascade_G)) - 1
-        except:
-            pass  # 存在环的情况忽略
+    # 2. 信息级联重建 (Cascade)
+    # 推导逻辑: A发帖后，若B(A的邻居)在后续周期发帖，则存在级联边 A->B (取最近发帖的邻居)。
+    # 按 tick 顺序一次扫描发帖事件，邻接关系用数组 (CSR) 表示，深度按 tick 顺序动态规划
+    ids, indptr, indices = load_graph_arrays(graph_path)
+    index = pd.Series(np.arange(len(ids)), index=ids)
+    post_events = df_log[df_log['Action'] == 'post_review']
+    post_events = post_events[post_events['AgentID'].isin(index.index)]
+    cascades = reconstruct_cascades(indptr, indices, index[post_events['AgentID']].to_numpy(),
+                                    post_events['Tick'].to_numpy())
+    stats = cascade_statistics(cascades)
+    cascade_summary = summarize_cascades(stats)
+    max_depth = cascade_summary["max_depth"]
     print(f"最大信息级联深度: {max_depth} 级")
+    print(f"级联数: {cascade_summary['cascades']} | 最大规模: {cascade_summary['max_size']} | "
+          f"平均结构病毒性: {cascade_summary['mean_virality']:.2f}")
+    print(f"规模分布: {cascade_summary['size_distribution']}")
+    print(f"宽度分布: {cascade_summary['breadth_distribution']}")
+
+    cascade_path = os.path.join(results_dir, f"cascade_stats_{timestamp}.csv")
+    roots = stats["root_event"]
+    pd.DataFrame({
+        "RootAgent": np.asarray(ids, dtype=object)[cascades["agent"][roots]],
+        "RootTick": cascades["tick"][roots],
+        "Size": stats["size"],
+        "Depth": stats["depth"],
+        "Breadth": stats["breadth"],
+        "StructuralVirality": np.round(stats["virality"], 4),
+    }).to_csv(cascade_path, index=False)
+    print(f"📄 级联明细已保存至: {cascade_path}")
 
     # 3. 绘制转化率与信任度耦合图谱
     plt.figure(figsize=(10, 5))
@@ -371,8 +909,52 @@ def analyze_results(macro_path, log_path, graph_path, total_agents, results_dir,
     plt.title('信任度波动与购买转化率耦合图谱')
     plot_path = os.path.join(results_dir, f"macro_analysis_{timestamp}.png")
     plt.savefig(plot_path, dpi=300, bbox_inches='tight')
+    plt.close()
     print(f"🖼️ 图谱已保存至: {plot_path}")
 
 
 if __name__ == "__main__":
-    asyncio.run(run())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="GABM 绿色消费仿真")
+    parser.add_argument("--max-concurrency", type=int, default=None,
+                        help="每个阶段同时执行的 Agent 数量上限 (覆盖 runtime_config.yaml)")
+    parser.add_argument("--checkpoint-every", type=int, default=None,
+                        help="每 K 个 tick 写一次检查点 (0 关闭，覆盖 runtime_config.yaml)")
+    parser.add_argument("--resume", nargs="?", const="latest", default=None, metavar="DIR",
+                        help="从检查点恢复 (默认 checkpoints/ 下最近一次运行)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="随机种子 (覆盖 network.seed 并设置全局随机数种子)")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="分片进程数 (大于 1 时启用多进程分片运行，覆盖 runtime_config.yaml)")
+    parser.add_argument("--no-analysis", action="store_true",
+                        help="跳过后置分析与绘图 (不导入 pandas / matplotlib)，之后可用 --analyze-only 补做")
+    parser.add_argument("--analyze-only", metavar="TIMESTAMP", default=None,
+                        help="不运行仿真，只对 results/ 下指定时间戳的运行执行后置分析")
+    parser.add_argument("--profile-ticks", metavar="A-B", default=None,
+                        help="在第 A 到 B 个 tick 内开启 cProfile / pyinstrument 剖析 (覆盖 runtime_config.yaml)")
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument("--record", metavar="PATH", default=None,
+                                help="录制所有 LLM 调用到 gzip JSONL 磁带")
+    cassette_group.add_argument("--replay", metavar="PATH", default=None,
+                                help="从磁带离线回放 LLM 响应")
+    args = parser.parse_args()
+
+    if args.analyze_only:
+        analyze_run(args.analyze_only)
+        sys.exit(0)
+
+    mode, path = None, None
+    if args.record:
+        mode, path = "record", args.record
+    elif args.replay:
+        mode, path = "replay", args.replay
+    profile_ticks = parse_tick_range(args.profile_ticks) if args.profile_ticks else None
+    shards = args.shards or load_runtime_config().get("sharding", {}).get("shards", 1)
+    if shards > 1:
+        if args.resume or args.checkpoint_every:
+            parser.error("分片运行 (--shards > 1) 不支持 --resume / --checkpoint-every")
+        run_sharded(shards, max_concurrency=args.max_concurrency, cassette_mode=mode, cassette_path=path,
+                    analyze=not args.no_analysis, seed=args.seed, profile_ticks=profile_ticks)
+    else:
+        asyncio.run(run(max_concurrency=args.max_concurrency, cassette_mode=mode, cassette_path=path,
+                        seed=args.seed, checkpoint_every=args.checkpoint_every, resume=args.resume,
+                        analyze=not args.no_analysis, profile_ticks=profile_ticks))
\ No newline at end of file
@@ -0,0 +1,287 @@
+"""
+本地 OpenAI 兼容的替身 LLM 服务 (用于压测与扩展性测量)。
+
+实现与 OpenAIProvider 相同的 /v1/chat/completions 协议，针对认知 / 决策 / 变异三类 prompt
+返回结构合法的 JSON；延迟分布、错误率、429 限流与并发上限均可配置。
+同时模拟服务端前缀缓存 (按 token 块的链式哈希 + LRU)，在 usage.prompt_tokens_details.cached_tokens 中
+报告命中的 prompt token 数，用于衡量 prompt 布局的前缀稳定性。
+
+用法:
+    python standin_llm_server.py --port 8765 --latency-median 0.8 --max-concurrency 64
+然后把 configs/models_config.yaml 的 base_url 指向 http://127.0.0.1:8765/v1 即可跑完整仿真。
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import OrderedDict
+
+from plugins.model.TaskClassifier import classify_prompt, TASK_COGNITION, TASK_PLAN, TASK_MUTATION
+
+_REASONS = [
+    "The claim sounds nice but I have seen this kind of marketing before.",
+    "Honestly this seems fine to me, nothing alarming.",
+    "I need more evidence before I believe any of this.",
+    "This matches what I already thought about the brand.",
+]
+_POSTS = [
+    "Not sure how I feel about this brand anymore...",
+    "Tried it, honestly not bad for the price!",
+    "Another company pretending to be green. Do your research, people.",
+]
+
+
+class LatencyModel:
+    """对数正态延迟 + 按输出长度计的生成耗时 (tokens / 吞吐)"""
+
+    def __init__(self, median: float = 0.8, sigma: float = 0.5, tokens_per_second: float = 0.0,
+                 rng: random.Random = None):
+        self.median = median
+        self.sigma = sigma
+        self.tokens_per_second = tokens_per_second
+        self.rng = rng or random.Random()
+
+    def sample(self, completion_tokens: int) -> float:
+        base = self.median * self.rng.lognormvariate(0.0, self.sigma) if self.median > 0 else 0.0
+        if self.tokens_per_second > 0:
+            base += completion_tokens / self.tokens_per_second
+        return base
+
+
+def estimate_tokens(text: str) -> int:
+    # 粗略估算：约 4 个字符 1 个 token
+    return max(1, len(text) // 4)
+
+
+class PrefixCache:
+    """
+    服务端前缀缓存模拟 (与 vLLM 自动前缀缓存同构)：消息序列化后按 block_tokens 个 token (约 4 字符/token) 切块，
+    每块的键为包含此前所有块的链式哈希，只有从开头起连续命中的块计为缓存 token；容量满时按 LRU 淘汰块。
+    """
+
+    def __init__(self, capacity_blocks: int = 65536, block_tokens: int = 16):
+        self.capacity = capacity_blocks
+        self.block_chars = block_tokens * 4
+        self._blocks = OrderedDict()
+
+    def lookup(self, messages) -> int:
+        """返回命中的 token 数，并把本次请求的全部完整块加入缓存"""
+        if self.capacity <= 0:
+            return 0
+        text = "".join(f"<|{m.get('role', 'user')}|>{m.get('content', '')}" for m in messages)
+        key, hit, cached = 0, True, 0
+        for i in range(0, len(text) - self.block_chars + 1, self.block_chars):
+            key = hash((key, text[i:i + self.block_chars]))
+            if hit and key in self._blocks:
+                self._blocks.move_to_end(key)
+                cached += self.block_chars
+            else:
+                hit = False
+                self._blocks[key] = None
+                if len(self._blocks) > self.capacity:
+                    self._blocks.popitem(last=False)
+        return cached // 4
+
+
+class StandInServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, latency: LatencyModel = None,
+                 error_rate: float = 0.0, rate_429: float = 0.0, max_concurrency: int = 0,
+                 retry_after: float = 1.0, seed: int = 42, prefix_cache: PrefixCache = None):
+        self.host = host
+        self.port = port
+        self.rng = random.Random(seed)
+        self.latency = latency or LatencyModel(rng=self.rng)
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.max_concurrency = max_concurrency
+        self.retry_after = retry_after
+        self.prefix_cache = prefix_cache or PrefixCache()
+
+        self.inflight = 0
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "throttled": 0, "prompt_tokens": 0, "cached_tokens": 0}
+        self._server = None
+        self._connections = set()
+
+    # --- 响应内容 ---
+    def make_content(self, prompt: str) -> str:
+        task = classify_prompt(prompt)
+        rng = self.rng
+        if task == TASK_COGNITION:
+            hypocrisy = rng.random() < 0.4
+            body = {
+                "hypocrisy_perceived": hypocrisy,
+                "trust_change": round(rng.uniform(-1.0, -0.1) if hypocrisy else rng.uniform(-0.2, 0.6), 2),
+                "importance": round(rng.uniform(1.0, 10.0), 1),
+                "reasoning": rng.choice(_REASONS),
+            }
+        elif task == TASK_PLAN:
+            action = rng.choices(["buy", "post_review", "ignore"], weights=[0.3, 0.2, 0.5])[0]
+            body = {
+                "action": action,
+                "content": rng.choice(_POSTS) if action == "post_review" else "",
+                "reason": rng.choice(_REASONS),
+            }
+        elif task == TASK_MUTATION:
+            body = {"mutated_content": rng.choice(_POSTS)}
+        else:
+            body = {"reply": "ok"}
+        return json.dumps(body, ensure_ascii=False)
+
+    def completion(self, model: str, prompt: str, content: str, cached_tokens: int = 0) -> dict:
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(content)
+        cached_tokens = min(cached_tokens, prompt_tokens)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            },
+        }
+
+    # --- 请求处理 ---
+    async def handle_chat(self, payload: dict):
+        self.stats["requests"] += 1
+        if self.max_concurrency and self.inflight >= self.max_concurrency:
+            self.stats["throttled"] += 1
+            return 429, {"error": {"message": "Too many concurrent requests", "type": "rate_limit_error"}}
+        if self.rng.random() < self.rate_429:
+            self.stats["throttled"] += 1
+            return 429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}}
+
+        self.inflight += 1
+        try:
+            messages = payload.get("messages", [])
+            prompt = "\n".join(str(m.get("content", "")) for m in messages)
+            content = self.make_content(prompt)
+            await asyncio.sleep(self.latency.sample(estimate_tokens(content)))
+
+            if self.rng.random() < self.error_rate:
+                self.stats["errors"] += 1
+                return 500, {"error": {"message": "Internal server error", "type": "server_error"}}
+            self.stats["ok"] += 1
+            cached_tokens = self.prefix_cache.lookup(messages)
+            response = self.completion(payload.get("model", "standin"), prompt, content, cached_tokens)
+            self.stats["prompt_tokens"] += response["usage"]["prompt_tokens"]
+            self.stats["cached_tokens"] += response["usage"]["prompt_tokens_details"]["cached_tokens"]
+            return 200, response
+        finally:
+            self.inflight -= 1
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+
+                if method == "POST" and path.rstrip("/").endswith("/chat/completions"):
+                    try:
+                        status, result = await self.handle_chat(json.loads(body or b"{}"))
+                    except json.JSONDecodeError:
+                        status, result = 400, {"error": {"message": "Invalid JSON body"}}
+                elif method == "GET" and path.rstrip("/").endswith("/models"):
+                    status, result = 200, {"object": "list", "data": [{"id": "standin", "object": "model"}]}
+                else:
+                    status, result = 404, {"error": {"message": f"Unknown endpoint {path}"}}
+
+                data = json.dumps(result, ensure_ascii=False).encode("utf-8")
+                reason = {200: "OK", 400: "Bad Request", 404: "Not Found",
+                          429: "Too Many Requests", 500: "Internal Server Error"}[status]
+                head = [f"HTTP/1.1 {status} {reason}", "Content-Type: application/json",
+                        f"Content-Length: {len(data)}", "Connection: keep-alive"]
+                if status == 429:
+                    head.append(f"Retry-After: {self.retry_after}")
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionResetError, ValueError):
+            # 客户端断开或服务关闭时静默结束该连接
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="本地 OpenAI 兼容替身 LLM 服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-median", type=float, default=0.8, help="延迟中位数 (秒)")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="对数正态分布的 sigma")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="生成吞吐，0 表示不计生成耗时")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 500 的概率")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="随机返回 429 的概率")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="并发上限，超出返回 429 (0 表示不限)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="429 响应中的 Retry-After 秒数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--prefix-cache-blocks", type=int, default=65536, help="前缀缓存容量 (块数，0 关闭)")
+    parser.add_argument("--cache-block-tokens", type=int, default=16, help="前缀缓存块大小 (token)")
+    return parser
+
+
+def server_from_args(args) -> StandInServer:
+    rng = random.Random(args.seed)
+    latency = LatencyModel(args.latency_median, args.latency_sigma, args.tokens_per_second, rng=rng)
+    server = StandInServer(args.host, args.port, latency, args.error_rate, args.rate_429,
+                           args.max_concurrency, args.retry_after, seed=args.seed,
+                           prefix_cache=PrefixCache(args.prefix_cache_blocks, args.cache_block_tokens))
+    server.rng = rng
+    return server
+
+
+async def main():
+    args = build_arg_parser().parse_args()
+    server = await server_from_args(args).start()
+    print(f"🧪 替身 LLM 服务已启动: {server.base_url} (Ctrl-C 退出)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+        print(f"📊 服务统计: {server.stats}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
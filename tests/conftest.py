@@ -0,0 +1,5 @@
+import os
+import sys
+
+# plugins 为命名空间包，测试从仓库根目录导入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
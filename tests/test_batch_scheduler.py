@@ -0,0 +1,134 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+from plugins.model.BatchScheduler import BATCH_SYSTEM, BatchScheduler
+from plugins.model.PromptLayout import LayeredPrompt
+
+
+def answer(prompt):
+    return json.dumps({"echo": prompt})
+
+
+class MultiRouter:
+    """按多题 prompt 中的题目逐一作答；mode 控制返回坏 JSON 或数量不符的数组"""
+
+    def __init__(self, mode="ok"):
+        self.mode = mode
+        self.prompts = []
+
+    async def chat(self, prompt):
+        self.prompts.append(prompt)
+        await asyncio.sleep(0)
+        if not prompt.startswith(BATCH_SYSTEM):
+            return answer(prompt)
+        if self.mode == "garbage":
+            return "I cannot comply."
+        items = re.findall(r"### Request \d+\n(.*?)(?=\n\n### Request|\Z)", prompt.user, re.S)
+        if self.mode == "short":
+            items = items[:-1]
+        return "```json\n" + json.dumps([{"echo": item} for item in items]) + "\n```"
+
+
+class NativeBatchRouter:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+        self.singles = []
+
+    async def chat(self, prompt):
+        self.singles.append(prompt)
+        return answer(prompt)
+
+    async def chat_batch(self, prompts):
+        self.batches.append(list(prompts))
+        if self.fail:
+            raise RuntimeError("batch endpoint down")
+        return [answer(p) for p in prompts]
+
+
+def run_all(scheduler, prompts):
+    async def main():
+        return await asyncio.gather(*(scheduler.chat(p) for p in prompts))
+    return asyncio.run(main())
+
+
+def test_results_are_dispatched_in_order_across_batches():
+    router = MultiRouter()
+    scheduler = BatchScheduler(router, max_batch_size=3, max_wait_ms=5)
+    prompts = [f"prompt {i}" for i in range(8)]
+    results = run_all(scheduler, prompts)
+    assert [json.loads(r)["echo"] for r in results] == prompts
+    # 8 条 prompt 合并为 3 + 3 + 2 三个批次
+    assert scheduler.stats["batches"] == 3 and scheduler.stats["requests"] == 3
+    assert scheduler.stats["fallbacks"] == 0
+
+
+def test_single_prompt_is_sent_as_is():
+    router = MultiRouter()
+    scheduler = BatchScheduler(router, max_batch_size=4, max_wait_ms=1)
+    assert run_all(scheduler, ["only one"]) == [answer("only one")]
+    assert router.prompts == ["only one"]
+
+
+@pytest.mark.parametrize("mode", ["garbage", "short"])
+def test_unusable_batch_reply_falls_back_per_prompt(mode):
+    router = MultiRouter(mode)
+    scheduler = BatchScheduler(router, max_batch_size=4, max_wait_ms=1)
+    prompts = [f"prompt {i}" for i in range(4)]
+    assert run_all(scheduler, prompts) == [answer(p) for p in prompts]
+    assert scheduler.stats["fallbacks"] == 1
+    assert router.prompts[1:] == prompts
+
+
+def test_native_batch_endpoint_and_its_errors():
+    router = NativeBatchRouter()
+    scheduler = BatchScheduler(router, max_batch_size=2, max_wait_ms=1)
+    assert run_all(scheduler, ["a", "b", "c"]) == [answer(p) for p in "abc"]
+    assert router.batches == [["a", "b"]] and router.singles == ["c"]
+
+    failing = NativeBatchRouter(fail=True)
+    scheduler = BatchScheduler(failing, max_batch_size=3, max_wait_ms=1)
+    assert run_all(scheduler, ["x", "y", "z"]) == [answer(p) for p in "xyz"]
+    assert failing.singles == ["x", "y", "z"]
+    assert scheduler.stats["fallbacks"] == 1
+
+
+def test_per_prompt_errors_reach_only_their_caller():
+    class Flaky:
+        async def chat(self, prompt):
+            if prompt.startswith(BATCH_SYSTEM):
+                return "not json"
+            if prompt == "bad":
+                raise ValueError("boom")
+            return answer(prompt)
+
+    scheduler = BatchScheduler(Flaky(), max_batch_size=3, max_wait_ms=1)
+
+    async def main():
+        return await asyncio.gather(*(scheduler.chat(p) for p in ["ok", "bad", "fine"]), return_exceptions=True)
+
+    ok, bad, fine = asyncio.run(main())
+    assert ok == answer("ok") and fine == answer("fine")
+    assert isinstance(bad, ValueError)
+
+
+def test_shared_system_stays_in_the_system_message():
+    prompts = [LayeredPrompt("TASK RULES", f"state {i}") for i in range(3)]
+    batch = BatchScheduler._build_batch_prompt(prompts)
+    assert isinstance(batch, LayeredPrompt)
+    assert batch.system.startswith(BATCH_SYSTEM) and batch.system.endswith("TASK RULES")
+    assert "TASK RULES" not in batch.user
+    assert batch.user.startswith("There are 3 requests.")
+    assert all(f"### Request {i + 1}\nstate {i}" in batch.user for i in range(3))
+
+
+def test_mixed_systems_are_listed_per_request():
+    prompts = [LayeredPrompt("persona A", "state a"), LayeredPrompt("persona B", "state b"), "  plain prompt  "]
+    batch = BatchScheduler._build_batch_prompt(prompts)
+    assert batch.system == BATCH_SYSTEM
+    assert "### Request 1\n#### Instructions\npersona A\n#### Input\nstate a" in batch.user
+    assert "### Request 2\n#### Instructions\npersona B\n#### Input\nstate b" in batch.user
+    assert "### Request 3\nplain prompt" in batch.user
@@ -0,0 +1,53 @@
+from plugins.environment.network.BulletinBoard import BulletinBoard
+from plugins.environment.network.Mailbox import Message
+
+
+def news(text):
+    return Message("GLOBAL_NEWS", text, "global_news")
+
+
+def test_each_agent_reads_each_event_once():
+    board = BulletinBoard()
+    for agent_id in ("a", "b"):
+        board.register(agent_id)
+    board.publish(news("n1"))
+    board.publish(news("n2"))
+    assert [m.content for m in board.unread("a")] == ["n1", "n2"]
+    assert board.unread("a") == []
+    board.publish(news("n3"))
+    assert [m.content for m in board.unread("a")] == ["n3"]
+    assert [m.content for m in board.unread("b")] == ["n1", "n2", "n3"]
+
+
+def test_late_agents_only_see_later_events():
+    board = BulletinBoard()
+    board.publish(news("old"))
+    board.register("late")
+    board.register("replayed", from_start=True)
+    board.publish(news("new"))
+    assert [m.content for m in board.unread("late")] == ["new"]
+    assert [m.content for m in board.unread("replayed")] == ["old", "new"]
+    assert board.unread("unknown") == []
+
+
+def test_events_are_shared_not_copied():
+    board = BulletinBoard()
+    board.register("a")
+    board.register("b")
+    board.publish(news("shared"))
+    assert board.unread("a")[0] is board.unread("b")[0]
+
+
+def test_checkpoint_round_trip_keeps_cursors():
+    board = BulletinBoard()
+    board.register("a")
+    board.register("b")
+    board.publish(news("n1"))
+    board.unread("a")
+    snapshot = board.checkpoint_state()
+    board.publish(news("lost"))
+
+    restored = BulletinBoard()
+    restored.restore_checkpoint(snapshot)
+    assert restored.unread("a") == []
+    assert [m.content for m in restored.unread("b")] == ["n1"]
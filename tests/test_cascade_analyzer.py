@@ -0,0 +1,111 @@
+from collections import defaultdict, deque
+
+import numpy as np
+import pytest
+
+from plugins.environment.network.TopologyGenerator import generate, save_graph_json, to_csr
+from plugins.system.CascadeAnalyzer import cascade_statistics, load_graph_arrays, reconstruct_cascades, summarize
+
+
+def random_posts(n, p, ticks, seed):
+    rng = np.random.default_rng(seed)
+    agents = rng.integers(0, n, p)
+    return agents, rng.integers(0, ticks, p)
+
+
+def brute_force_cascades(indptr, indices, agents, ticks):
+    """逐事件直接按规则查找父事件"""
+    order = np.argsort(ticks, kind="stable")
+    agents, ticks = agents[order], ticks[order]
+    parent = np.full(len(agents), -1)
+    for e, (a, t) in enumerate(zip(agents, ticks)):
+        best = None
+        for nb in indices[indptr[a]:indptr[a + 1]]:
+            earlier = [j for j in range(len(agents)) if agents[j] == nb and ticks[j] < t]
+            if earlier:
+                candidate = (-ticks[earlier[-1]], nb, earlier[-1])
+                best = candidate if best is None or candidate < best else best
+        if best is not None:
+            parent[e] = best[2]
+    return parent
+
+
+def brute_force_virality(members, parent):
+    """级联树中所有节点对的平均最短路径长度 (逐节点 BFS)"""
+    adjacency = defaultdict(list)
+    for e in members:
+        if parent[e] >= 0:
+            adjacency[e].append(parent[e])
+            adjacency[parent[e]].append(e)
+    total = 0
+    for source in members:
+        dist, queue = {source: 0}, deque([source])
+        while queue:
+            u = queue.popleft()
+            for v in adjacency[u]:
+                if v not in dist:
+                    dist[v] = dist[u] + 1
+                    queue.append(v)
+        total += sum(dist.values())
+    n = len(members)
+    return total / (n * (n - 1)) if n > 1 else 0.0
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_parents_match_brute_force(seed):
+    n = 60
+    src, dst = generate({"generator": "ws", "seed": seed, "ws_k": 4, "ws_p": 0.2}, n)
+    indptr, indices = to_csr(src, dst, n)
+    agents, ticks = random_posts(n, 150, 20, seed)
+    cascades = reconstruct_cascades(indptr, indices, agents, ticks)
+    assert np.array_equal(cascades["parent"], brute_force_cascades(indptr, indices, agents, ticks))
+
+    parent = cascades["parent"]
+    for e in range(len(parent)):
+        p = parent[e]
+        assert p < e
+        assert cascades["depth"][e] == (0 if p < 0 else cascades["depth"][p] + 1)
+        assert cascades["root"][e] == (e if p < 0 else cascades["root"][p])
+        if p >= 0:
+            assert cascades["tick"][p] < cascades["tick"][e]
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_statistics_match_brute_force(seed):
+    n = 60
+    src, dst = generate({"generator": "ba", "seed": seed, "m": 2}, n)
+    indptr, indices = to_csr(src, dst, n)
+    cascades = reconstruct_cascades(indptr, indices, *random_posts(n, 200, 15, seed))
+    stats = cascade_statistics(cascades)
+
+    parent, depth, root = cascades["parent"], cascades["depth"], cascades["root"]
+    for k, r in enumerate(stats["root_event"]):
+        members = np.flatnonzero(root == r)
+        assert stats["size"][k] == len(members)
+        assert stats["depth"][k] == depth[members].max()
+        assert stats["breadth"][k] == np.bincount(depth[members]).max()
+        assert stats["virality"][k] == pytest.approx(brute_force_virality(members, parent))
+    assert stats["size"].sum() == len(parent)
+
+
+def test_simultaneous_posts_do_not_feed_each_other():
+    # 路径图 0-1-2，同一 tick 的发帖互不作为来源
+    indptr, indices = to_csr(np.array([0, 1]), np.array([1, 2]), 3)
+    cascades = reconstruct_cascades(indptr, indices, np.array([0, 1, 2, 1]), np.array([0, 0, 1, 2]))
+    assert cascades["parent"].tolist() == [-1, -1, 1, 2]
+    stats = cascade_statistics(cascades)
+    assert sorted(stats["size"].tolist()) == [1, 3]
+    summary = summarize(stats)
+    assert summary["cascades"] == 2 and summary["max_depth"] == 2
+    # 三个节点的链：节点对距离 1, 1, 2
+    assert summary["mean_virality"] == pytest.approx(4 / 3)
+
+
+def test_load_graph_arrays(tmp_path):
+    ids = ["a", "b", "c"]
+    path = str(tmp_path / "graph.json")
+    save_graph_json(path, ids, np.array([0, 1]), np.array([1, 2]))
+    loaded_ids, indptr, indices = load_graph_arrays(path)
+    assert loaded_ids == ids
+    assert indptr.tolist() == [0, 1, 3, 4]
+    assert indices.tolist() == [1, 0, 2, 1]
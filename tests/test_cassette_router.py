@@ -0,0 +1,106 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+from plugins.model.CassetteRouter import (MODE_RECORD, ON_MISS_FALLBACK, ON_MISS_PASSTHROUGH, CassetteMissError,
+                                          CassetteRouter)
+from plugins.model.TaskClassifier import TASK_PLAN, fallback_response
+
+
+class CountingRouter:
+    """每次调用返回递增编号的响应，用于区分同一 prompt 的多次录制"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def chat(self, prompt):
+        self.calls.append(prompt)
+        return f"{prompt} #{len(self.calls)}"
+
+
+def ask(router, prompts):
+    async def main():
+        return [await router.chat(p) for p in prompts]
+    return asyncio.run(main())
+
+
+def record(path, prompts, append=False):
+    cassette = CassetteRouter(CountingRouter(), path, mode=MODE_RECORD, append=append)
+    responses = ask(cassette, prompts)
+    cassette.close()
+    return responses
+
+
+def tape_lines(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_record_then_replay_offline(tmp_path):
+    path = str(tmp_path / "tape.jsonl.gz")
+    responses = record(path, ["hello", "world"])
+    replay = CassetteRouter(None, path)
+    # 空白差异不影响命中
+    assert ask(replay, ["hello", "  world\n"]) == responses
+    assert replay.stats == {"recorded": 0, "hits": 2, "misses": 0}
+
+
+def test_repeated_prompt_replays_in_order_then_repeats_last(tmp_path):
+    path = str(tmp_path / "tape.jsonl.gz")
+    assert record(path, ["same", "other", "same", "same"]) == ["same #1", "other #2", "same #3", "same #4"]
+    replay = CassetteRouter(None, path)
+    assert ask(replay, ["same"] * 5) == ["same #1", "same #3", "same #4", "same #4", "same #4"]
+    assert ask(replay, ["other", "other"]) == ["other #2", "other #2"]
+
+
+def test_miss_policies(tmp_path):
+    path = str(tmp_path / "tape.jsonl.gz")
+    record(path, ["known"])
+    with pytest.raises(CassetteMissError):
+        ask(CassetteRouter(None, path), ["unknown"])
+
+    live = CountingRouter()
+    assert ask(CassetteRouter(live, path, on_miss=ON_MISS_PASSTHROUGH), ["unknown"]) == ["unknown #1"]
+    fallback = CassetteRouter(None, path, on_miss=ON_MISS_FALLBACK)
+    [reply] = ask(fallback, ["choose buy/post_review/ignore"])
+    assert json.loads(reply) == fallback_response(TASK_PLAN)
+    assert fallback.stats["misses"] == 1
+
+
+def test_replay_checkpoint_resumes_consumption(tmp_path):
+    path = str(tmp_path / "tape.jsonl.gz")
+    record(path, ["p", "p", "p", "q"])
+    replay = CassetteRouter(None, path)
+    ask(replay, ["p", "p"])
+    snapshot = json.loads(json.dumps(replay.checkpoint_state()))
+
+    resumed = CassetteRouter(None, path)
+    resumed.restore_checkpoint(snapshot)
+    assert ask(resumed, ["p", "p", "q"]) == ["p #3", "p #3", "q #4"]
+
+    # 消费数超过录制条数时停在最后一条
+    exhausted = CassetteRouter(None, path)
+    exhausted.restore_checkpoint({"mode": "replay", "consumed": {k: 9 for k in snapshot["consumed"]}})
+    assert ask(exhausted, ["p"]) == ["p #3"]
+
+
+def test_record_checkpoint_truncates_tape_on_resume(tmp_path):
+    path = str(tmp_path / "tape.jsonl.gz")
+    cassette = CassetteRouter(CountingRouter(), path, mode=MODE_RECORD)
+    ask(cassette, ["a", "b"])
+    snapshot = cassette.checkpoint_state()
+    assert snapshot == {"mode": MODE_RECORD, "recorded": 2}
+    ask(cassette, ["c", "d"])  # 检查点之后录制、随后进程中断
+    cassette.close()
+
+    resumed = CassetteRouter(CountingRouter(), path, mode=MODE_RECORD, append=True)
+    resumed.restore_checkpoint(snapshot)
+    ask(resumed, ["c2"])
+    resumed.close()
+    assert [e["prompt"] for e in tape_lines(path)] == ["a", "b", "c2"]
+    assert resumed.stats["recorded"] == 3
+
+    with pytest.raises(ValueError):
+        CassetteRouter(None, path).restore_checkpoint(snapshot)
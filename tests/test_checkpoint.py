@@ -0,0 +1,110 @@
+import os
+
+import numpy as np
+
+from plugins.system.Checkpoint import CheckpointStore, latest_run_dir, record_id
+
+
+def memory(tick, content, importance=5.0):
+    return {"tick": tick, "content": content, "importance": importance,
+            "embedding": np.random.default_rng(tick).standard_normal(64).astype(np.float32)}
+
+
+def save(store, tick, streams, state):
+    """与 run_simulation.save_checkpoint 相同的清单结构：记忆按记录增量存储，其余状态按片段存储"""
+    refs, chunks = store.put_records(streams)
+    objects = {"agents": {name: store.put(s) for name, s in state.items()},
+               "memories": store.put(refs), "memory_chunks": chunks}
+    store.save(tick, {"objects": objects, "offsets": {"log": tick * 100}})
+
+
+def load(store):
+    tick, manifest = store.latest()
+    objects = manifest["objects"]
+    records = store.get_records(objects["memory_chunks"])
+    refs = store.get(objects["memories"])
+    streams = {name: [records[rid] for rid in ids] for name, ids in refs.items()}
+    state = {name: store.get(key) for name, key in objects["agents"].items()}
+    return tick, manifest, streams, state
+
+
+def object_files(root):
+    return [f for d in os.listdir(os.path.join(root, "objects"))
+            for f in os.listdir(os.path.join(root, "objects", d))]
+
+
+def test_round_trip(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    streams = {"a": [memory(0, "first"), memory(1, "second")], "b": [memory(1, "other")]}
+    state = {"a": {"trust": 0.4, "bought": False}, "b": {"trust": 0.7, "bought": True}}
+    save(store, 2, streams, state)
+
+    tick, manifest, got_streams, got_state = load(CheckpointStore(str(tmp_path)))
+    assert tick == 2 and manifest["offsets"] == {"log": 200}
+    assert got_state == state
+    for name, records in streams.items():
+        assert [(r["tick"], r["content"]) for r in got_streams[name]] == [(r["tick"], r["content"]) for r in records]
+        assert all(np.array_equal(x["embedding"], y["embedding"]) for x, y in zip(got_streams[name], records))
+
+
+def test_memories_are_written_incrementally(tmp_path):
+    store = CheckpointStore(str(tmp_path), keep=5)
+    stream = [memory(t, f"memory {t}") for t in range(50)]
+    state = {"a": {"trust": 0.5}}
+    save(store, 1, {"a": stream}, state)
+    first_bytes = store.stats["bytes"]
+
+    stream.append(memory(50, "new one"))
+    save(store, 2, {"a": stream}, state)
+    # 第二次只写入新记录所在的片段与新的引用列表，未变化的状态片段被复用
+    assert store.stats["bytes"] - first_bytes < first_bytes / 5
+    assert store.stats["reused"] >= 1
+    _, manifest, streams, _ = load(store)
+    assert len(manifest["objects"]["memory_chunks"]) == 2
+    assert [r["content"] for r in streams["a"]] == [r["content"] for r in stream]
+
+
+def test_resumed_store_reuses_existing_chunks(tmp_path):
+    stream = [memory(t, f"m{t}") for t in range(10)]
+    save(CheckpointStore(str(tmp_path)), 1, {"a": stream}, {"a": {}})
+
+    resumed = CheckpointStore(str(tmp_path))
+    load(resumed)
+    stream.append(memory(10, "after resume"))
+    save(resumed, 2, {"a": stream}, {"a": {}})
+    _, manifest, streams, _ = load(resumed)
+    assert len(manifest["objects"]["memory_chunks"]) == 2
+    assert [r["content"] for r in streams["a"]] == [r["content"] for r in stream]
+
+
+def test_prune_keeps_latest_manifests_and_their_objects(tmp_path):
+    store = CheckpointStore(str(tmp_path), keep=2)
+    for tick in range(1, 5):
+        # 被淘汰的记忆不再被引用，其片段随旧清单删除
+        save(store, tick, {"a": [memory(tick, f"only {tick}")]}, {"a": {"tick": tick}})
+    assert sorted(os.listdir(str(tmp_path))) == ["objects", "tick_00003.json", "tick_00004.json"]
+    tick, _, streams, state = load(store)
+    assert tick == 4 and state["a"] == {"tick": 4}
+    assert [r["content"] for r in streams["a"]] == ["only 4"]
+    # 每个清单引用 3 个片段 (状态、记忆引用、记忆片段)
+    assert len(object_files(str(tmp_path))) == 6
+
+
+def test_record_id_ignores_embedding():
+    a = memory(3, "same")
+    b = dict(a, embedding=np.zeros(64, dtype=np.float32))
+    assert record_id(a) == record_id(b)
+    assert record_id(a) != record_id(memory(3, "same", importance=6.0))
+
+
+def test_completed_runs_are_not_resumed(tmp_path):
+    older = CheckpointStore(str(tmp_path / "20250101_000000"))
+    newer = CheckpointStore(str(tmp_path / "20250102_000000"))
+    save(older, 1, {}, {})
+    save(newer, 1, {}, {})
+    assert latest_run_dir(str(tmp_path)) == newer.root
+    newer.mark_completed()
+    assert newer.completed
+    assert latest_run_dir(str(tmp_path)) == older.root
+    older.mark_completed()
+    assert latest_run_dir(str(tmp_path)) is None
@@ -0,0 +1,110 @@
+import json
+import math
+import os
+
+import numpy as np
+
+from plugins.system.ColumnarLog import (COLUMNAR_SUFFIX, SCHEMA_FILE, SIMULATION_LOG_SCHEMA, THOUGHTS_LOG_SCHEMA,
+                                        ColumnarLogWriter, latest_log, log_stem, read_log)
+
+
+def simulation_rows(ticks, agents=3):
+    return [[tick, f"agent_{a}", ["Eco", "Price"][a % 2], round(5 + tick * 0.1 - a, 2),
+             ["buy", "ignore", "Buy"][(tick + a) % 3], "true" if (tick + a) % 2 else False]
+            for tick in ticks for a in range(agents)]
+
+
+def write(path, schema, rows, resume_tick=None):
+    writer = ColumnarLogWriter(path, schema, resume_tick=resume_tick)
+    writer.writerows(rows)
+    writer.close()
+    return writer
+
+
+def test_round_trip_decodes_every_column(tmp_path):
+    path = str(tmp_path / f"simulation_log_x{COLUMNAR_SUFFIX}")
+    rows = simulation_rows(range(1, 4))
+    write(path, SIMULATION_LOG_SCHEMA, rows)
+    log = read_log(path)
+    assert log["Tick"].tolist() == [r[0] for r in rows]
+    assert log["AgentID"].tolist() == [r[1] for r in rows]
+    assert log["Action"].tolist() == [r[4] for r in rows]
+    assert np.allclose(log["TrustScore"], [r[3] for r in rows])
+    assert log["Thought_Hypocrisy"].tolist() == [r[5] == "true" for r in rows]
+
+    # 类别列字典编码：按首次出现顺序，每个取值只出现一次
+    with open(os.path.join(path, SCHEMA_FILE), "r", encoding="utf-8") as f:
+        dictionaries = json.load(f)["dictionaries"]
+    assert dictionaries["Action"] == list(dict.fromkeys(r[4] for r in rows))
+    assert dictionaries["AgentID"] == ["agent_0", "agent_1", "agent_2"]
+
+
+def test_strings_with_unicode_and_empty_values(tmp_path):
+    path = str(tmp_path / "thoughts")
+    reasons = ["价格太贵了 🌱", "", "line one\nline two", "plain"]
+    rows = [[1, f"agent_{i}", "Eco", i % 2 == 0, "oops" if i == 3 else 0.5, r] for i, r in enumerate(reasons)]
+    write(path, THOUGHTS_LOG_SCHEMA, rows)
+    log = read_log(path)
+    assert log["Reasoning"].tolist() == reasons
+    # 无法解析的数值记为 NaN 而不是让写线程出错
+    assert math.isnan(log["TrustChange"][3]) and log["TrustChange"][0] == 0.5
+
+
+def test_column_and_tick_projection(tmp_path):
+    path = str(tmp_path / "log")
+    rows = simulation_rows(range(1, 6))
+    write(path, SIMULATION_LOG_SCHEMA, rows)
+    log = read_log(path, columns=["AgentID", "Action"], ticks=[2, 4])
+    assert set(log) == {"AgentID", "Action"}
+    expected = [r for r in rows if r[0] in (2, 4)]
+    assert log["AgentID"].tolist() == [r[1] for r in expected]
+    assert log["Action"].tolist() == [r[4] for r in expected]
+
+    empty = read_log(path, columns=["Action", "TrustScore"], ticks=[99])
+    assert len(empty["Action"]) == 0 and len(empty["TrustScore"]) == 0
+
+
+def test_tell_reports_last_complete_tick(tmp_path):
+    writer = ColumnarLogWriter(str(tmp_path / "log"), SIMULATION_LOG_SCHEMA)
+    assert writer.tell() == 0
+    writer.writerows(simulation_rows([1, 2]))
+    # tell 会写出当前行组，检查点偏移量即最后一个完整的 tick
+    assert writer.tell() == 2
+    writer.writerows(simulation_rows([3]))
+    assert writer.tell() == 3
+    writer.close()
+
+
+def test_resume_truncates_later_ticks_and_keeps_dictionaries(tmp_path):
+    path = str(tmp_path / "log")
+    rows = simulation_rows(range(1, 6))
+    write(path, SIMULATION_LOG_SCHEMA, rows)
+
+    resumed = write(path, SIMULATION_LOG_SCHEMA, [[4, "agent_9", "Brand", 1.0, "skip", False]], resume_tick=3)
+    log = read_log(path)
+    assert sorted(set(log["Tick"].tolist())) == [1, 2, 3, 4]
+    kept = [r for r in rows if r[0] <= 3]
+    assert log["Action"].tolist() == [r[4] for r in kept] + ["skip"]
+    assert log["AgentID"].tolist()[-1] == "agent_9"
+    # 已有行组的编码仍然有效：字典只追加
+    assert resumed.dictionaries["Action"] == list(dict.fromkeys(r[4] for r in rows)) + ["skip"]
+    assert resumed.last_tick == 4
+
+
+def test_fresh_writer_discards_previous_run(tmp_path):
+    path = str(tmp_path / "log")
+    write(path, SIMULATION_LOG_SCHEMA, simulation_rows(range(1, 4)))
+    write(path, SIMULATION_LOG_SCHEMA, simulation_rows([1], agents=1))
+    log = read_log(path)
+    assert log["Tick"].tolist() == [1]
+
+
+def test_latest_log_and_stem(tmp_path):
+    csv_path = tmp_path / "simulation_log_20250101_000000.csv"
+    csv_path.write_text("Tick\n")
+    columnar = str(tmp_path / f"simulation_log_20250102_000000{COLUMNAR_SUFFIX}")
+    write(columnar, SIMULATION_LOG_SCHEMA, simulation_rows([1]))
+    os.utime(str(csv_path), (0, 0))
+    assert latest_log(str(tmp_path), "simulation_log") in (str(csv_path), columnar)
+    assert log_stem(columnar + os.sep) == str(tmp_path / "simulation_log_20250102_000000")
+    assert latest_log(str(tmp_path), "thoughts_log") is None
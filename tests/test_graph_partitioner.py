@@ -0,0 +1,80 @@
+import math
+
+import numpy as np
+import pytest
+
+from plugins.environment.network.TopologyGenerator import generate, to_csr
+from plugins.system.GraphPartitioner import bfs_order, cut_edges, partition_graph
+from plugins.system.Sharding import merge_tick_logs, shard_path
+
+
+def csr(generator, n, seed=3):
+    params = {"generator": generator, "seed": seed, "m": 3, "ws_k": 6, "ws_p": 0.05}
+    src, dst = generate(params, n)
+    return to_csr(src, dst, n)
+
+
+def brute_force_cut(indptr, indices, parts):
+    return sum(parts[u] != parts[v] for u in range(len(indptr) - 1)
+               for v in indices[indptr[u]:indptr[u + 1]] if u < v)
+
+
+@pytest.mark.parametrize("generator,n,k,imbalance", [("ws", 600, 4, 0.05),
+                                                     ("ba", 500, 3, 0.0),
+                                                     ("ba", 101, 7, 0.2)])
+def test_every_node_is_assigned_within_the_imbalance_bound(generator, n, k, imbalance):
+    indptr, indices = csr(generator, n)
+    parts = partition_graph(indptr, indices, k, imbalance)
+    assert parts.shape == (n,)
+    assert parts.min() >= 0 and parts.max() < k
+    sizes = np.bincount(parts, minlength=k)
+    assert sizes.sum() == n and np.all(sizes > 0)
+    assert sizes.max() <= math.ceil(n / k * (1 + imbalance))
+
+
+def test_refinement_does_not_increase_the_cut():
+    indptr, indices = csr("ws", 800)
+    k = 4
+    # 细化前的 BFS 连续切块即 passes=0 的结果
+    initial = partition_graph(indptr, indices, k, passes=0)
+    refined = partition_graph(indptr, indices, k)
+    assert cut_edges(indptr, indices, refined) <= cut_edges(indptr, indices, initial)
+    # 环状小世界图的局部划分远好于随机划分
+    random_parts = np.random.default_rng(0).integers(0, k, len(indptr) - 1)
+    assert cut_edges(indptr, indices, refined) < cut_edges(indptr, indices, random_parts) / 3
+
+
+def test_cut_edges_matches_brute_force():
+    indptr, indices = csr("ba", 120)
+    parts = np.random.default_rng(1).integers(0, 3, 120)
+    assert cut_edges(indptr, indices, parts) == brute_force_cut(indptr, indices, parts)
+
+
+def test_bfs_order_covers_every_component():
+    # 两个连通分量 (0-1-2) 与 (3-4)，以及孤立节点 5
+    indptr, indices = to_csr(np.array([0, 1, 3]), np.array([1, 2, 4]), 6)
+    order = bfs_order(indptr, indices)
+    assert sorted(order.tolist()) == list(range(6))
+    assert order[:3].tolist() == [0, 1, 2]
+
+
+def test_degenerate_inputs():
+    indptr, indices = csr("ba", 10)
+    assert partition_graph(indptr, indices, 1).tolist() == [0] * 10
+    # 分区数多于节点数时按 n 个分区划分，每个分区最多 ceil(1 + imbalance) 个节点
+    parts = partition_graph(indptr, indices, 50)
+    assert parts.max() < 10 and np.bincount(parts).max() <= 2
+    assert len(partition_graph(np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64), 4)) == 0
+
+
+def test_shard_paths_and_log_merge(tmp_path):
+    assert shard_path("cache/emb.npz", 2) == "cache/emb_shard2.npz"
+    assert shard_path("results/run", 0) == "results/run_shard0"
+    assert shard_path("", 1) == ""
+
+    rank = {"a": 0, "b": 1, "c": 2}
+    (tmp_path / "s0.csv").write_text("Tick,AgentID\n1,a\n1,c\n2,a\n")
+    (tmp_path / "s1.csv").write_text("Tick,AgentID\n1,b\n2,b\n")
+    out = tmp_path / "merged.csv"
+    merge_tick_logs([str(tmp_path / "s0.csv"), str(tmp_path / "s1.csv")], str(out), rank)
+    assert out.read_text().split() == ["Tick,AgentID", "1,a", "1,b", "1,c", "2,a", "2,b"]
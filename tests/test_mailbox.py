@@ -0,0 +1,124 @@
+import random
+
+import numpy as np
+
+from plugins.environment.network.Mailbox import MailboxSystem, Message
+
+
+def random_graph(n, p, seed):
+    rng = random.Random(seed)
+    neighbors = [[] for _ in range(n)]
+    for u in range(n):
+        for v in range(u + 1, n):
+            if rng.random() < p:
+                neighbors[u].append(v)
+                neighbors[v].append(u)
+    indptr = np.cumsum([0] + [len(nb) for nb in neighbors])
+    indices = np.array([v for nb in neighbors for v in nb], dtype=np.int64)
+    return neighbors, indptr, indices
+
+
+def build(n, indptr, indices, local=None):
+    mailboxes = MailboxSystem()
+    for i in range(n):
+        mailboxes.register(f"agent_{i}")
+    mailboxes.set_topology(indptr, indices, local)
+    return mailboxes
+
+
+def inboxes(mailboxes, n):
+    return [[m.content for m in mailboxes.take(f"agent_{i}")] for i in range(n)]
+
+
+def broadcasts(n, seed):
+    rng = random.Random(seed)
+    # 部分 Agent 在同一 tick 内广播多条
+    return [(s, f"post {s}.{k}") for s in range(n) for k in range(rng.randint(0, 2))]
+
+
+def test_fanout_matches_brute_force_in_sender_order():
+    n = 30
+    neighbors, indptr, indices = random_graph(n, 0.2, seed=1)
+    sent = broadcasts(n, seed=2)
+    expected = [[content for s, content in sent if i in neighbors[s]] for i in range(n)]
+
+    mailboxes = build(n, indptr, indices)
+    for s, content in sent:
+        mailboxes.broadcast(s, Message(f"agent_{s}", content))
+    mailboxes.swap()
+    assert [mailboxes.pending(f"agent_{i}") for i in range(n)] == [len(e) for e in expected]
+    assert inboxes(mailboxes, n) == expected
+
+
+def test_delivery_order_does_not_depend_on_completion_order():
+    n = 25
+    _, indptr, indices = random_graph(n, 0.25, seed=3)
+    sent = broadcasts(n, seed=4)
+    results = []
+    for seed in range(3):
+        # 打乱不同发送者之间的先后 (模拟 LLM 完成顺序)，同一发送者内保持顺序
+        order = sorted(range(len(sent)), key=lambda j: (random.Random(seed * 1000 + sent[j][0]).random(), j))
+        mailboxes = build(n, indptr, indices)
+        for j in order:
+            s, content = sent[j]
+            mailboxes.broadcast(s, Message(f"agent_{s}", content))
+        mailboxes.swap()
+        results.append(inboxes(mailboxes, n))
+    assert results[0] == results[1] == results[2]
+
+
+def test_sharded_fanout_matches_single_process():
+    n = 24
+    _, indptr, indices = random_graph(n, 0.2, seed=5)
+    sent = broadcasts(n, seed=6)
+    full = build(n, indptr, indices)
+    for s, content in sent:
+        full.broadcast(s, Message(f"agent_{s}", content))
+    full.swap()
+    expected = inboxes(full, n)
+
+    parts = np.arange(n) % 3
+    merged = [None] * n
+    for shard in range(3):
+        mailboxes = build(n, indptr, indices, local=parts == shard)
+        # 远程广播在屏障处到达，排在本地广播之后
+        local_first = sorted(sent, key=lambda item: parts[item[0]] != shard)
+        for s, content in local_first:
+            mailboxes.broadcast(s, Message(f"agent_{s}", content))
+        mailboxes.swap()
+        for i, inbox in enumerate(inboxes(mailboxes, n)):
+            if parts[i] == shard:
+                merged[i] = inbox
+            else:
+                assert inbox == []
+    assert merged == expected
+
+
+def test_double_buffer_and_direct_posts():
+    n = 3
+    mailboxes = build(n, np.array([0, 1, 2, 2]), np.array([1, 0]))
+    mailboxes.post_to("agent_2", Message("system", "direct"))
+    mailboxes.broadcast(0, Message("agent_0", "hello"))
+    # swap 之前写入的消息不可读
+    assert mailboxes.take("agent_1") == []
+    mailboxes.swap()
+    mailboxes.post_to("agent_1", Message("system", "next tick"))
+    assert [m.content for m in mailboxes.take("agent_1")] == ["hello"]
+    assert [m.content for m in mailboxes.take("agent_2")] == ["direct"]
+    assert mailboxes.take("agent_1") == []
+    mailboxes.swap()
+    assert [m.content for m in mailboxes.take("agent_1")] == ["next tick"]
+
+
+def test_checkpoint_restores_unsent_broadcasts():
+    n = 3
+    indptr, indices = np.array([0, 2, 3, 4]), np.array([1, 2, 0, 0])
+    mailboxes = build(n, indptr, indices)
+    mailboxes.broadcast(0, Message("agent_0", "pending"))
+    mailboxes.post_to("agent_0", Message("system", "direct"))
+    snapshot = mailboxes.checkpoint_state()
+
+    restored = build(n, indptr, indices)
+    restored.restore_checkpoint(snapshot)
+    restored.swap()
+    assert inboxes(restored, n) == [["direct"], ["pending"], ["pending"]]
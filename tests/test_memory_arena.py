@@ -0,0 +1,94 @@
+import random
+
+import numpy as np
+
+from plugins.agent.reflect.EmbeddingProvider import HashingEmbeddingProvider
+from plugins.agent.reflect.MemoryArena import MemoryArena
+from plugins.agent.reflect.MemoryManager import MemoryManager
+from plugins.agent.reflect.MemoryPolicy import MemoryPolicy
+
+WORDS = ["oat", "milk", "green", "brand", "sugar", "review", "trust", "price", "carbon", "label", "friend", "ad"]
+
+
+def random_text(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8)))
+
+
+def populate(n_agents=12, n_memories=20, seed=0, policy=None):
+    rng = random.Random(seed)
+    embedder = HashingEmbeddingProvider(dim=64)
+    policy = policy or MemoryPolicy()
+    arena = MemoryArena(embedder=embedder, policy=policy, initial_capacity=4)
+    managers = {}
+    for a in range(n_agents):
+        agent_id = f"agent_{a}"
+        arena.register(agent_id)
+        managers[agent_id] = MemoryManager(embedder=embedder, policy=MemoryPolicy())
+    # 交错写入，使各 Agent 的记忆行在共享池中相互穿插
+    for tick in range(n_memories):
+        for agent_id, manager in managers.items():
+            if rng.random() < 0.7:
+                text, importance = random_text(rng), rng.uniform(1, 10)
+                arena.view(agent_id).add_memory(tick, text, importance)
+                manager.add_memory(tick, text, importance)
+    return arena, managers, rng
+
+
+def test_batch_retrieve_matches_per_agent_managers():
+    arena, managers, rng = populate()
+    requests = [(agent_id, random_text(rng)) for agent_id in managers]
+    for top_k in (1, 3, 50):
+        results = arena.batch_retrieve(requests, current_tick=25, top_k=top_k)
+        for agent_id, query in requests:
+            expected = managers[agent_id].retrieve(25, query, top_k)
+            assert results[agent_id] == expected
+            assert arena.view(agent_id).retrieve(25, query, top_k) == expected
+
+
+def test_batch_retrieve_handles_empty_agents_and_repeated_queries():
+    arena, managers, _ = populate(n_agents=3, n_memories=5)
+    arena.register("newcomer")
+    requests = [("agent_0", "oat milk"), ("newcomer", "oat milk"), ("agent_2", "oat milk")]
+    results = arena.batch_retrieve(requests, current_tick=6, top_k=2)
+    assert results["newcomer"] == []
+    assert results["agent_0"] == managers["agent_0"].retrieve(6, "oat milk", 2)
+    assert results["agent_2"] == managers["agent_2"].retrieve(6, "oat milk", 2)
+
+
+def test_enforce_capacity_bounds_every_agent():
+    policy = MemoryPolicy(capacity=5)
+    arena, managers, rng = populate(policy=policy)
+    removed = arena.enforce_capacity(current_tick=20)
+    assert removed > 0
+    for agent_id in managers:
+        view = arena.view(agent_id)
+        assert len(view) <= 5
+        assert len(view.memory_stream) == len(view)
+    # 压缩后的索引与检索仍然一致
+    query = random_text(rng)
+    batch = arena.batch_retrieve([(a, query) for a in managers], current_tick=20, top_k=3)
+    for agent_id in managers:
+        assert batch[agent_id] == arena.view(agent_id).retrieve(20, query, 3)
+
+
+def test_consolidation_folds_victims_into_summary():
+    arena, managers, _ = populate(n_agents=2, n_memories=30, policy=MemoryPolicy(capacity=6, consolidate=True))
+    arena.enforce_capacity(current_tick=30)
+    for agent_id in managers:
+        stream = arena.view(agent_id).memory_stream
+        assert len(stream) <= 6
+        assert any(r["content"].startswith("[回忆摘要") for r in stream)
+
+
+def test_replace_round_trips_memory_stream():
+    arena, managers, _ = populate(n_agents=4, n_memories=8)
+    snapshot = {agent_id: arena.view(agent_id).memory_stream for agent_id in managers}
+    restored = MemoryArena(embedder=arena.embedder, policy=arena.policy)
+    for agent_id, records in snapshot.items():
+        restored.view(agent_id).replace_memories(records)
+    # 再次整体替换同一 Agent 不会残留旧记忆
+    restored.view("agent_1").replace_memories(snapshot["agent_1"])
+    for agent_id, records in snapshot.items():
+        got = restored.view(agent_id).memory_stream
+        assert [(r["tick"], r["content"]) for r in got] == [(r["tick"], r["content"]) for r in records]
+        assert np.allclose([r["importance"] for r in got], [r["importance"] for r in records])
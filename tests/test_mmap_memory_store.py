@@ -0,0 +1,115 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+from plugins.agent.reflect.EmbeddingProvider import HashingEmbeddingProvider
+from plugins.agent.reflect.MemoryManager import MemoryManager
+from plugins.agent.reflect.MemoryPolicy import MemoryPolicy
+from plugins.agent.reflect.MmapMemoryStore import MmapMemoryStore
+
+EMBEDDER = HashingEmbeddingProvider(dim=32)
+
+
+def open_store(path, capacity=8, **kwargs):
+    return MmapMemoryStore(str(path), embedder=EMBEDDER, policy=MemoryPolicy(capacity=capacity),
+                           embedding_dtype="float32", initial_agents=2, **kwargs)
+
+
+def fill(store, n_agents=5, n_memories=6, seed=0):
+    rng = random.Random(seed)
+    for tick in range(n_memories):
+        for a in range(n_agents):
+            store.view(f"agent_{a}").add_memory(tick, f"memory {a} at {tick} note {rng.random():.6f}",
+                                                rng.uniform(1, 10))
+
+
+def streams(store):
+    return {agent_id: [(r["tick"], r["content"]) for r in store.view(agent_id).memory_stream]
+            for agent_id in store.agent_ids}
+
+
+def test_reopen_restores_agents_and_memories(tmp_path):
+    store = open_store(tmp_path)
+    fill(store)
+    before = streams(store)
+    store.close()
+
+    reopened = open_store(tmp_path)
+    assert reopened.agent_ids == [f"agent_{a}" for a in range(5)]
+    assert streams(reopened) == before
+    reopened.view("agent_0").add_memory(99, "after reopen", 5.0)
+    assert reopened.view("agent_0").memory_stream[-1]["content"] == "after reopen"
+    reopened.close()
+
+
+def test_reopen_with_different_capacity_is_rejected(tmp_path):
+    store = open_store(tmp_path, capacity=8)
+    fill(store)
+    store.close()
+    with pytest.raises(ValueError):
+        open_store(tmp_path, capacity=4)
+
+
+def test_fresh_store_discards_existing_files(tmp_path):
+    store = open_store(tmp_path)
+    fill(store)
+    store.close()
+    fresh = open_store(tmp_path, reopen=False)
+    assert fresh.agent_ids == []
+    assert fresh._contents_size() == 0
+    fresh.close()
+
+
+def test_capacity_is_enforced_on_write(tmp_path):
+    store = open_store(tmp_path, capacity=4)
+    fill(store, n_memories=10)
+    for a, agent_id in enumerate(store.agent_ids):
+        assert len(store.view(agent_id)) == 4
+        # 槽位不会越界写入相邻 Agent
+        assert all(r["content"].startswith(f"memory {a} ") for r in store.view(agent_id).memory_stream)
+    store.close()
+
+
+def test_retrieve_matches_memory_manager(tmp_path):
+    store = open_store(tmp_path, capacity=16)
+    managers = {f"agent_{a}": MemoryManager(embedder=EMBEDDER, policy=MemoryPolicy()) for a in range(4)}
+    rng = random.Random(1)
+    for tick in range(10):
+        for agent_id, manager in managers.items():
+            text, importance = f"oat milk {rng.random():.4f} review {tick}", rng.uniform(1, 10)
+            store.view(agent_id).add_memory(tick, text, importance)
+            manager.add_memory(tick, text, importance)
+    requests = [(agent_id, "oat milk review") for agent_id in managers]
+    results = store.batch_retrieve(requests, current_tick=12, top_k=3)
+    for agent_id, query in requests:
+        assert results[agent_id] == managers[agent_id].retrieve(12, query, 3)
+    store.close()
+
+
+def test_compaction_reclaims_evicted_text(tmp_path):
+    store = open_store(tmp_path, capacity=3, compact_min_bytes=0, compact_ratio=0.5)
+    fill(store, n_agents=3, n_memories=40)
+    before = streams(store)
+    grown = store._contents_size()
+    store.enforce_capacity(current_tick=40)
+    assert store._contents_size() < grown
+    assert streams(store) == before
+    live = int(store._text_length[store._live_slots()].sum())
+    assert os.path.getsize(os.path.join(str(tmp_path), "contents.bin")) == live
+    store.close()
+    assert streams(open_store(tmp_path, capacity=3)) == before
+
+
+def test_replace_round_trips_memory_stream(tmp_path):
+    store = open_store(tmp_path)
+    fill(store, n_agents=2)
+    records = store.view("agent_1").memory_stream
+    store.view("agent_0").replace_memories(records)
+    got = store.view("agent_0").memory_stream
+    assert [(r["tick"], r["content"]) for r in got] == [(r["tick"], r["content"]) for r in records]
+    assert np.allclose(np.stack([r["embedding"] for r in got]), np.stack([r["embedding"] for r in records]))
+    with pytest.raises(ValueError):
+        store.view("agent_0").replace_memories(records * 3)
+    store.close()
@@ -0,0 +1,33 @@
+import numpy as np
+
+from plugins.agent.state.PopulationStore import ACTION_CODES, PopulationStore, merge_partials, plan_action
+
+
+def test_known_actions_are_coded_and_raw_strings_kept():
+    store = PopulationStore(initial_capacity=2)
+    plans = [{"action": "buy"}, {"action": "Buy"}, [{"action": "post_review"}], {"action": "post review"}, {}]
+    rows = [store.row(f"agent_{i}") for i in range(len(plans))]
+    for row, plan in zip(rows, plans):
+        row["plan_result"] = plan
+    assert store.actions().tolist() == [ACTION_CODES["buy"], ACTION_CODES["none"], ACTION_CODES["post_review"],
+                                        ACTION_CODES["none"], ACTION_CODES["none"]]
+    # 日志使用模型原样返回的动作，格式不合规的输出不会被改写成 none
+    assert [plan_action(row["plan_result"]) for row in rows] == ["buy", "Buy", "post_review", "post review", "none"]
+    assert plan_action(None) == "none"
+    assert plan_action({"action": None}) is None
+
+
+def test_numeric_columns_and_tick_partials():
+    store = PopulationStore(initial_capacity=1)
+    for i, (trust, action) in enumerate([(4.0, "buy"), (6.0, "ignore"), (None, "post_review")]):
+        row = store.row(f"agent_{i}", {"trust_score": trust, "budget": 100})
+        row["plan_result"] = {"action": action}
+    assert "trust_score" not in store.row("agent_2")
+    partials = store.tick_partials()
+    assert partials["new_buys"] == 1 and partials["posts"] == 1 and partials["cumulative_buys"] == 1
+    assert merge_partials([partials])["avg_trust"] == np.mean([4.0, 6.0, 5.0])
+
+    store.row("agent_0")["plan_result"] = {"action": "ignore"}
+    store.row("agent_1")["plan_result"] = {"action": "buy"}
+    assert store.tick_partials()["cumulative_buys"] == 2
+    assert store.is_buyer(0) and store.is_buyer(1) and not store.is_buyer(2)
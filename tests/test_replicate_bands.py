@@ -0,0 +1,64 @@
+import csv
+
+import numpy as np
+import pytest
+
+from run_replicates import ReplicateStore, t_critical
+
+
+def macro_csv(path, trust, conversion):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Tick", "AvgTrust", "NewBuys", "CumulativeBuys", "ConversionRate", "PostCount"])
+        for tick, (t, c) in enumerate(zip(trust, conversion), start=1):
+            writer.writerow([tick, t, 0, 0, c, 0])
+    return str(path)
+
+
+def store_with(tmp_path, runs):
+    store = ReplicateStore(str(tmp_path / "replicates.csv"))
+    for replicate, (trust, conversion) in enumerate(runs):
+        store.add(replicate, 100 + replicate, macro_csv(tmp_path / f"macro_{replicate}.csv", trust, conversion))
+    return store
+
+
+def test_t_critical_table():
+    assert t_critical(1) == 12.706
+    assert t_critical(4) == 2.776
+    assert t_critical(30) == 2.042
+    assert t_critical(31) == 1.96
+
+
+def test_bands_match_hand_computed_t_interval(tmp_path):
+    # tick 1: 1..5 -> 均值 3, s = sqrt(2.5), 半宽 2.776 · sqrt(2.5) / sqrt(5) = 2.776 · sqrt(0.5)
+    # tick 2: 全部相同 -> 区间退化为一点
+    runs = [([v, 4.0], [0.1 * v, 0.5]) for v in (1.0, 2.0, 3.0, 4.0, 5.0)]
+    store = store_with(tmp_path, runs)
+    mean, lower, upper = store.bands("AvgTrust")
+    half = 2.776 * np.sqrt(0.5)
+    assert np.allclose(mean, [3.0, 4.0])
+    assert np.allclose(lower, [3.0 - half, 4.0]) and np.allclose(upper, [3.0 + half, 4.0])
+    assert store.max_width("AvgTrust") == pytest.approx(2 * half)
+
+    mean, lower, upper = store.bands("ConversionRate")
+    assert np.allclose([mean[0], lower[0], upper[0]], [0.3, 0.3 - 0.1 * half, 0.3 + 0.1 * half])
+    store.close()
+
+
+def test_bands_use_common_prefix_and_need_two_runs(tmp_path):
+    store = store_with(tmp_path, [([2.0, 3.0, 9.0], [0.0, 0.0, 0.0])])
+    mean, lower, upper = store.bands("AvgTrust")
+    assert mean.tolist() == [2.0, 3.0, 9.0] and np.all(np.isnan(lower)) and np.all(np.isnan(upper))
+    assert store.max_width("AvgTrust") == float("inf")
+
+    # 提前结束的运行只按共同的 tick 前缀计算
+    store.add(1, 101, macro_csv(tmp_path / "short.csv", [4.0, 5.0], [0.0, 0.0]))
+    mean, lower, upper = store.bands("AvgTrust")
+    half = 12.706  # s = sqrt(2), n = 2 -> t · s / sqrt(n) = t
+    assert np.allclose(mean, [3.0, 4.0])
+    assert np.allclose(upper - mean, [half, half])
+    store.close()
+
+    with open(tmp_path / "replicates.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [(r["Replicate"], r["Tick"]) for r in rows] == [("0", "1"), ("0", "2"), ("0", "3"), ("1", "1"), ("1", "2")]
@@ -0,0 +1,93 @@
+import asyncio
+import sqlite3
+
+from plugins.model.ResponseCache import ResponseCache
+
+PLAN_PROMPT = 'Tick 3 | Trust: 0.52 | Reply as JSON with "action": buy/post_review/ignore'
+
+
+class CountingRouter:
+    def __init__(self, response='{"action": "ignore"}'):
+        self.response = response
+        self.calls = 0
+
+    async def chat(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return self.response
+
+
+def test_hit_after_miss_and_persisted(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    router = CountingRouter()
+    cache = ResponseCache(router, path)
+    assert asyncio.run(cache.chat(PLAN_PROMPT)) == router.response
+    assert asyncio.run(cache.chat(PLAN_PROMPT)) == router.response
+    assert router.calls == 1
+    assert cache.stats["plan"] == {"hits": 1, "misses": 1}
+    cache.close()
+
+    reopened = ResponseCache(router, path)
+    assert asyncio.run(reopened.chat(PLAN_PROMPT)) == router.response
+    assert router.calls == 1
+    reopened.close()
+
+
+def test_concurrent_requests_are_coalesced(tmp_path):
+    router = CountingRouter()
+    cache = ResponseCache(router, str(tmp_path / "cache.sqlite"))
+
+    async def burst():
+        return await asyncio.gather(*(cache.chat(PLAN_PROMPT) for _ in range(5)))
+
+    assert asyncio.run(burst()) == [router.response] * 5
+    assert router.calls == 1
+    cache.close()
+
+
+def test_invalid_json_is_not_cached(tmp_path):
+    router = CountingRouter(response="not json")
+    cache = ResponseCache(router, str(tmp_path / "cache.sqlite"))
+    asyncio.run(cache.chat(PLAN_PROMPT))
+    asyncio.run(cache.chat(PLAN_PROMPT))
+    assert router.calls == 2
+    cache.close()
+
+
+def test_trust_bucketing_and_tick_normalization(tmp_path):
+    cache = ResponseCache(CountingRouter(), str(tmp_path / "cache.sqlite"), trust_step=0.1, ignore_tick=True)
+    assert cache.make_key(PLAN_PROMPT) == cache.make_key(PLAN_PROMPT.replace("Tick 3", "Tick 9")
+                                                         .replace("0.52", "0.49"))
+    assert cache.make_key(PLAN_PROMPT) != cache.make_key(PLAN_PROMPT.replace("0.52", "0.71"))
+    cache.close()
+
+
+def test_access_times_are_batched(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(CountingRouter(), path, flush_every=3)
+    asyncio.run(cache.chat(PLAN_PROMPT))
+    key = cache.make_key(PLAN_PROMPT)
+    stored = cache._conn.execute("SELECT last_access FROM responses WHERE key = ?", (key,)).fetchone()[0]
+
+    asyncio.run(cache.chat(PLAN_PROMPT))
+    assert cache._conn.execute("SELECT last_access FROM responses WHERE key = ?", (key,)).fetchone()[0] == stored
+    assert key in cache._touched
+
+    asyncio.run(cache.chat(PLAN_PROMPT))
+    asyncio.run(cache.chat(PLAN_PROMPT))
+    assert not cache._touched
+    assert cache._conn.execute("SELECT last_access FROM responses WHERE key = ?", (key,)).fetchone()[0] > stored
+    cache.close()
+    assert sqlite3.connect(path).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_eviction_keeps_total_under_limit(tmp_path):
+    cache = ResponseCache(CountingRouter(response='{"x": "' + "a" * 400 + '"}'),
+                          str(tmp_path / "cache.sqlite"), max_mb=2000 / 1024 / 1024)
+    for tick in range(10):
+        asyncio.run(cache.chat(PLAN_PROMPT.replace("Tick 3", f"Tick {tick}")))
+    assert cache._total_bytes <= cache.max_bytes
+    assert cache.evictions > 0
+    rows = cache._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    assert rows == cache._total_bytes
+    cache.close()
@@ -0,0 +1,95 @@
+import json
+
+import numpy as np
+import pytest
+
+from plugins.agent.state.PopulationStore import ACTION_CODES
+from plugins.system.StreamingMetrics import (DEFAULT_QUANTILES, MetricsAggregator, TickMetrics, TrustSketch,
+                                             encode_groups)
+
+rng = np.random.default_rng(0)
+N = 500
+TRUST = np.round(rng.uniform(0, 10, N), 2)
+CLUSTERS = rng.choice(["Eco", "Price", "Brand", "Skeptic"], N)
+ROLES = rng.choice(["KOL", "Follower"], N)
+HYPOCRISY = rng.random(N) < 0.3
+ACTIONS = rng.choice(list(ACTION_CODES.values()), N)
+
+
+def nearest_rank(values, q):
+    values = np.sort(np.rint(np.asarray(values) * 100) / 100)
+    return float(values[max(1, int(np.ceil(q * len(values)))) - 1])
+
+
+def population_metrics(tick, index):
+    groupings = {"cluster_type": encode_groups(CLUSTERS[index]), "social_role": encode_groups(ROLES[index])}
+    return TickMetrics(tick).add_population(groupings, TRUST[index], HYPOCRISY[index], ACTIONS[index])
+
+
+@pytest.mark.parametrize("q", [0.0, 0.1, 0.25, 0.5, 0.9, 1.0])
+def test_sketch_quantiles_match_nearest_rank(q):
+    sketch = TrustSketch().add(TRUST)
+    assert sketch.quantile(q) == pytest.approx(nearest_rank(TRUST, q))
+    assert sketch.mean() == pytest.approx(np.rint(TRUST * 100).mean() / 100)
+
+
+def test_sketch_merge_is_exact_and_order_free():
+    full = TrustSketch().add(TRUST)
+    parts = [TrustSketch().add(chunk) for chunk in np.array_split(TRUST, 7)]
+    forward, backward = TrustSketch(), TrustSketch()
+    for part in parts:
+        forward.merge(part)
+    for part in reversed(parts):
+        backward.merge(part)
+    assert np.array_equal(forward.counts, full.counts)
+    assert np.array_equal(backward.counts, full.counts)
+    assert np.array_equal(TrustSketch.from_dict(json.loads(json.dumps(full.to_dict()))).counts, full.counts)
+
+
+def test_sharded_tick_metrics_merge_to_full_population():
+    full = population_metrics(3, np.arange(N))
+    parts = np.arange(N) % 4
+    merged = TickMetrics.merged(3, (population_metrics(3, np.flatnonzero(parts == k)) for k in range(4)))
+    assert merged.summary(DEFAULT_QUANTILES) == full.summary(DEFAULT_QUANTILES)
+
+    eco = full.summary(DEFAULT_QUANTILES)["cluster_type"]["Eco"]
+    mask = CLUSTERS == "Eco"
+    assert eco["agents"] == int(mask.sum())
+    assert eco["buys"] == int((ACTIONS[mask] == ACTION_CODES["buy"]).sum())
+    assert eco["p50"] == pytest.approx(nearest_rank(TRUST[mask], 0.5))
+
+
+def test_tick_metrics_dict_round_trip():
+    metrics = population_metrics(1, np.arange(N))
+    restored = TickMetrics.from_dict(json.loads(json.dumps(metrics.to_dict())))
+    assert restored.summary(DEFAULT_QUANTILES) == metrics.summary(DEFAULT_QUANTILES)
+
+
+def kpi(rate):
+    return {"avg_trust": 5.0, "conversion_rate": rate, "new_buys": 1, "posts": 2}
+
+
+def test_aggregator_detects_t50_and_snapshots_only_current_tick():
+    aggregator = MetricsAggregator(t50_threshold=0.5)
+    metrics = population_metrics(0, np.arange(N))
+    snapshots = [aggregator.update(tick, kpi(rate), metrics) for tick, rate in enumerate([0.1, 0.3, 0.5, 0.7])]
+    assert aggregator.t50 == 2
+    assert [s["t50"] for s in snapshots] == [None, None, 2, 2]
+    assert all("history" not in s for s in snapshots)
+    assert snapshots[0]["overall"]["conversion_rate"] == 0.1
+
+
+def test_aggregator_checkpoint_round_trip():
+    aggregator = MetricsAggregator(t50_threshold=0.5)
+    metrics = population_metrics(0, np.arange(N))
+    for tick, rate in enumerate([0.2, 0.6]):
+        aggregator.update(tick, kpi(rate), metrics)
+    state = aggregator.checkpoint_state()
+    # 检查点大小与运行时长无关
+    assert state == {"t50": 1}
+
+    restored = MetricsAggregator(t50_threshold=0.5)
+    restored.restore_checkpoint(state)
+    assert restored.t50 == 1
+    # 恢复后不会重复报告 T50
+    assert restored.update(2, kpi(0.8), metrics)["t50"] == 1
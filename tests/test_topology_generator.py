@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from plugins.environment.network.TopologyGenerator import (GENERATORS, barabasi_albert, generate, load_graph_json,
+                                                           load_or_generate, save_graph_json, simplify, to_csr)
+
+N = 200
+GROUPS = ["Eco" if i % 3 == 0 else ("Price" if i % 3 == 1 else "Brand") for i in range(N)]
+
+
+def params(generator, seed=7):
+    return {"generator": generator, "seed": seed, "m": 2, "ws_k": 4, "ws_p": 0.1,
+            "sbm_k_in": 4, "sbm_k_out": 1, "config_gamma": 2.5, "config_min_degree": 2}
+
+
+@pytest.mark.parametrize("generator", GENERATORS)
+def test_same_seed_gives_same_graph(generator):
+    a = generate(params(generator), N, GROUPS)
+    b = generate(params(generator), N, GROUPS)
+    c = generate(params(generator, seed=8), N, GROUPS)
+    assert all(np.array_equal(x, y) for x, y in zip(a, b))
+    assert not (len(a[0]) == len(c[0]) and np.array_equal(a[0], c[0]) and np.array_equal(a[1], c[1]))
+
+
+@pytest.mark.parametrize("generator", GENERATORS)
+def test_edges_are_simple_and_in_range(generator):
+    src, dst = generate(params(generator), N, GROUPS)
+    assert len(src) > 0
+    assert np.all(src < dst) and np.all(dst < N) and np.all(src >= 0)
+    assert len(np.unique(src.astype(np.int64) * N + dst)) == len(src)
+
+
+@pytest.mark.parametrize("n, m", [(20, 2), (N, 2), (50, 3), (6, 5)])
+def test_barabasi_albert_gives_each_new_node_m_distinct_edges(n, m):
+    for seed in range(20):
+        src, dst = barabasi_albert(n, m, np.random.default_rng(seed))
+        # 每个新节点恰好 m 条不同的边，没有被 simplify 去掉的自环或重边
+        assert len(src) == (n - m) * m
+        degrees = np.bincount(np.concatenate([src, dst]), minlength=n)
+        assert degrees[m:].min() >= m
+        assert np.all(degrees > 0)
+
+
+def test_small_populations_are_fully_connected():
+    for n in range(1, 5):
+        src, _ = generate(params("ba"), n, GROUPS[:n])
+        assert len(src) == n * (n - 1) // 2
+
+
+def test_simplify_and_csr():
+    src, dst = simplify(np.array([0, 1, 2, 2, 3]), np.array([1, 0, 2, 3, 2]), 4)
+    assert list(zip(src.tolist(), dst.tolist())) == [(0, 1), (2, 3)]
+    indptr, indices = to_csr(src, dst, 4)
+    assert indptr.tolist() == [0, 1, 2, 3, 4]
+    assert indices.tolist() == [1, 0, 3, 2]
+
+
+def test_cache_round_trip_and_unseeded_bypass(tmp_path):
+    cache_dir = str(tmp_path / "topology")
+    first = load_or_generate(params("ws"), N, GROUPS, cache_dir)
+    assert len(list((tmp_path / "topology").iterdir())) == 1
+    second = load_or_generate(params("ws"), N, GROUPS, cache_dir)
+    assert all(np.array_equal(x, y) for x, y in zip(first, second))
+
+    load_or_generate(params("ws", seed=None), N, GROUPS, cache_dir)
+    assert len(list((tmp_path / "topology").iterdir())) == 1
+
+
+def test_graph_json_round_trip(tmp_path):
+    ids = [f"agent_{i}" for i in range(N)]
+    src, dst = generate(params("sbm"), N, GROUPS)
+    path = str(tmp_path / "graph.json")
+    save_graph_json(path, ids, src, dst)
+    loaded_ids, loaded_src, loaded_dst = load_graph_json(path)
+    assert loaded_ids == ids
+    assert np.array_equal(loaded_src, src) and np.array_equal(loaded_dst, dst)
@@ -4,23 +4,24 @@ import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 import os
 import glob
-import json
 import numpy as np
 
+from plugins.system.ColumnarLog import latest_log, load_log, log_stem
+from plugins.environment.network.TopologyGenerator import load_graph_json
+
 
 def visualize_simulation_gif():
     # 1. 自动定位最新文件
     results_dir = os.path.join(os.path.dirname(__file__), "results")
 
     # 找最新的 log 和 graph
-    csv_files = glob.glob(os.path.join(results_dir, 'simulation_log_*.csv'))
+    latest_csv = latest_log(results_dir, 'simulation_log')
     graph_files = glob.glob(os.path.join(results_dir, 'network_graph_*.json'))
 
-    if not csv_files or not graph_files:
+    if not latest_csv or not graph_files:
         print("❌ 未找到数据文件，请先运行 run_simulation.py")
         return
 
-    latest_csv = max(csv_files, key=os.path.getctime)
     # 假设 log 和 graph 是成对生成的，取时间戳匹配的 graph，或者直接取最新的
     latest_graph = max(graph_files, key=os.path.getctime)
 
@@ -28,12 +29,13 @@ def visualize_simulation_gif():
 
     # 2. 读取数据
     # 读取网络结构
-    with open(latest_graph, "r", encoding="utf-8") as f:
-        graph_data = json.load(f)
-    G = nx.node_link_graph(graph_data)
+    ids, src, dst = load_graph_json(latest_graph)
+    G = nx.Graph()
+    G.add_nodes_from(ids)
+    G.add_edges_from((ids[u], ids[v]) for u, v in zip(src.tolist(), dst.tolist()))
 
-    # 读取仿真日志
-    df = pd.read_csv(latest_csv)
+    # 读取仿真日志 (只需要着色与标记发帖者的列)
+    df = load_log(latest_csv, columns=['Tick', 'AgentID', 'TrustScore', 'Action'])
     ticks = sorted(df['Tick'].unique())
 
     # 3. 设置绘图布局 (固定布局，防止节点乱跑)
@@ -104,7 +106,7 @@ def visualize_simulation_gif():
     ani = animation.FuncAnimation(fig, update, frames=ticks, interval=1000, repeat=True)
 
     # 保存为 GIF
-    save_path = latest_csv.replace(".csv", "_network.gif")
+    save_path = log_stem(latest_csv) + "_network.gif"
 
     # 使用 Pillow writer (不需要安装 ffmpeg)
     try: